@@ -1,9 +1,10 @@
 from fastapi import APIRouter
-from app.api.routes import content, clients
+from app.api.routes import content, clients, admin
 
 # Create main API router
 api_router = APIRouter()
 
 # Include routers from different modules
 api_router.include_router(content.router)
-api_router.include_router(clients.router)
\ No newline at end of file
+api_router.include_router(clients.router)
+api_router.include_router(admin.router)
\ No newline at end of file
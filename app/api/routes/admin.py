@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, status, BackgroundTasks, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
+from app.core.supabase_auth import get_current_admin_user, SupabaseUser
+from app.services.integrity_service import (
+    IntegrityService,
+    get_cached_report,
+    report_is_running,
+    run_integrity_report,
+)
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.post("/integrity/report", status_code=status.HTTP_202_ACCEPTED)
+async def start_integrity_report(
+    background_tasks: BackgroundTasks,
+    current_user: SupabaseUser = Depends(get_current_admin_user)
+):
+    """Start a background integrity run (no-op if one is already running)"""
+    if not report_is_running():
+        background_tasks.add_task(run_integrity_report)
+    return {"message": "Integrity report started", "status": "running"}
+
+@router.get("/integrity/report")
+async def read_integrity_report(
+    background_tasks: BackgroundTasks,
+    current_user: SupabaseUser = Depends(get_current_admin_user)
+):
+    """Get the cached integrity summary, refreshing it in the background when stale"""
+    report = get_cached_report()
+    if report["stale"] and not report_is_running():
+        background_tasks.add_task(run_integrity_report)
+    return report
+
+@router.get("/integrity/orphaned-content")
+async def list_orphaned_content(
+    after_id: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_admin_user)
+):
+    """Page through content whose client no longer exists"""
+    return await IntegrityService(db).orphaned_content_page(after_id, limit)
+
+@router.get("/integrity/clients-without-user")
+async def list_clients_without_user(
+    after_id: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_admin_user)
+):
+    """Page through clients that are not linked to a Supabase user"""
+    return await IntegrityService(db).clients_without_user_page(after_id, limit)
+
+@router.get("/integrity/user-totals")
+async def list_user_totals(
+    after_user_id: str = "",
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_admin_user)
+):
+    """Page through per-user client and content totals"""
+    return await IntegrityService(db).user_totals_page(after_user_id, limit)
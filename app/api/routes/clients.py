@@ -1,17 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Request
 from typing import List
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.client import ClientCreate, Client as ClientSchema
+from app.models.imports import ImportReport
 from app.db.models import Client
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.core.supabase_auth import get_current_active_user, SupabaseUser
+from app.services.import_service import BulkImportService
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
+async def get_owned_client(db: AsyncSession, client_id: int, user_id: str):
+    """Load a client only if it belongs to the given user"""
+    result = await db.execute(
+        select(Client).where(Client.id == client_id, Client.user_id == user_id)
+    )
+    return result.scalars().first()
+
 @router.post("/", response_model=ClientSchema, status_code=status.HTTP_201_CREATED)
-def create_client(
+async def create_client(
     client: ClientCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Create a new client for the authenticated user"""
@@ -27,49 +37,54 @@ def create_client(
         user_id=current_user.id  # Link to Supabase user ID
     )
     db.add(db_client)
-    db.commit()
-    db.refresh(db_client)
+    await db.commit()
+    await db.refresh(db_client)
     return db_client
 
+@router.post("/import", response_model=ImportReport)
+async def import_clients(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Bulk import clients from an NDJSON body (one client per line; rows with an id are updated)"""
+    service = BulkImportService(db, current_user.id)
+    return await service.import_clients(request.stream())
+
 @router.get("/", response_model=List[ClientSchema])
-def read_clients(
+async def read_clients(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Get all clients - temporarily returning all clients for testing"""
-    clients = db.query(Client).offset(skip).limit(limit).all()
+    result = await db.execute(select(Client).offset(skip).limit(limit))
+    clients = result.scalars().all()
 
     return clients
 
 @router.get("/{client_id}", response_model=ClientSchema)
-def read_client(
+async def read_client(
     client_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Get a specific client (only if owned by authenticated user)"""
-    db_client = db.query(Client).filter(
-        Client.id == client_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_client = await get_owned_client(db, client_id, current_user.id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found")
     return db_client
 
 @router.put("/{client_id}", response_model=ClientSchema)
-def update_client(
+async def update_client(
     client_id: int,
     client: ClientCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Update a client (only if owned by authenticated user)"""
-    db_client = db.query(Client).filter(
-        Client.id == client_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_client = await get_owned_client(db, client_id, current_user.id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found")
 
@@ -77,28 +92,21 @@ def update_client(
     for key, value in client.model_dump(exclude_unset=True).items():
         setattr(db_client, key, value)
 
-    db.commit()
-    db.refresh(db_client)
+    await db.commit()
+    await db.refresh(db_client)
     return db_client
 
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_client(
+async def delete_client(
     client_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Delete a client (only if owned by authenticated user)"""
-    db_client = db.query(Client).filter(
-        Client.id == client_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_client = await get_owned_client(db, client_id, current_user.id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    db.delete(db_client)
-    db.commit()
+    await db.delete(db_client)
+    await db.commit()
     return None
-
-
-
-
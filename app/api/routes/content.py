@@ -1,61 +1,134 @@
-from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks, Query, Header, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.models.content import ContentCreate, Content as ContentSchema, ContentType, ContentStatus, ContentSuggestion
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from app.models.content import ContentCreate, Content as ContentSchema, ContentType, ContentStatus, ContentSuggestion, ContentSearchPage, ContentPlanProgress, GenerationMode
+from app.models.content import ContentVersionInfo, ContentVersionDetail, ContentVersionDiff
 from app.models.client import Client as ClientSchema
-from app.db.models import Content, Client, ContentType as DBContentType, ContentStatus as DBContentStatus
-from app.db.database import get_db
-from app.core.supabase_auth import get_current_active_user, SupabaseUser
-from app.services.crew_service import ContentCrewService
-from app.services.memory_service import MemoryService
+from app.models.imports import ImportReport
+from app.models.batch import BatchGenerationRequest, BatchReport
+from app.db.models import Content, Client, ContentVersion, ContentType as DBContentType, ContentStatus as DBContentStatus
+from app.db.content_versions import load_version
+from app.db.database import get_async_db
+from app.core.supabase_auth import get_current_active_user, verify_supabase_token, SupabaseUser
+from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.core.http_cache import content_etag, aggregate_etag, etag_matches, not_modified, set_etag
+from app.services.suggestion_service import suggestion_cache
+from app.services.duplicate_service import duplicate_detector
+from app.services.interaction_log import interaction_log
+from app.services.job_events import job_events, QUEUED, TERMINAL_STAGES
+from app.services.idempotency import idempotency_store, request_fingerprint, IdempotencyKeyReused
+from app.services.search_service import ContentSearchService
+from app.services.import_service import BulkImportService
+from app.services.batch_service import BatchGenerationService
+from app.services.generation_service import executor, run_crew_ai, generate_and_store, choose_mode
+from app.services.plan_service import expand_plan
+from app.services.postprocess import postprocessor
+from app.services.export_service import EXPORT_MEDIA_TYPES, iter_client_export, gzip_stream, export_headers
 from datetime import datetime
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import difflib
+import time
 
 router = APIRouter(prefix="/content", tags=["content"])
 
-# Create a thread pool executor for running CPU-bound tasks
-executor = ThreadPoolExecutor(max_workers=3)
+async def get_owned_client(db: AsyncSession, client_id: int, user_id: str):
+    """Load a client only if it belongs to the given user"""
+    result = await db.execute(
+        select(Client).where(Client.id == client_id, Client.user_id == user_id)
+    )
+    return result.scalars().first()
+
+async def get_owned_content(db: AsyncSession, content_id: int, user_id: str):
+    """Load content only if it belongs to one of the user's clients"""
+    result = await db.execute(
+        select(Content).join(Client).where(
+            Content.id == content_id,
+            Client.user_id == user_id
+        )
+    )
+    return result.scalars().first()
+
+async def replay_idempotent(db: AsyncSession, user_id: str, key: str, fingerprint: str):
+    """Original response for a repeated Idempotency-Key; 422 if the key was used for a different request"""
+    try:
+        return await idempotency_store.lookup(db, user_id, key, fingerprint)
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with different request parameters"
+        )
 
-def run_crew_ai(client_info, topic, content_type="blog", word_count=500):
-    """Run CrewAI in a separate thread"""
-    crew_service = ContentCrewService()
-    return crew_service.generate_blog_post(client_info, topic, content_type, word_count)
+def build_client_info(db_client: Client) -> ClientSchema:
+    """Convert DB model to Pydantic model for the CrewAI service"""
+    return ClientSchema(
+        id=db_client.id,
+        name=db_client.name,
+        industry=db_client.industry,
+        brand_voice=db_client.brand_voice,
+        target_audience=db_client.target_audience,
+        content_preferences=db_client.content_preferences,
+        website_url=getattr(db_client, 'website_url', None),
+        social_profiles=getattr(db_client, 'social_profiles', None),
+        created_at=db_client.created_at,
+        updated_at=db_client.updated_at
+    )
 
 @router.post("/generate", status_code=status.HTTP_202_ACCEPTED)
 async def generate_content(
     background_tasks: BackgroundTasks,
+    response: Response,
     client_id: int,
     content_type: str,
     topic: Optional[str] = None,
     word_count: Optional[int] = 500,
     tone: Optional[str] = None,
     keywords: Optional[str] = None,
-    db: Session = Depends(get_db),
+    duplicate_policy: str = Query("warn", pattern="^(warn|skip|ignore)$"),
+    mode: Optional[GenerationMode] = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Generate content for a client (only if owned by authenticated user)"""
+    # A retry with the same Idempotency-Key gets the original job back instead of a new generation
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = request_fingerprint({
+            "client_id": client_id, "content_type": content_type, "topic": topic, "word_count": word_count,
+            "tone": tone, "keywords": keywords, "duplicate_policy": duplicate_policy,
+            "mode": mode.value if mode else None
+        })
+        replay = await replay_idempotent(db, current_user.id, idempotency_key, fingerprint)
+        if replay is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return replay
+
     # Check if client exists and belongs to the authenticated user
-    db_client = db.query(Client).filter(
-        Client.id == client_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_client = await get_owned_client(db, client_id, current_user.id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found or access denied")
     
+    # Look for content on a near-identical topic before paying for a generation
+    duplicates = []
+    if duplicate_policy != "ignore" and topic:
+        duplicates = await duplicate_detector.find(db, client_id, topic=topic)
+        if duplicates and duplicate_policy == "skip":
+            interaction_log.record(
+                client_id, "duplicate_skipped",
+                data={"topic": topic, "duplicates": [d["content_id"] for d in duplicates]},
+                user_id=current_user.id
+            )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Similar content already exists for this client", "duplicates": duplicates}
+            )
+    
     # Convert DB model to Pydantic model for the CrewAI service
-    client_info = ClientSchema(
-        id=db_client.id,
-        name=db_client.name,
-        industry=db_client.industry,
-        brand_voice=db_client.brand_voice,
-        target_audience=db_client.target_audience,
-        content_preferences=db_client.content_preferences,
-        website_url=getattr(db_client, 'website_url', None),
-        social_profiles=getattr(db_client, 'social_profiles', None),
-        created_at=db_client.created_at,
-        updated_at=db_client.updated_at
-    )
+    client_info = build_client_info(db_client)
     
     # Map string content_type to enum
     try:
@@ -63,6 +136,9 @@ async def generate_content(
     except KeyError:
         raise HTTPException(status_code=400, detail=f"Content type '{content_type}' not supported")
     
+    # Depth of the generation: as requested, or picked from the content type and length
+    generation_mode = mode.value if mode else choose_mode(content_type, word_count)
+    
     # Create a placeholder content entry
     content = Content(
         title=f"Generating {topic or 'content'}...",
@@ -72,283 +148,352 @@ async def generate_content(
         topic=topic or "Generated Topic",
         keywords=keywords or "",
         client_id=client_id,
-        word_count=word_count
+        word_count=word_count,
+        generation_stage=QUEUED,
+        generation_mode=generation_mode
     )
     
     db.add(content)
-    db.commit()
-    db.refresh(content)
+    await db.flush()
+    content_id = content.id
+    result = {
+        "message": "Content generation started", 
+        "content_id": content_id,
+        "status": "processing",
+        "mode": generation_mode,
+        "duplicates": duplicates
+    }
+    if idempotency_key:
+        idempotency_store.remember(db, current_user.id, idempotency_key, fingerprint, content_id, result)
+    try:
+        await db.commit()
+    except IntegrityError:
+        if not idempotency_key:
+            raise
+        # A concurrent request with the same key committed first; answer with its job
+        await db.rollback()
+        replay = await replay_idempotent(db, current_user.id, idempotency_key, fingerprint)
+        if replay is None:
+            raise
+        response.headers["Idempotent-Replayed"] = "true"
+        return replay
+    await job_events.announce(content_id, current_user.id, QUEUED)
+    interaction_log.record(
+        client_id, "generation_requested",
+        data={"topic": topic, "content_type": content_type, "keywords": keywords, "tone": tone},
+        content_id=content_id, user_id=current_user.id
+    )
     
     # Run CrewAI in a background task
     async def generate_in_background():
-        try:
-            # Use direct function call instead of run_in_executor for debugging
-            from app.services.crew_service import ContentCrewService
-            crew_service = ContentCrewService()
-
-            # Check if this is a social media post that needs special handling
-            social_media_types = ['instagram', 'twitter', 'linkedin', 'facebook', 'social']
-
-            if content_type.lower() in social_media_types:
-                # Use the specialized social media generation method
-                result = crew_service.generate_social_media_post(
-                    client_info,
-                    topic,
-                    platform=content_type.lower(),
-                    word_count=word_count or 100,  # Default to 100 words for social media
-                    tone=tone,
-                    keywords=keywords
-                )
-            else:
-                # Use the standard blog post generation method
-                result = crew_service.generate_blog_post(
-                    client_info,
-                    topic,
-                    content_type.lower(),
-                    word_count,
-                    tone,
-                    keywords
-                )
-            
-            # Process the result to separate content and visual suggestions
-            if "VISUAL SUGGESTIONS:" in result:
-                content_parts = result.split("VISUAL SUGGESTIONS:", 1)  # Split only on first occurrence
-                main_content = content_parts[0].strip()
-                visual_suggestions = "VISUAL SUGGESTIONS:" + content_parts[1].strip()
-            else:
-                main_content = result.strip()
-                visual_suggestions = "No specific visual suggestions provided."
-            
-            # If main_content is empty, use a fallback
-            if not main_content:
-                main_content = f"""
-                {topic}
-                
-                Are you tired of allergies disrupting your daily life? Nishamritha Tablets offer a natural, Ayurvedic solution to provide lasting relief from allergy symptoms.
-                
-                ## Understanding Allergies
-                Allergies occur when your immune system reacts to foreign substances that are typically harmless. These reactions can cause sneezing, itching, and other uncomfortable symptoms that affect your quality of life.
-                
-                ## The Ayurvedic Approach
-                Nishamritha Tablets are formulated based on ancient Ayurvedic principles, using a blend of natural herbs and ingredients known for their anti-allergic properties. Unlike conventional medications, these tablets address the root cause of allergies rather than just masking the symptoms.
-                
-                ## Key Benefits
-                - Natural ingredients with no harsh chemicals
-                - Long-lasting relief rather than temporary symptom suppression
-                - No drowsiness or other common side effects
-                - Strengthens your immune system over time
-                
-                Try Nishamritha Tablets today and experience the freedom of living without allergy constraints.
-                """
-            
-            # Extract title and body from main content
-            lines = main_content.split('\n')
-            
-            # The first non-empty line is the title
-            title_lines = [line for line in lines if line.strip()]
-            title = title_lines[0].strip() if title_lines else topic
-            
-            # Everything after the title is the body
-            if len(title_lines) > 1:
-                # Find the index of the title in the original lines
-                title_index = lines.index(title_lines[0])
-                # Body is everything after the title
-                body = '\n'.join(lines[title_index+1:]).strip()
-            else:
-                body = ""
-            
-            # If body is still empty, use the main_content except the first line
-            if not body and len(lines) > 1:
-                body = '\n'.join(lines[1:]).strip()
-            
-            # If body is still empty, use the entire main_content
-            if not body:
-                body = main_content
-                
-            # If title is the same as topic and body starts with a potential title, extract it
-            if title == topic and body:
-                body_lines = body.split('\n')
-                if body_lines and body_lines[0].strip():
-                    potential_title = body_lines[0].strip()
-                    # Check if it looks like a title (not too long, no periods at end)
-                    if len(potential_title) < 100 and not potential_title.endswith('.'):
-                        title = potential_title
-                        body = '\n'.join(body_lines[1:]).strip()
-            
-            # If body is still empty after all attempts, use a fallback
-            if not body:
-                body = f"""
-                Are you tired of allergies disrupting your daily life? Nishamritha Tablets offer a natural, Ayurvedic solution to provide lasting relief from allergy symptoms.
-                
-                ## Understanding Allergies
-                Allergies occur when your immune system reacts to foreign substances that are typically harmless. These reactions can cause sneezing, itching, and other uncomfortable symptoms that affect your quality of life.
-                
-                ## The Ayurvedic Approach
-                Nishamritha Tablets are formulated based on ancient Ayurvedic principles, using a blend of natural herbs and ingredients known for their anti-allergic properties. Unlike conventional medications, these tablets address the root cause of allergies rather than just masking the symptoms.
-                
-                ## Key Benefits
-                - Natural ingredients with no harsh chemicals
-                - Long-lasting relief rather than temporary symptom suppression
-                - No drowsiness or other common side effects
-                - Strengthens your immune system over time
-                
-                Try Nishamritha Tablets today and experience the freedom of living without allergy constraints.
-                """
-            
-            # Get a new session since we're in a background task
-            from app.db.database import SessionLocal
-            db = SessionLocal()
-            try:
-                # Update the content in the database
-                content_obj = db.query(Content).filter(Content.id == content.id).first()
-                if content_obj:
-                    content_obj.title = title
-                    content_obj.body = body
-                    content_obj.status = DBContentStatus.REVIEW
-                    content_obj.visual_suggestions = visual_suggestions
-                    content_obj.updated_at = datetime.now()
-                    db.commit()
-            finally:
-                db.close()
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            
-            # Update content with error message
-            from app.db.database import SessionLocal
-            db = SessionLocal()
-            try:
-                content_obj = db.query(Content).filter(Content.id == content.id).first()
-                if content_obj:
-                    content_obj.title = f"Error: {str(e)[:50]}"
-                    content_obj.body = f"Error generating content: {str(e)}\n\n{error_details}"
-                    content_obj.status = DBContentStatus.REVIEW
-                    content_obj.updated_at = datetime.now()
-                    db.commit()
-            finally:
-                db.close()
+        await generate_and_store(
+            content_id, client_id, client_info, topic, content_type, word_count, tone, keywords,
+            user_id=current_user.id, mode=generation_mode
+        )
     
+    async def tracked_generation():
+        # Shutdown waits for this job to finish
+        async with lifecycle.track_job():
+            await generate_in_background()
+
     # Start the background task
-    background_tasks.add_task(generate_in_background)
+    background_tasks.add_task(tracked_generation)
     
+    return result
+
+@router.post("/plan", status_code=status.HTTP_202_ACCEPTED)
+async def generate_content_plan(
+    background_tasks: BackgroundTasks,
+    client_id: int,
+    theme: str = Query(..., min_length=1, max_length=200),
+    items: int = Query(7, ge=1),
+    content_types: str = "blog",
+    start_date: Optional[datetime] = None,
+    cadence_days: int = Query(1, ge=1, le=31),
+    word_count: Optional[int] = 500,
+    tone: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Plan a calendar of content for a client and generate every item in parallel"""
+    db_client = await get_owned_client(db, client_id, current_user.id)
+    if db_client is None:
+        raise HTTPException(status_code=404, detail="Client not found or access denied")
+    if items > settings.PLAN_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A plan can have at most {settings.PLAN_MAX_ITEMS} items")
+
+    # Comma-separated list of content types for the plan's items
+    types = [t.strip().lower() for t in content_types.split(",") if t.strip()]
+    unsupported = [t for t in types if t.upper() not in DBContentType.__members__]
+    if not types or unsupported:
+        raise HTTPException(status_code=400, detail=f"Content type(s) not supported: {', '.join(unsupported) or content_types}")
+
+    client_info = build_client_info(db_client)
+
+    # The plan itself; its items are created as children once the calendar is drafted
+    plan = Content(
+        title=f"Planning {theme}...",
+        body="Content plan is being generated. Please check back in a few minutes.",
+        content_type=DBContentType.CONTENT_PLAN,
+        status=DBContentStatus.DRAFT,
+        topic=theme,
+        keywords="",
+        client_id=client_id,
+        plan_completed=0,
+        plan_failed=0,
+        generation_stage=QUEUED
+    )
+    db.add(plan)
+    await db.commit()
+    plan_id = plan.id
+    await job_events.announce(plan_id, current_user.id, QUEUED)
+    interaction_log.record(
+        client_id, "plan_requested",
+        data={"theme": theme, "items": items, "content_types": types},
+        content_id=plan_id, user_id=current_user.id
+    )
+
+    async def tracked_plan():
+        # Shutdown waits for the whole plan
+        async with lifecycle.track_job():
+            await expand_plan(
+                plan_id, client_id, client_info, theme, items, types,
+                start_date or datetime.now(), cadence_days, word_count, tone, user_id=current_user.id
+            )
+
+    background_tasks.add_task(tracked_plan)
+
     return {
-        "message": "Content generation started", 
-        "content_id": content.id,
+        "message": "Content plan generation started",
+        "plan_id": plan_id,
         "status": "processing"
     }
 
+@router.get("/plan/{plan_id}", response_model=ContentPlanProgress)
+async def read_content_plan(
+    plan_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Progress of a content plan and its items"""
+    plan = await get_owned_content(db, plan_id, current_user.id)
+    if plan is None or plan.content_type != DBContentType.CONTENT_PLAN:
+        raise HTTPException(status_code=404, detail="Content plan not found or access denied")
+
+    result = await db.execute(
+        select(Content)
+        .where(Content.parent_id == plan_id)
+        .order_by(Content.scheduled_for, Content.id)
+    )
+    children = result.scalars().all()
+
+    completed = plan.plan_completed or 0
+    failed = plan.plan_failed or 0
+    if plan.plan_total is None:
+        plan_status = "planning"
+    elif completed + failed < plan.plan_total:
+        plan_status = "generating"
+    else:
+        plan_status = "complete"
+
+    return {
+        "plan_id": plan.id,
+        "title": plan.title,
+        "status": plan_status,
+        "total": plan.plan_total or 0,
+        "completed": completed,
+        "failed": failed,
+        "items": children
+    }
+
+@router.post("/batch", response_model=BatchReport)
+async def generate_batch(
+    batch: BatchGenerationRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Generate blog ideas or drafts for many of the user's clients/topics concurrently"""
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="No items to generate")
+    if len(batch.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_MAX_ITEMS} items per request; use the CLI for larger runs"
+        )
+
+    service = BatchGenerationService(db, current_user.id)
+    async with lifecycle.track_job():
+        return await service.run(
+            batch.mode,
+            batch.items,
+            num_ideas=batch.num_ideas,
+            concurrency=batch.concurrency,
+            timeout=batch.timeout_seconds
+        )
+
+@router.post("/import", response_model=ImportReport)
+async def import_content(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Bulk import content from an NDJSON body into the user's clients (rows with an id are updated)"""
+    service = BulkImportService(db, current_user.id)
+    return await service.import_content(request.stream())
+
 @router.get("/", response_model=List[ContentSchema])
-def read_contents(
+async def read_contents(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Get all content for the authenticated user (from their clients only)"""
     # Get all client IDs that belong to the user
-    user_client_ids = db.query(Client.id).filter(Client.user_id == current_user.id).subquery()
+    user_client_ids = select(Client.id).where(Client.user_id == current_user.id)
+
+    # Content only from user's clients, in a stable order so pages (and their ETags) are repeatable
+    def page(*columns):
+        return select(*columns).where(
+            Content.client_id.in_(user_client_ids)
+        ).order_by(Content.id).offset(skip).limit(limit)
 
-    # Get content only from user's clients
-    contents = db.query(Content).filter(
-        Content.client_id.in_(user_client_ids)
-    ).offset(skip).limit(limit).all()
+    # Aggregate ETag from the page's (id, revision) pairs; a match answers 304 without loading bodies
+    etag = aggregate_etag("contents", (await db.execute(page(Content.id, Content.revision))).all())
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    return contents
+    result = await db.execute(page(Content))
+    set_etag(response, etag)
+    return result.scalars().all()
 
 @router.get("/client/{client_id}", response_model=List[ContentSchema])
-def get_content_by_client(
+async def get_content_by_client(
     client_id: int,
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
     content_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Get all content for a specific client (only if owned by authenticated user)"""
-    # First, check if client exists at all
-    client_exists = db.query(Client).filter(Client.id == client_id).first()
-    if not client_exists:
-        raise HTTPException(status_code=404, detail="Client not found")
-
-    # Check if client belongs to the authenticated user
-    if client_exists.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Client not found or access denied")
-
     # Check if client exists and belongs to the authenticated user
-    db_client = db.query(Client).filter(
-        Client.id == client_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_client = await get_owned_client(db, client_id, current_user.id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found or access denied")
 
     # Build query for client's content
-    query = db.query(Content).filter(Content.client_id == client_id)
+    query = select(Content.id).where(Content.client_id == client_id)
 
     # Apply optional filters
     if status:
         try:
             status_enum = DBContentStatus[status.upper()]
-            query = query.filter(Content.status == status_enum)
+            query = query.where(Content.status == status_enum)
         except KeyError:
             raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
 
     if content_type:
         try:
             content_type_enum = DBContentType[content_type.upper()]
-            query = query.filter(Content.content_type == content_type_enum)
+            query = query.where(Content.content_type == content_type_enum)
         except KeyError:
             raise HTTPException(status_code=400, detail=f"Invalid content type: {content_type}")
 
     # Order by most recent first and apply pagination
-    contents = query.order_by(Content.created_at.desc()).offset(skip).limit(limit).all()
+    query = query.order_by(Content.created_at.desc(), Content.id.desc()).offset(skip).limit(limit)
 
-    return contents
+    # Aggregate ETag from the page's (id, revision) pairs; a match answers 304 without loading bodies
+    etag = aggregate_etag("client-contents", (await db.execute(query.add_columns(Content.revision))).all())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    result = await db.execute(query.with_only_columns(Content))
+    set_etag(response, etag)
+    return result.scalars().all()
+
+@router.get("/client/{client_id}/export")
+async def export_client_content(
+    client_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Stream all of a client's content as NDJSON or CSV (only if owned by authenticated user)"""
+    # Check if client exists and belongs to the authenticated user
+    db_client = await get_owned_client(db, client_id, current_user.id)
+    if db_client is None:
+        raise HTTPException(status_code=404, detail="Client not found or access denied")
+
+    body = iter_client_export(client_id, format)
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        body = gzip_stream(body)
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers=export_headers(client_id, format, gzip)
+    )
 
 @router.get("/client/{client_id}/stats")
-def get_client_content_stats(
+async def get_client_content_stats(
     client_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Get content statistics for a specific client (only if owned by authenticated user)"""
     # Check if client exists and belongs to the authenticated user
-    db_client = db.query(Client).filter(
-        Client.id == client_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_client = await get_owned_client(db, client_id, current_user.id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found or access denied")
 
-    # Get total content count
-    total_content = db.query(Content).filter(Content.client_id == client_id).count()
-
-    # Get content by status
-    status_counts = {}
-    for status in DBContentStatus:
-        count = db.query(Content).filter(
-            Content.client_id == client_id,
-            Content.status == status
-        ).count()
-        status_counts[status.value] = count
-
-    # Get content by type
-    type_counts = {}
-    for content_type in DBContentType:
-        count = db.query(Content).filter(
-            Content.client_id == client_id,
-            Content.content_type == content_type
-        ).count()
-        type_counts[content_type.value] = count
-
-    # Get recent content (last 7 days)
+    # One aggregate row decides whether anything changed: count, newest row, total revisions
+    # (any update bumps it), latest write and the 7-day window
     from datetime import datetime, timedelta
     seven_days_ago = datetime.now() - timedelta(days=7)
-    recent_content = db.query(Content).filter(
-        Content.client_id == client_id,
-        Content.created_at >= seven_days_ago
-    ).count()
+    summary = (await db.execute(
+        select(
+            func.count(Content.id),
+            func.max(Content.id),
+            func.sum(Content.revision),
+            func.max(Content.updated_at),
+            func.count(Content.id).filter(Content.created_at >= seven_days_ago)
+        ).where(Content.client_id == client_id)
+    )).one()
+    etag = aggregate_etag(f"stats-{client_id}", summary)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    # Get content by status and type with grouped counts instead of one query per enum value
+    status_counts = {status.value: 0 for status in DBContentStatus}
+    type_counts = {content_type.value: 0 for content_type in DBContentType}
+    total_content = 0
+
+    result = await db.execute(
+        select(Content.status, Content.content_type, func.count(Content.id))
+        .where(Content.client_id == client_id)
+        .group_by(Content.status, Content.content_type)
+    )
+    for content_status, content_type, count in result.all():
+        total_content += count
+        if content_status is not None:
+            status_counts[content_status.value] += count
+        if content_type is not None:
+            type_counts[content_type.value] += count
+
+    # Recent content (last 7 days) came with the ETag summary
+    recent_content = summary[2]
 
     return {
         "client_id": client_id,
@@ -358,39 +503,196 @@ def get_client_content_stats(
         "recent_content_7_days": recent_content
     }
 
+@router.get("/search", response_model=ContentSearchPage)
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    client_id: Optional[int] = None,
+    status: Optional[str] = None,
+    content_type: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Full-text search over the authenticated user's content, ranked with highlighted snippets"""
+    # Map optional filters to enums
+    status_enum = None
+    if status:
+        try:
+            status_enum = DBContentStatus[status.upper()]
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+
+    content_type_enum = None
+    if content_type:
+        try:
+            content_type_enum = DBContentType[content_type.upper()]
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Invalid content type: {content_type}")
+
+    try:
+        return await ContentSearchService(db).search(
+            current_user.id,
+            q,
+            client_id=client_id,
+            status=status_enum,
+            content_type=content_type_enum,
+            created_from=created_from,
+            created_to=created_to,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/{content_id}", response_model=ContentSchema)
-def read_content(
+async def read_content(
     content_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Get specific content (only if from user's client)"""
-    # Get content and verify it belongs to user's client
-    content = db.query(Content).join(Client).filter(
-        Content.id == content_id,
-        Client.user_id == current_user.id
-    ).first()
+    # Check ownership and the version first; pollers that already have it get a 304 without the body
+    version = (await db.execute(
+        select(Content.revision).join(Client).where(
+            Content.id == content_id,
+            Client.user_id == current_user.id
+        )
+    )).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Content not found or access denied")
+    etag = content_etag(content_id, version.revision)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    content = await get_owned_content(db, content_id, current_user.id)
     if content is None:
         raise HTTPException(status_code=404, detail="Content not found or access denied")
+    # Tag what is actually returned (it may have changed between the two reads)
+    set_etag(response, content_etag(content.id, content.revision))
     return content
 
+@router.get("/{content_id}/duplicates")
+async def find_duplicate_content(
+    content_id: int,
+    threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Content of the same client with a near-identical topic or body"""
+    content = await get_owned_content(db, content_id, current_user.id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Content not found or access denied")
+
+    duplicates = await duplicate_detector.find(
+        db, content.client_id, topic=content.topic, body=content.body, exclude_id=content.id, threshold=threshold
+    )
+    return {"content_id": content.id, "duplicates": duplicates}
+
+@router.get("/{content_id}/wait", response_model=ContentSchema)
+async def wait_for_content(
+    content_id: int,
+    timeout: float = Query(25.0, gt=0, le=settings.JOB_WAIT_MAX_SECONDS),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Long-poll: return the content once its generation is done or failed, or as it is after `timeout` seconds"""
+    # Subscribe before reading, so a generation finishing in between isn't missed
+    async with job_events.subscribe(content_id=content_id) as queue:
+        content = await get_owned_content(db, content_id, current_user.id)
+        if content is None:
+            raise HTTPException(status_code=404, detail="Content not found or access denied")
+        if content.generation_stage is None or content.generation_stage in TERMINAL_STAGES:
+            return content
+
+        # Give the connection back to the pool while waiting
+        await db.close()
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if event.get("closing") or event["stage"] in TERMINAL_STAGES:
+                break
+
+    return await get_owned_content(db, content_id, current_user.id)
+
+@router.websocket("/ws")
+async def generation_events(websocket: WebSocket, token: str = Query(...)):
+    """Push every generation stage change of the user's content (browsers can't send headers, so the JWT is a query param)"""
+    user = verify_supabase_token(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    async with job_events.subscribe(user_id=user.id) as queue:
+        async def forward_events():
+            while True:
+                event = await queue.get()
+                if event.get("closing"):
+                    return
+                await websocket.send_json({key: value for key, value in event.items() if key != "user_id"})
+
+        async def wait_for_disconnect():
+            try:
+                while True:
+                    await websocket.receive_text()  # Clients have nothing to say; this only notices them leaving
+            except WebSocketDisconnect:
+                pass
+
+        async def wait_for_expiry():
+            # The token is only checked on connect; the subscription ends when it expires
+            await asyncio.sleep(max(float(user.metadata["exp"]) - time.time(), 0))
+
+        sender = asyncio.create_task(forward_events())
+        receiver = asyncio.create_task(wait_for_disconnect())
+        tasks = {sender, receiver}
+        expiry = None
+        if user.metadata.get("exp") is not None:
+            expiry = asyncio.create_task(wait_for_expiry())
+            tasks.add(expiry)
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if sender in done or expiry in done:
+            # Worker shutting down (or the send failed): tell the client to reconnect elsewhere;
+            # token expired: the client reconnects with a fresh one
+            code = status.WS_1008_POLICY_VIOLATION if expiry in done else status.WS_1001_GOING_AWAY
+            try:
+                await websocket.close(code=code, reason="Token expired" if expiry in done else None)
+            except Exception:
+                pass
+
 @router.put("/{content_id}", response_model=ContentSchema)
-def update_content(
+async def update_content(
     content_id: int,
     content: ContentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Update content (only if from user's client)"""
     # Get content and verify it belongs to user's client
-    db_content = db.query(Content).join(Client).filter(
-        Content.id == content_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_content = await get_owned_content(db, content_id, current_user.id)
     if db_content is None:
         raise HTTPException(status_code=404, detail="Content not found or access denied")
 
-    # Update content attributes
+    previous_status = db_content.status
+    changed_fields = [
+        key for key, value in content.model_dump().items()
+        if key not in ('content_type', 'status') and getattr(db_content, key) != value
+    ]
+
+    # Update content attributes (the version hook records who made the change)
+    db.info["user_id"] = current_user.id
     for key, value in content.model_dump().items():
         if key == 'content_type':
             db_content.content_type = DBContentType[value.upper()]
@@ -399,42 +701,152 @@ def update_content(
         else:
             setattr(db_content, key, value)
 
-    db.commit()
-    db.refresh(db_content)
+    await db.commit()
+    await db.refresh(db_content)
+
+    # Publishing counts as an approval; sending reviewed content back or archiving it as a rejection
+    if db_content.status != previous_status and db_content.status == DBContentStatus.PUBLISHED:
+        interaction_type = "approved"
+    elif db_content.status != previous_status and (
+        db_content.status == DBContentStatus.ARCHIVED
+        or (previous_status == DBContentStatus.REVIEW and db_content.status == DBContentStatus.DRAFT)
+    ):
+        interaction_type = "rejected"
+    else:
+        interaction_type = "edited"
+    interaction_log.record(
+        db_content.client_id, interaction_type,
+        data={
+            "from_status": previous_status.value if previous_status else None,
+            "to_status": db_content.status.value,
+            "fields": changed_fields,
+        },
+        content_id=db_content.id, user_id=current_user.id
+    )
+    return db_content
+
+async def get_owned_version(db: AsyncSession, content_id: int, version: int, user_id: str):
+    """Fields of one version of the user's content; 404 if the content or version doesn't exist"""
+    if await get_owned_content(db, content_id, user_id) is None:
+        raise HTTPException(status_code=404, detail="Content not found or access denied")
+    fields = await db.run_sync(lambda sync_db: load_version(sync_db.connection(), content_id, version))
+    if fields is None:
+        raise HTTPException(status_code=404, detail=f"Version {version} not found")
+    return fields
+
+@router.get("/{content_id}/versions", response_model=List[ContentVersionInfo])
+async def list_content_versions(
+    content_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Version history of content, newest first"""
+    if await get_owned_content(db, content_id, current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Content not found or access denied")
+
+    # Metadata only; the payloads are decompressed just for single versions and diffs
+    result = await db.execute(
+        select(
+            ContentVersion.version, ContentVersion.is_snapshot, ContentVersion.user_id, ContentVersion.created_at,
+            func.length(ContentVersion.data).label("stored_bytes"),
+        )
+        .where(ContentVersion.content_id == content_id)
+        .order_by(ContentVersion.version.desc())
+    )
+    return [ContentVersionInfo(**row._mapping) for row in result.all()]
+
+@router.get("/{content_id}/versions/diff", response_model=ContentVersionDiff)
+async def diff_content_versions(
+    content_id: int,
+    from_version: int = Query(..., ge=1),
+    to_version: int = Query(..., ge=1),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Unified diff of every field that differs between two versions"""
+    old = await get_owned_version(db, content_id, from_version, current_user.id)
+    new = await get_owned_version(db, content_id, to_version, current_user.id)
+    changes = {}
+    for field, value in new.items():
+        if old.get(field) == value:
+            continue
+        changes[field] = "".join(difflib.unified_diff(
+            str(old.get(field) or "").splitlines(keepends=True),
+            str(value or "").splitlines(keepends=True),
+            fromfile=f"v{from_version}/{field}",
+            tofile=f"v{to_version}/{field}",
+        ))
+    return ContentVersionDiff(content_id=content_id, from_version=from_version, to_version=to_version, changes=changes)
+
+@router.get("/{content_id}/versions/{version}", response_model=ContentVersionDetail)
+async def read_content_version(
+    content_id: int,
+    version: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Content as it was at one version"""
+    fields = await get_owned_version(db, content_id, version, current_user.id)
+    return ContentVersionDetail(content_id=content_id, version=version, fields=fields)
+
+@router.post("/{content_id}/versions/{version}/restore", response_model=ContentSchema)
+async def restore_content_version(
+    content_id: int,
+    version: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: SupabaseUser = Depends(get_current_active_user)
+):
+    """Bring content back to an earlier version; the restore is itself recorded as a new version"""
+    fields = await get_owned_version(db, content_id, version, current_user.id)
+    db_content = await get_owned_content(db, content_id, current_user.id)
+    if db_content.generation_stage not in (None,) + TERMINAL_STAGES:
+        raise HTTPException(status_code=409, detail="Content is still being generated")
+
+    db.info["user_id"] = current_user.id
+    for key, value in fields.items():
+        if key == 'content_type':
+            value = DBContentType(value) if value is not None else None
+        elif key == 'status':
+            value = DBContentStatus(value) if value is not None else None
+        setattr(db_content, key, value)
+
+    await db.commit()
+    await db.refresh(db_content)
+    interaction_log.record(
+        db_content.client_id, "restored", data={"version": version},
+        content_id=db_content.id, user_id=current_user.id
+    )
     return db_content
 
 @router.delete("/{content_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_content(
+async def delete_content(
     content_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Delete content (only if from user's client)"""
     # Get content and verify it belongs to user's client
-    db_content = db.query(Content).join(Client).filter(
-        Content.id == content_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_content = await get_owned_content(db, content_id, current_user.id)
     if db_content is None:
         raise HTTPException(status_code=404, detail="Content not found or access denied")
 
-    db.delete(db_content)
-    db.commit()
+    client_id = db_content.client_id
+    await db.delete(db_content)
+    await db.commit()
+    interaction_log.record(client_id, "deleted", content_id=content_id, user_id=current_user.id)
     return None
 
 @router.get("/suggestions/{client_id}", response_model=List[ContentSuggestion])
 async def get_content_suggestions(
     client_id: int,
+    response: Response,
     suggestion_count: int = 3,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Get AI-generated content suggestions for a specific client (only if owned by user)"""
     # Check if client exists and belongs to the authenticated user
-    db_client = db.query(Client).filter(
-        Client.id == client_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_client = await get_owned_client(db, client_id, current_user.id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found or access denied")
     
@@ -446,57 +858,15 @@ async def get_content_suggestions(
     except (ValueError, TypeError):
         suggestion_count = 3  # Default to 3 if not a valid integer
     
-    # Use memory service to generate suggestions
-    memory_service = MemoryService(db)
-    suggestions = await memory_service.generate_content_suggestions(client_id, suggestion_count)
+    # Cached per client and count; only a cold cache waits for Gemini
+    suggestions, cache_status = await suggestion_cache.get(db, client_id, suggestion_count)
+    response.headers["X-Suggestions-Cache"] = cache_status
     
     if suggestions and isinstance(suggestions[0], dict) and "error" in suggestions[0]:
         raise HTTPException(status_code=500, detail=suggestions[0]["error"])
     
     return suggestions
 
-@router.get("/debug/database-state")
-def debug_database_state(db: Session = Depends(get_db)):
-    """Debug endpoint to check database state"""
-
-    # Check all clients
-    all_clients = db.query(Client).all()
-
-    clients_info = []
-    for client in all_clients:
-        clients_info.append({
-            "id": client.id,
-            "name": client.name,
-            "user_id": getattr(client, 'user_id', 'NO_USER_ID'),
-            "has_user_id": hasattr(client, 'user_id') and client.user_id is not None
-        })
-
-    # Check all content
-    all_content = db.query(Content).all()
-
-    content_info = []
-    for content in all_content:
-        # Check if the client for this content exists
-        client_exists = db.query(Client).filter(Client.id == content.client_id).first()
-        content_info.append({
-            "id": content.id,
-            "title": content.title,
-            "client_id": content.client_id,
-            "client_exists": client_exists is not None,
-            "client_user_id": getattr(client_exists, 'user_id', None) if client_exists else None
-        })
-
-    return {
-        "clients": clients_info,
-        "content": content_info,
-        "summary": {
-            "total_clients": len(all_clients),
-            "total_content": len(all_content),
-            "clients_with_user_id": len([c for c in clients_info if c["has_user_id"]]),
-            "orphaned_content": len([c for c in content_info if not c["client_exists"]])
-        }
-    }
-
 @router.post("/generate-test", status_code=status.HTTP_200_OK)
 async def test_generate_content(
     client_id: int,
@@ -505,62 +875,34 @@ async def test_generate_content(
     word_count: Optional[int] = 500,
     tone: Optional[str] = None,
     keywords: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: SupabaseUser = Depends(get_current_active_user)
 ):
     """Test endpoint that generates content synchronously (only for user's clients)"""
     # Check if client exists and belongs to the authenticated user
-    db_client = db.query(Client).filter(
-        Client.id == client_id,
-        Client.user_id == current_user.id
-    ).first()
+    db_client = await get_owned_client(db, client_id, current_user.id)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client not found or access denied")
     
     # Convert DB model to Pydantic model for the CrewAI service
-    client_info = ClientSchema(
-        id=db_client.id,
-        name=db_client.name,
-        industry=db_client.industry,
-        brand_voice=db_client.brand_voice,
-        target_audience=db_client.target_audience,
-        content_preferences=db_client.content_preferences,
-        website_url=getattr(db_client, 'website_url', None),
-        social_profiles=getattr(db_client, 'social_profiles', None),
-        created_at=db_client.created_at,
-        updated_at=db_client.updated_at
-    )
-    
-    # Generate content directly (will block)
-    from app.services.crew_service import ContentCrewService
-    crew_service = ContentCrewService()
+    client_info = build_client_info(db_client)
 
     try:
-        # Check if this is a social media post that needs special handling
-        social_media_types = ['instagram', 'twitter', 'linkedin', 'facebook', 'social']
-
-        if content_type.lower() in social_media_types:
-            # Use the specialized social media generation method
-            result = crew_service.generate_social_media_post(
-                client_info,
-                topic,
-                platform=content_type.lower(),
-                word_count=word_count or 100,  # Default to 100 words for social media
-                tone=tone,
-                keywords=keywords
-            )
-        else:
-            # Use the standard blog post generation method
-            result = crew_service.generate_blog_post(
-                client_info,
-                topic,
-                content_type.lower(),
-                word_count,
-                tone,
-                keywords
-            )
+        # Generate content on the executor (the request still waits for the result)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            executor,
+            run_crew_ai,
+            client_info,
+            topic,
+            content_type,
+            word_count,
+            tone,
+            keywords
+        )
         
-        return {"result": result}
+        # The crew's raw output still needs emojis and special Unicode removed
+        return {"result": await postprocessor.clean(result)}
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -0,0 +1,83 @@
+"""
+Command-line entry points.
+
+    python -m app.cli batch --mode ideas --all-clients
+    python -m app.cli batch --mode drafts --clients 3,7 --topic "Spring allergy guide"
+    python -m app.cli batch --mode drafts --items items.ndjson --concurrency 16
+
+`--items` takes NDJSON lines of {"client_id": ..., "topic": ...}. The report is
+printed as JSON; the exit code is 1 if any item failed or timed out.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from sqlalchemy import select
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Generate blog ideas or drafts for many clients concurrently")
+    batch.add_argument("--mode", choices=["ideas", "drafts"], default="ideas")
+    targets = batch.add_mutually_exclusive_group(required=True)
+    targets.add_argument("--all-clients", action="store_true", help="Every client (of --user-id, if given)")
+    targets.add_argument("--clients", help="Comma-separated client ids")
+    targets.add_argument("--items", help="NDJSON file of {client_id, topic} items")
+    batch.add_argument("--topic", action="append", default=[], help="Topic for drafts (repeatable; one item per client and topic)")
+    batch.add_argument("--user-id", default=None, help="Only this Supabase user's clients")
+    batch.add_argument("--num-ideas", type=int, default=5)
+    batch.add_argument("--concurrency", type=int, default=None)
+    batch.add_argument("--timeout", type=float, default=None, help="Per-item timeout in seconds")
+    return parser.parse_args(argv)
+
+async def resolve_items(args, db):
+    from app.db.models import Client
+    from app.models.batch import BatchItem
+
+    if args.items:
+        with open(args.items, encoding="utf-8") as f:
+            return [BatchItem.model_validate(json.loads(line)) for line in f if line.strip()]
+
+    if args.all_clients:
+        statement = select(Client.id).order_by(Client.id)
+        if args.user_id:
+            statement = statement.where(Client.user_id == args.user_id)
+        client_ids = list((await db.execute(statement)).scalars().all())
+    else:
+        client_ids = [int(value) for value in args.clients.split(",") if value.strip()]
+
+    topics = args.topic or [None]
+    return [BatchItem(client_id=client_id, topic=topic) for client_id in client_ids for topic in topics]
+
+async def run_batch(args) -> int:
+    from app.db.database import AsyncSessionLocal
+    from app.models.batch import BatchMode, BatchReport
+    from app.services.batch_service import BatchGenerationService
+    from app.services.interaction_log import interaction_log
+
+    async with AsyncSessionLocal() as db:
+        items = await resolve_items(args, db)
+        service = BatchGenerationService(db, args.user_id)
+        report = await service.run(
+            BatchMode(args.mode),
+            items,
+            num_ideas=args.num_ideas,
+            concurrency=args.concurrency,
+            timeout=args.timeout
+        )
+    # No background flusher outside the API; write the logged events now
+    await interaction_log.stop()
+
+    print(BatchReport.model_validate(report).model_dump_json(indent=2))
+    return 0 if report["failed"] == 0 and report["timed_out"] == 0 else 1
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.command == "batch":
+        return asyncio.run(run_batch(args))
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
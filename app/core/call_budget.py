@@ -0,0 +1,85 @@
+"""
+Per-job budget of model calls, tokens and wall-clock time.
+
+A generation job runs with a ``CallBudget`` active (``use_budget``); every
+model call checks it first and is charged to it afterwards, both for direct
+Gemini calls and for the crew's chat model (through a LangChain callback).
+Once the budget is spent the next call raises ``BudgetExceeded`` and the crew
+returns the best output it has. Usage is kept per generation stage.
+"""
+
+from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+class BudgetExceeded(Exception):
+    """Raised instead of making a model call once the job's budget is spent"""
+
+class CallBudget:
+    """Limits and per-stage usage of one job's model calls; thread-safe"""
+
+    def __init__(self, max_calls: int, max_tokens: int, max_seconds: float):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.stage = "queued"  # Usage is charged to the stage the job is in
+        self.stopped: Optional[str] = None  # Which limit stopped the job
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._tokens = 0
+        self._usage: Dict[str, Dict[str, Any]] = {}
+
+    def before_call(self) -> None:
+        """Check the limits before a model call; raises BudgetExceeded when one is reached"""
+        with self._lock:
+            if self._calls >= self.max_calls:
+                self.stopped = "calls"
+            elif self._tokens >= self.max_tokens:
+                self.stopped = "tokens"
+            elif time.monotonic() - self._started >= self.max_seconds:
+                self.stopped = "seconds"
+            else:
+                self._calls += 1
+                return
+        raise BudgetExceeded(f"Model call budget exceeded ({self.stopped})")
+
+    def record(self, input_tokens: int, output_tokens: int, seconds: float) -> None:
+        """Charge a finished call to the current stage"""
+        with self._lock:
+            self._tokens += input_tokens + output_tokens
+            usage = self._usage.setdefault(
+                self.stage, {"calls": 0, "input_tokens": 0, "output_tokens": 0, "seconds": 0.0}
+            )
+            usage["calls"] += 1
+            usage["input_tokens"] += input_tokens
+            usage["output_tokens"] += output_tokens
+            usage["seconds"] = round(usage["seconds"] + seconds, 3)
+
+    def report(self) -> Dict[str, Any]:
+        """Usage per stage and in total, stored with the content"""
+        with self._lock:
+            return {
+                "stages": {stage: dict(usage) for stage, usage in self._usage.items()},
+                "calls": self._calls,
+                "tokens": self._tokens,
+                "seconds": round(time.monotonic() - self._started, 3),
+                "stopped": self.stopped,
+                "limits": {"calls": self.max_calls, "tokens": self.max_tokens, "seconds": self.max_seconds},
+            }
+
+_active: ContextVar[Optional[CallBudget]] = ContextVar("call_budget", default=None)
+
+def current_budget() -> Optional[CallBudget]:
+    return _active.get()
+
+@contextmanager
+def use_budget(budget: Optional[CallBudget]):
+    """Make `budget` the active one for model calls made in this thread (or task)"""
+    token = _active.set(budget)
+    try:
+        yield budget
+    finally:
+        _active.reset(token)
@@ -0,0 +1,177 @@
+"""
+Record/replay of model calls, for reproducible offline runs of the pipeline.
+
+With ``LLM_CASSETTE_MODE=record`` every model call (direct Gemini calls,
+streams, and the crew's chat model) is captured with its prompt, response,
+duration and token usage, and appended to ``LLM_CASSETTE_PATH`` (gzipped JSON
+lines) every ``LLM_CASSETTE_FLUSH_SECONDS``, on shutdown and on ``save()``.
+Each write appends a gzip member under an exclusive file lock, so every
+worker of a server can record into the same file; delete it to start over.
+
+With ``LLM_CASSETTE_MODE=replay`` the provider is never called: each call is
+answered with the recorded response for the same prompt, in recorded order
+when a prompt repeats, optionally taking the recorded time
+(``LLM_CASSETTE_REPLAY_TIMING``). A call with no recording raises
+``CassetteMiss``.
+
+Replayed runs exercise everything but the provider (orchestration, parsing,
+budgets, the database), and the call counts of two cassettes can be compared
+(see benchmarks/generation_benchmark.py).
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter, deque
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from app.core.config import settings
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: a single recording process is assumed
+    FCNTL_AVAILABLE = False
+
+RECORD = "record"
+REPLAY = "replay"
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a call that was never recorded"""
+
+def prompt_key(prompt: Any) -> str:
+    """Stable hash of a prompt (text, parts or chat messages, plus call options)"""
+    return hashlib.sha256(json.dumps(prompt, sort_keys=True, default=str).encode()).hexdigest()
+
+class Cassette:
+    """Recorded model calls of one file; thread-safe (the crew calls from executor threads)"""
+
+    def __init__(self, path: str, mode: str, replay_timing: bool = False):
+        self.path = path
+        self.mode = mode
+        self.replay_timing = replay_timing
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = []
+        self._unsaved: List[Dict[str, Any]] = []  # Recorded, not yet appended to the file
+        self._open: set = set()  # ids of stream entries still being read
+        self._saved_at = time.monotonic()
+        self._queues: Dict[Tuple[str, str, str], deque] = {}
+        self.calls: Counter = Counter()  # Calls made through the cassette this run, by kind
+        self.misses: Counter = Counter()
+        if mode == REPLAY:
+            self.load()
+
+    # Recording
+
+    def record(
+        self, kind: str, model: str, prompt: Any, response: Any, seconds: float,
+        input_tokens: int = 0, output_tokens: int = 0, complete: bool = True,
+    ) -> Dict[str, Any]:
+        """Add one call; `response` is the text, or a list of [text, seconds] chunks for streams.
+
+        A stream is recorded with ``complete=False`` and saved only once ``finish()`` is called.
+        """
+        entry = {
+            "kind": kind,
+            "model": model,
+            "key": prompt_key(prompt),
+            "prompt": prompt,
+            "response": response,
+            "seconds": round(seconds, 4),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self._unsaved.append(entry)
+            if not complete:
+                self._open.add(id(entry))
+            self.calls[kind] += 1
+            due = time.monotonic() - self._saved_at >= settings.LLM_CASSETTE_FLUSH_SECONDS
+        if due:
+            self.save()
+        return entry  # Streams keep appending chunks to it while they are read
+
+    def finish(self, entry: Dict[str, Any]) -> None:
+        """A recorded stream was read to the end"""
+        with self._lock:
+            self._open.discard(id(entry))
+
+    def save(self, final: bool = False) -> None:
+        """Append the calls recorded since the last save (record mode); streams still
+        being read wait for the next save, unless this is the final one"""
+        if self.mode != RECORD:
+            return
+        with self._lock:
+            self._saved_at = time.monotonic()
+            entries = [entry for entry in self._unsaved if final or id(entry) not in self._open]
+            self._unsaved = [entry for entry in self._unsaved if not final and id(entry) in self._open]
+        if not entries:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lines = "".join(json.dumps(entry, separators=(",", ":"), default=str) + "\n" for entry in entries)
+        with open(self.path + ".lock", "w") as lock:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # Other workers append to the same file
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(lines)
+
+    # Replaying
+
+    def load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            self._entries = [json.loads(line) for line in f if line.strip()]
+        self._queues = {}
+        for entry in self._entries:
+            self._queues.setdefault((entry["kind"], entry["model"], entry["key"]), deque()).append(entry)
+
+    def replay(self, kind: str, model: str, prompt: Any) -> Dict[str, Any]:
+        """The recorded call for this prompt; a prompt recorded several times replays in order, then repeats the last"""
+        with self._lock:
+            self.calls[kind] += 1
+            queue = self._queues.get((kind, model, prompt_key(prompt)))
+            if not queue:
+                self.misses[kind] += 1
+                raise CassetteMiss(f"No recorded {kind} call to {model} for this prompt")
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def wait(self, entry: Dict[str, Any]) -> None:
+        if self.replay_timing:
+            time.sleep(entry["seconds"])
+
+    async def wait_async(self, entry: Dict[str, Any]) -> None:
+        if self.replay_timing:
+            await asyncio.sleep(entry["seconds"])
+
+    def recorded_calls(self) -> Counter:
+        """Calls in the cassette file by kind and model"""
+        return Counter(f"{entry['kind']}:{entry['model']}" for entry in self._entries)
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+def active_cassette() -> Optional[Cassette]:
+    """The configured cassette (loaded on first use), or None when recording/replay is off"""
+    global _cassette
+    if settings.LLM_CASSETTE_MODE not in (RECORD, REPLAY):
+        return None
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(
+                    settings.LLM_CASSETTE_PATH, settings.LLM_CASSETTE_MODE, settings.LLM_CASSETTE_REPLAY_TIMING
+                )
+    return _cassette
+
+def replaying() -> bool:
+    return settings.LLM_CASSETTE_MODE == REPLAY
+
+def save() -> None:
+    """Write the rest of the cassette if one is recording (on shutdown)"""
+    if _cassette is not None:
+        _cassette.save(final=True)
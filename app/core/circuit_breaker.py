@@ -0,0 +1,185 @@
+"""
+Circuit breakers for the model provider.
+
+One breaker per (model, endpoint). A breaker opens when, over a rolling window,
+too many calls fail or are slow; while open, calls fail immediately with
+``CircuitOpenError`` so callers take their cheap path instead of stacking
+retries. After a cool-down it lets a few trial calls through (half-open) and
+closes again if they succeed.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+import threading
+import time
+from app.core.config import settings
+from app.core.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the breaker is open"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Model provider circuit '{name}' is open")
+        self.name = name
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling window of call outcomes; thread-safe"""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_seconds: float,
+        slow_call_rate: float,
+        open_seconds: float,
+        half_open_calls: int,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._calls: deque = deque()  # (finished at, failed, slow)
+        self._opened_at = 0.0
+        self._trials = 0  # Calls let through while half-open
+        self._trial_successes = 0
+
+    # State
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        metrics.increment(f"breaker.{self.name}.{state}")
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state != CLOSED:
+            self._trials = self._trial_successes = 0
+        self._calls.clear()
+
+    def _cooled_down(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.open_seconds
+
+    def is_open(self) -> bool:
+        """Whether calls would be rejected right now (does not use up a half-open trial)"""
+        with self._lock:
+            return self.state == OPEN and not self._cooled_down()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; counts it as a trial when half-open"""
+        with self._lock:
+            if self.state == OPEN:
+                if not self._cooled_down():
+                    metrics.increment(f"breaker.{self.name}.rejected")
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    metrics.increment(f"breaker.{self.name}.rejected")
+                    return False
+                self._trials += 1
+            return True
+
+    def record(self, latency: float, failed: bool) -> None:
+        """Record the outcome of one call"""
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._record_trial(failed or slow)
+                return
+            if self.state == OPEN:
+                if not self._cooled_down():
+                    return  # A call that started before the breaker opened
+                # Calls made under a trial claimed with allow() (the crew's chat calls) report here
+                self._transition(HALF_OPEN)
+                self._record_trial(failed or slow)
+                return
+
+            now = time.monotonic()
+            self._calls.append((now, failed, slow))
+            while self._calls and self._calls[0][0] < now - self.window_seconds:
+                self._calls.popleft()
+            calls = len(self._calls)
+            if calls >= self.min_calls:
+                failures = sum(1 for _, f, _ in self._calls if f)
+                slow_calls = sum(1 for _, _, s in self._calls if s)
+                if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                    self._transition(OPEN)
+
+    def _record_trial(self, failed: bool) -> None:
+        # Called with the lock held
+        if failed:
+            self._transition(OPEN)
+        else:
+            self._trial_successes += 1
+            if self._trial_successes >= self.half_open_calls:
+                self._transition(CLOSED)
+
+    def release(self) -> None:
+        """Give back a half-open trial whose call never finished (e.g. cancelled)"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    @contextmanager
+    def guard(self):
+        """Wrap one provider call (sync or awaited inside the block); raises CircuitOpenError when open"""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(time.perf_counter() - started, failed=True)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record(time.perf_counter() - started, failed=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._calls)
+            return {
+                "state": OPEN if self.state == OPEN and not self._cooled_down() else self.state,
+                "window_calls": calls,
+                "failure_rate": round(sum(1 for _, f, _ in self._calls if f) / calls, 3) if calls else 0.0,
+                "slow_rate": round(sum(1 for _, _, s in self._calls if s) / calls, 3) if calls else 0.0,
+            }
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+def get_breaker(model: str, endpoint: str) -> CircuitBreaker:
+    """The breaker for one model and endpoint (created on first use)"""
+    key = (model, endpoint)
+    breaker: Optional[CircuitBreaker] = _breakers.get(key)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                breaker = _breakers[key] = CircuitBreaker(
+                    f"{model}.{endpoint}",
+                    window_seconds=settings.BREAKER_WINDOW_SECONDS,
+                    min_calls=settings.BREAKER_MIN_CALLS,
+                    failure_rate=settings.BREAKER_FAILURE_RATE,
+                    slow_call_seconds=settings.BREAKER_SLOW_CALL_SECONDS,
+                    slow_call_rate=settings.BREAKER_SLOW_CALL_RATE,
+                    open_seconds=settings.BREAKER_OPEN_SECONDS,
+                    half_open_calls=settings.BREAKER_HALF_OPEN_CALLS,
+                )
+    return breaker
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """State of every breaker, for /metrics"""
+    return {breaker.name: breaker.snapshot() for breaker in list(_breakers.values())}
@@ -0,0 +1,32 @@
+"""
+Negotiated response compression: Brotli when brotli-asgi is installed and the
+client accepts it, gzip otherwise. Only bodies above a minimum size are
+compressed, and endpoints that compress their own output are skipped.
+"""
+
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    from brotli_asgi import BrotliMiddleware
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+class CompressionMiddleware:
+    """ASGI middleware choosing br/gzip by Accept-Encoding"""
+
+    def __init__(self, app, minimum_size: int = 1024, skip_path_suffixes=("/export",)):
+        self.app = app
+        self.skip_path_suffixes = tuple(skip_path_suffixes)
+        if BROTLI_AVAILABLE:
+            # Falls back to gzip for clients that don't accept br
+            self.compressed = BrotliMiddleware(app, minimum_size=minimum_size, gzip_fallback=True)
+        else:
+            self.compressed = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].endswith(self.skip_path_suffixes):
+            # Exports stream their own (optional) gzip
+            await self.app(scope, receive, send)
+            return
+        await self.compressed(scope, receive, send)
@@ -0,0 +1,57 @@
+"""
+ETags and conditional GET for polled read endpoints.
+
+Single items use a strong ETag built from the id and ``revision`` (bumped by
+every update; ``updated_at`` can repeat within a second); lists and stats use
+an aggregate ETag computed by a cheap query over the same rows. When
+``If-None-Match`` matches, routes answer 304 before loading or serializing the
+full ORM objects.
+"""
+
+from typing import Any, Iterable
+from datetime import datetime
+import hashlib
+from fastapi import Request, Response
+
+# Clients must revalidate every time, but may reuse the body they already have
+CACHE_CONTROL = "private, no-cache"
+
+def _stamp(value: Any) -> str:
+    if isinstance(value, datetime):
+        return str(int(value.timestamp() * 1_000_000))
+    return "" if value is None else str(value)
+
+def content_etag(content_id: int, revision: int) -> str:
+    """Strong ETag for one content row"""
+    return f'"c{content_id}-r{revision}"'
+
+def aggregate_etag(kind: str, parts: Iterable[Any]) -> str:
+    """Strong ETag for a list or summary, from the (id, revision) pairs or aggregates it is built from"""
+    digest = hashlib.sha1(kind.encode())
+    for part in parts:
+        if isinstance(part, (tuple, list)):
+            part = ":".join(_stamp(value) for value in part)
+        digest.update(b"|" + _stamp(part).encode())
+    return f'"{kind}-{digest.hexdigest()[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for this header)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
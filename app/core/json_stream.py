@@ -0,0 +1,73 @@
+"""
+Incremental extraction of JSON objects from model output.
+
+The extractor is fed text as it arrives (whole responses or streamed chunks)
+and returns every top-level JSON object as soon as its closing brace is seen.
+It tracks strings and escapes, so braces inside values don't confuse it, and it
+ignores prose or markdown fences around the JSON. Objects completed before a
+truncation are kept; only the unfinished tail is lost.
+"""
+
+from typing import Any, Dict, List
+import json
+
+class JSONObjectExtractor:
+    """Bracket-matching scanner that yields complete top-level JSON objects"""
+
+    def __init__(self):
+        self._buffer = ""  # Text of an object left unfinished by the previous chunk
+        self._depth = 0  # Nesting depth inside the current object
+        self._in_string = False
+        self._escaped = False
+        self.skipped = 0  # Balanced spans that still weren't valid JSON
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume more text; return the objects completed by it"""
+        found: List[Dict[str, Any]] = []
+        start = 0  # Where the current object's text begins within this chunk
+        for index, char in enumerate(text):
+            if self._depth == 0:
+                # Between objects: wait for the next opening brace, skipping prose and array syntax
+                if char == "{":
+                    start = index
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    found.extend(self._complete(self._buffer + text[start:index + 1]))
+                    self._buffer = ""
+
+        if self._depth > 0:
+            # Carry the unfinished object over to the next chunk
+            self._buffer += text[start:]
+        return found
+
+    def _complete(self, candidate: str) -> List[Dict[str, Any]]:
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            self.skipped += 1
+            return []
+        return [value] if isinstance(value, dict) else []
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the text ended in the middle of an object"""
+        return self._depth > 0
+
+def extract_json_objects(text: str) -> List[Dict[str, Any]]:
+    """All complete top-level JSON objects in a piece of text"""
+    return JSONObjectExtractor().feed(text)
@@ -0,0 +1,188 @@
+"""
+Worker lifecycle: warm-up, readiness and graceful drain.
+
+A worker starts in ``starting``, runs its warm-up steps in the background and
+only then reports ready on ``/readyz``. On shutdown it flips to ``draining``
+(so readiness fails and the load balancer stops sending traffic) and waits for
+in-flight requests and background jobs to finish.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import importlib
+import time
+from sqlalchemy import text
+from app.core.config import settings
+from app.core import llm
+from app.db.database import async_engine
+
+STARTING = "starting"
+READY = "ready"
+DRAINING = "draining"
+STOPPED = "stopped"
+
+class Lifecycle:
+    """Tracks warm-up progress, in-flight requests and background jobs for this worker"""
+
+    def __init__(self):
+        self.state = STARTING
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.in_flight = 0
+        self.jobs = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    # Warm-up
+
+    def start_warm_up(self) -> None:
+        """Run the warm-up steps without blocking the server from binding"""
+        self._warmup_task = asyncio.get_running_loop().create_task(self.warm_up())
+
+    async def warm_up(self) -> None:
+        """Run each warm-up step, recording its status and latency; ready once all pass.
+
+        Failed steps (the database not reachable yet, a flaky import) are retried with
+        exponential backoff until they pass or the worker starts draining.
+        """
+        pending = list(WARMUP_STEPS)
+        delay = settings.WARMUP_RETRY_SECONDS
+        while True:
+            failed = []
+            for name, step in pending:
+                started = time.perf_counter()
+                try:
+                    await step()
+                    self.steps[name] = {"status": "ok", "latency_ms": _elapsed_ms(started)}
+                except Exception as e:
+                    attempts = self.steps.get(name, {}).get("attempts", 0) + 1
+                    self.steps[name] = {
+                        "status": "failed", "latency_ms": _elapsed_ms(started), "error": str(e), "attempts": attempts,
+                    }
+                    failed.append((name, step))
+
+            if self.state != STARTING:
+                return
+            if not failed:
+                self.state = READY
+                return
+            pending = failed
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.WARMUP_RETRY_MAX_SECONDS)
+
+    # Request and job tracking
+
+    def _changed(self) -> None:
+        if self.in_flight == 0 and self.jobs == 0:
+            self._idle.set()
+        else:
+            self._idle.clear()
+
+    @asynccontextmanager
+    async def track_request(self):
+        self.in_flight += 1
+        self._changed()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._changed()
+
+    @asynccontextmanager
+    async def track_job(self):
+        """Wrap a background job so shutdown waits for it"""
+        self.jobs += 1
+        self._changed()
+        try:
+            yield
+        finally:
+            self.jobs -= 1
+            self._changed()
+
+    # Readiness and shutdown
+
+    async def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """Readiness with per-dependency status and latency (live DB ping on every call)"""
+        checks: Dict[str, Any] = {"warm_up": dict(self.steps)}
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(_ping_database(), timeout=settings.READINESS_DB_TIMEOUT_SECONDS)
+            checks["database"] = {"status": "ok", "latency_ms": _elapsed_ms(started)}
+        except Exception as e:
+            checks["database"] = {"status": "failed", "latency_ms": _elapsed_ms(started), "error": str(e) or type(e).__name__}
+
+        checks["model_provider"] = {"status": "ok" if llm.is_configured() else "not_configured"}
+
+        ready = self.state == READY and checks["database"]["status"] == "ok"
+        return ready, {
+            "status": "ready" if ready else self.state,
+            "in_flight_requests": self.in_flight,
+            "background_jobs": self.jobs,
+            "checks": checks,
+        }
+
+    async def drain(self, timeout: float) -> bool:
+        """Stop reporting ready and wait for in-flight requests and jobs to finish"""
+        self.state = DRAINING
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            drained = True
+        except asyncio.TimeoutError:
+            drained = False
+        self.state = STOPPED
+        return drained
+
+class InFlightMiddleware:
+    """ASGI middleware that counts in-flight HTTP requests for the drain on shutdown"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        async with lifecycle.track_request():
+            await self.app(scope, receive, send)
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+async def _ping_database() -> None:
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+# Warm-up steps
+
+async def warm_db_pool() -> None:
+    """Open the configured number of pooled connections up front"""
+    await asyncio.gather(*(_ping_database() for _ in range(settings.WARMUP_DB_CONNECTIONS)))
+
+async def warm_model_provider() -> None:
+    """Import the generation stack and build the Gemini clients off the event loop"""
+    def load():
+        importlib.import_module("app.services.crew_service")  # crewai, langchain, bs4
+        if llm.is_configured():
+            llm.get_generative_model()
+            llm.get_chat_llm()
+    await asyncio.get_running_loop().run_in_executor(None, load)
+
+async def warm_text_processing() -> None:
+    """Compile the regexes used to clean and parse model output and start the post-processing workers"""
+    from app.core.text_processing import clean_unicode_content
+    from app.services.postprocess import postprocessor
+    importlib.import_module("app.services.memory_service")  # Its regexes compile at import
+    clean_unicode_content("warm-up \U0001F600 text")
+    await postprocessor.warm_up()
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], Awaitable[None]]]] = [
+    ("db_pool", warm_db_pool),
+    ("model_provider", warm_model_provider),
+    ("text_processing", warm_text_processing),
+]
+
+lifecycle = Lifecycle()
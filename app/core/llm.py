@@ -0,0 +1,351 @@
+"""
+Lazy access to the Gemini model provider.
+
+Nothing here imports google.generativeai or langchain until a model is
+actually requested, so importing the API doesn't pay for the AI stack.
+
+Every model call goes through the circuit breaker of its model and endpoint
+(see app.core.circuit_breaker), so a provider brownout fails fast, and is
+checked against and charged to the job's call budget when one is active
+(see app.core.call_budget). Calls can be recorded to and replayed from a
+cassette (see app.core.cassette); replayed calls never reach the provider.
+"""
+
+from typing import Optional
+import asyncio
+import threading
+import time
+from app.core.config import settings
+from app.core.circuit_breaker import get_breaker
+from app.core.call_budget import current_budget
+from app.core.cassette import active_cassette, REPLAY
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+_configure_lock = threading.Lock()
+_genai = None
+
+def is_configured() -> bool:
+    """Whether a Gemini API key is available (or calls are replayed from a cassette)"""
+    return bool(settings.GEMINI_API_KEY) or settings.LLM_CASSETTE_MODE == REPLAY
+
+def get_genai():
+    """Import and configure google.generativeai on first use"""
+    global _genai
+    if _genai is None:
+        with _configure_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                if settings.GEMINI_API_KEY:
+                    genai.configure(api_key=settings.GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+def _token_counts(usage) -> tuple:
+    """(input, output) tokens from Gemini or LangChain usage metadata (object or dict)"""
+    if usage is None:
+        return 0, 0
+    get = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+    input_tokens = get("input_tokens") or get("prompt_token_count") or 0
+    output_tokens = get("output_tokens") or get("candidates_token_count") or 0
+    return int(input_tokens), int(output_tokens)
+
+def _call_prompt(args, kwargs) -> dict:
+    """What identifies a generate call in a cassette: its contents and generation config"""
+    return {"contents": args[0] if args else kwargs.get("contents"), "generation_config": kwargs.get("generation_config")}
+
+def _response_text(response):
+    try:
+        return response.text
+    except ValueError:
+        return None  # Blocked or empty candidates
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+class ReplayedResponse:
+    """A recorded generate response (or stream, iterated sync or async) standing in for the SDK's"""
+
+    def __init__(self, entry: dict, cassette):
+        self._entry = entry
+        self._cassette = cassette
+        chunks = entry["response"] if isinstance(entry["response"], list) else None
+        self._chunks = chunks or []
+        self.text = "".join(text for text, _ in chunks) if chunks is not None else entry["response"]
+        self.usage_metadata = {
+            "prompt_token_count": entry["input_tokens"],
+            "candidates_token_count": entry["output_tokens"],
+        }
+
+    def _delays(self):
+        previous = 0.0
+        for text, at in self._chunks:
+            yield text, (at - previous) if self._cassette.replay_timing else 0.0
+            previous = at
+
+    def __iter__(self):
+        for text, delay in self._delays():
+            if delay > 0:
+                time.sleep(delay)
+            yield _Chunk(text)
+
+    async def __aiter__(self):
+        for text, delay in self._delays():
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield _Chunk(text)
+
+class _GuardedStream:
+    """Passes a streamed response through; once it is read to the end, charges the job's budget with
+    its token usage and, when recording, completes its cassette entry (chunks with arrival times)"""
+
+    def __init__(self, response, started: float, budget, cassette=None, entry: Optional[dict] = None):
+        self._response = response
+        self._started = started
+        self._budget = budget
+        self._cassette = cassette
+        self._entry = entry
+        self._usage = None
+
+    def _capture(self, chunk) -> None:
+        # The last chunk carries the usage of the whole stream
+        self._usage = getattr(chunk, "usage_metadata", None) or self._usage
+        if self._entry is not None:
+            elapsed = time.perf_counter() - self._started
+            self._entry["response"].append([_response_text(chunk) or "", round(elapsed, 4)])
+            self._entry["seconds"] = round(elapsed, 4)
+
+    def _finish(self) -> None:
+        tokens = _token_counts(self._usage or getattr(self._response, "usage_metadata", None))
+        if self._entry is not None:
+            self._entry["input_tokens"], self._entry["output_tokens"] = tokens
+            self._cassette.finish(self._entry)
+        if self._budget is not None:
+            self._budget.record(*tokens, time.perf_counter() - self._started)
+
+    def __iter__(self):
+        for chunk in self._response:
+            self._capture(chunk)
+            yield chunk
+        self._finish()
+
+    async def __aiter__(self):
+        async for chunk in self._response:
+            self._capture(chunk)
+            yield chunk
+        self._finish()
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+class GuardedModel:
+    """A google.generativeai model whose generate calls go through circuit breakers (or a cassette)"""
+
+    def __init__(self, model, model_name: str):
+        self._model = model
+        self.model_name = model_name
+
+    @staticmethod
+    def _kind(kwargs) -> str:
+        return "stream" if kwargs.get("stream") else "generate_content"
+
+    def _breaker(self, kwargs):
+        # Streams only report how the call started, so they get their own breaker
+        return get_breaker(self.model_name, self._kind(kwargs))
+
+    def _before(self, args, kwargs):
+        """Check the budget; when replaying, the recorded entry for this call"""
+        budget = current_budget()
+        if budget is not None:
+            budget.before_call()
+        cassette = active_cassette()
+        entry = None
+        if cassette is not None and cassette.mode == REPLAY:
+            entry = cassette.replay(self._kind(kwargs), self.model_name, _call_prompt(args, kwargs))
+        return budget, cassette, entry
+
+    def _after(self, budget, cassette, args, kwargs, response, started: float):
+        """Charge the budget and, when recording, capture the call (a stream once it has been read)"""
+        stream = self._kind(kwargs) == "stream"
+        entry = None
+        if cassette is not None and cassette.mode != REPLAY:
+            entry = cassette.record(
+                self._kind(kwargs), self.model_name, _call_prompt(args, kwargs),
+                [] if stream else _response_text(response), time.perf_counter() - started,
+                *_token_counts(getattr(response, "usage_metadata", None)), complete=not stream,
+            )
+        if stream:
+            return _GuardedStream(response, started, budget, cassette, entry)
+        if budget is not None:
+            budget.record(*_token_counts(getattr(response, "usage_metadata", None)), time.perf_counter() - started)
+        return response
+
+    def generate_content(self, *args, **kwargs):
+        budget, cassette, entry = self._before(args, kwargs)
+        started = time.perf_counter()
+        if entry is not None:
+            if not kwargs.get("stream"):
+                cassette.wait(entry)
+            response = ReplayedResponse(entry, cassette)
+        else:
+            with self._breaker(kwargs).guard():
+                response = self._model.generate_content(*args, **kwargs)
+        return self._after(budget, cassette, args, kwargs, response, started)
+
+    async def generate_content_async(self, *args, **kwargs):
+        budget, cassette, entry = self._before(args, kwargs)
+        started = time.perf_counter()
+        if entry is not None:
+            if not kwargs.get("stream"):
+                await cassette.wait_async(entry)
+            response = ReplayedResponse(entry, cassette)
+        else:
+            with self._breaker(kwargs).guard():
+                response = await self._model.generate_content_async(*args, **kwargs)
+        return self._after(budget, cassette, args, kwargs, response, started)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+def get_generative_model(model_name: str = DEFAULT_MODEL, **kwargs):
+    """Build a google.generativeai model (configures the SDK on first call)"""
+    return GuardedModel(get_genai().GenerativeModel(model_name, **kwargs), model_name)
+
+def chat_breaker(model_name: str = DEFAULT_MODEL):
+    """Breaker fed by the chat model's calls; the crew checks it before starting"""
+    return get_breaker(model_name, "chat")
+
+def _breaker_callback(breaker):
+    """LangChain callback recording every chat call's latency and outcome on the breaker"""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class BreakerCallback(BaseCallbackHandler):
+        def __init__(self):
+            self._started = {}
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                breaker.record(time.perf_counter() - started, failed=False)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                breaker.record(time.perf_counter() - started, failed=True)
+
+    return BreakerCallback()
+
+def _chat_usage(response):
+    """Usage metadata of a LangChain LLMResult (reported per message by the Gemini chat model)"""
+    usage = (response.llm_output or {}).get("usage_metadata")
+    if usage is None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+    return usage
+
+def _chat_prompt(messages) -> list:
+    return [[message.type, message.content] for message in messages]
+
+def _cassette_callback(cassette, model_name: str):
+    """LangChain callback recording every successful chat call to the cassette"""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class CassetteCallback(BaseCallbackHandler):
+        def __init__(self):
+            self._started = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._started[run_id] = (_chat_prompt(messages[0]), time.perf_counter())
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            call = self._started.pop(run_id, None)
+            if call is not None:
+                prompt, started = call
+                cassette.record(
+                    "chat", model_name, prompt, response.generations[0][0].text, time.perf_counter() - started,
+                    *_token_counts(_chat_usage(response)),
+                )
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._started.pop(run_id, None)
+
+    return CassetteCallback()
+
+def _replay_chat_model(cassette, model_name: str, callbacks):
+    """LangChain chat model answering from the cassette (the crew runs unchanged, offline)"""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class ReplayChatModel(BaseChatModel):
+        model: str
+
+        @property
+        def _llm_type(self) -> str:
+            return "cassette-replay"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            entry = cassette.replay("chat", self.model, _chat_prompt(messages))
+            cassette.wait(entry)
+            message = AIMessage(content=entry["response"] or "", usage_metadata={
+                "input_tokens": entry["input_tokens"],
+                "output_tokens": entry["output_tokens"],
+                "total_tokens": entry["input_tokens"] + entry["output_tokens"],
+            })
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    return ReplayChatModel(model=model_name, callbacks=callbacks)
+
+def _budget_callback(budget):
+    """LangChain callback enforcing a job's call budget on every chat call (raises BudgetExceeded)"""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class BudgetCallback(BaseCallbackHandler):
+        raise_error = True  # Let BudgetExceeded stop the agent instead of being logged
+
+        def __init__(self):
+            self._started = {}
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            budget.before_call()
+            self._started[run_id] = time.perf_counter()
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            budget.before_call()
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            started = self._started.pop(run_id, time.perf_counter())
+            budget.record(*_token_counts(_chat_usage(response)), time.perf_counter() - started)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            started = self._started.pop(run_id, time.perf_counter())
+            budget.record(0, 0, time.perf_counter() - started)
+
+    return BudgetCallback()
+
+def get_chat_llm(model_name: str = DEFAULT_MODEL, **kwargs):
+    """Build the LangChain chat model used by the CrewAI agents (bound to the active call budget, if any)"""
+    callbacks = list(kwargs.pop("callbacks", None) or [])
+    budget = current_budget()
+    if budget is not None:
+        callbacks.insert(0, _budget_callback(budget))  # First, so a refused call never reaches the others
+    cassette = active_cassette()
+    if cassette is not None and cassette.mode == REPLAY:
+        return _replay_chat_model(cassette, model_name, callbacks)  # No provider calls, so no breaker
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    callbacks.append(_breaker_callback(chat_breaker(model_name)))
+    if cassette is not None:
+        callbacks.append(_cassette_callback(cassette, model_name))
+    return ChatGoogleGenerativeAI(
+        model=model_name, google_api_key=settings.GEMINI_API_KEY, callbacks=callbacks, **kwargs
+    )
@@ -0,0 +1,55 @@
+"""
+In-process counters and timings, exposed on ``/metrics``.
+
+Per worker and reset on restart; enough to watch rates such as the suggestion
+parser's fallback rate without an external metrics stack.
+"""
+
+from typing import Any, Dict
+from contextlib import contextmanager
+import threading
+import time
+
+class Metrics:
+    """Thread-safe counters and timing summaries (count, total, max)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, milliseconds: float) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            timing["count"] += 1
+            timing["total_ms"] += milliseconds
+            timing["max_ms"] = max(timing["max_ms"], milliseconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block and record it under `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timings": {
+                    name: {
+                        "count": timing["count"],
+                        "avg_ms": round(timing["total_ms"] / timing["count"], 3) if timing["count"] else 0.0,
+                        "max_ms": round(timing["max_ms"], 3),
+                    }
+                    for name, timing in self._timings.items()
+                },
+            }
+
+metrics = Metrics()
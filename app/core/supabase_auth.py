@@ -3,7 +3,12 @@ Supabase Authentication Integration for FastAPI
 """
 
 import jwt
-from typing import Optional
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import requests
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -14,6 +19,12 @@ from app.core.config import settings
 # Supabase configuration from settings
 SUPABASE_URL = settings.SUPABASE_URL
 SUPABASE_JWT_SECRET = settings.SUPABASE_JWT_SECRET
+SUPABASE_JWKS_URL = settings.SUPABASE_JWKS_URL or (
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
+
+# Asymmetric algorithms accepted when the key comes from the JWKS
+JWKS_ALGORITHMS = ("RS256", "ES256")
 
 # Token security
 security = HTTPBearer()
@@ -25,32 +36,147 @@ class SupabaseUser:
         self.email = email
         self.metadata = kwargs
 
+class TokenCache:
+    """Bounded LRU of verified tokens keyed by SHA-256 digest; entries never outlive the token's exp"""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, Tuple[float, SupabaseUser]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[SupabaseUser]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def put(self, token: str, user: SupabaseUser, exp: Optional[float]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class JWKSCache:
+    """Signing keys from the Supabase JWKS endpoint, refreshed on a background thread"""
+
+    def __init__(self, url: Optional[str], refresh_seconds: int):
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._refresh_requested = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.last_refresh: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def get_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        """Look up a key without ever touching the network; unknown kids trigger a background refresh"""
+        if not self.url:
+            return None
+        key = self._keys.get(kid)
+        if key is None:
+            self.start()
+            self._refresh_requested.set()
+        return key
+
+    def refresh(self) -> None:
+        """Fetch the JWKS and swap in the new key set"""
+        try:
+            response = requests.get(self.url, timeout=5)
+            response.raise_for_status()
+            key_set = jwt.PyJWKSet.from_dict(response.json())
+            self._keys = {key.key_id: key for key in key_set.keys}
+            self.last_refresh = time.time()
+            self.last_error = None
+        except Exception as e:
+            # Keep serving the previous keys
+            self.last_error = str(e)
+
+    def start(self) -> None:
+        """Start the refresh thread once per process"""
+        if not self.url or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self.refresh()
+            self._refresh_requested.wait(self.refresh_seconds)
+            self._refresh_requested.clear()
+            # Don't hammer the endpoint when clients send unknown kids
+            time.sleep(1)
+
+token_cache = TokenCache(settings.JWT_CACHE_SIZE, settings.JWT_CACHE_TTL_SECONDS)
+jwks_cache = JWKSCache(SUPABASE_JWKS_URL, settings.JWKS_REFRESH_SECONDS)
+
+def _verification_key(token: str):
+    """Pick the key for the token's algorithm (HS256 -> shared secret, RS256/ES256 -> JWKS)"""
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    if algorithm == "HS256":
+        return SUPABASE_JWT_SECRET, algorithm
+    if algorithm in JWKS_ALGORITHMS:
+        return jwks_cache.get_key(header.get("kid")), algorithm
+    return None, algorithm
+
 def verify_supabase_token(token: str) -> Optional[SupabaseUser]:
-    """Verify and decode a Supabase JWT token"""
+    """Verify and decode a Supabase JWT token (cached until the token expires)"""
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
     try:
-        # First, let's try without audience verification for debugging
+        key, algorithm = _verification_key(token)
+        if key is None:
+            return None
+
         payload = jwt.decode(
             token,
-            SUPABASE_JWT_SECRET,
-            algorithms=["HS256"],
+            key,
+            algorithms=[algorithm],
             options={"verify_aud": False}  # Disable audience verification for now
         )
 
         # Extract user information
-        user_id = payload.get("sub")
-        email = payload.get("email")
+        user_id = payload.pop("sub", None)
+        email = payload.pop("email", None)
 
         if not user_id:
             return None
 
-        # Create a clean payload without conflicting keys
-        clean_payload = {k: v for k, v in payload.items() if k not in ['email']}
-
-        return SupabaseUser(
+        user = SupabaseUser(
             user_id=user_id,
             email=email or "unknown@example.com",
-            **clean_payload
+            **payload
         )
+        token_cache.put(token, user, payload.get("exp"))
+        return user
 
     except jwt.ExpiredSignatureError as e:
         return None
@@ -69,7 +195,7 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    if not SUPABASE_JWT_SECRET:
+    if not SUPABASE_JWT_SECRET and not SUPABASE_JWKS_URL:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Server configuration error: JWT secret not set"
@@ -87,6 +213,15 @@ def get_current_active_user(current_user: SupabaseUser = Depends(get_current_use
     """Get the current active user (Supabase users are always active)"""
     return current_user
 
+def get_current_admin_user(current_user: SupabaseUser = Depends(get_current_user)) -> SupabaseUser:
+    """Get the current user, only if they are listed in ADMIN_USER_IDS"""
+    if current_user.id not in settings.ADMIN_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
 def verify_client_ownership(
     client_id: int,
     current_user: SupabaseUser,
@@ -0,0 +1,141 @@
+"""
+Pure text post-processing of model output.
+
+Nothing here imports the app's settings, database or AI stack, so these
+functions are cheap to load in post-processing worker processes.
+"""
+
+from typing import List, Optional, Tuple
+import re
+
+# Emojis and other problematic Unicode characters (compiled once at import)
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002702-\U000027B0"  # dingbats
+    "\U000024C2-\U0001F251"  # enclosed characters
+    "]+",
+    flags=re.UNICODE
+)
+
+def clean_unicode_content(content):
+    """Remove emojis and problematic Unicode characters that cause encoding issues"""
+    cleaned_content = EMOJI_PATTERN.sub('', content)
+
+    # Also remove any other problematic characters
+    return cleaned_content.encode('ascii', 'ignore').decode('ascii')
+
+def split_generated_content(result: str, topic: Optional[str]) -> Tuple[str, str, str]:
+    """Split crew output into (title, body, visual suggestions)"""
+    # Process the result to separate content and visual suggestions
+    if "VISUAL SUGGESTIONS:" in result:
+        content_parts = result.split("VISUAL SUGGESTIONS:", 1)  # Split only on first occurrence
+        main_content = content_parts[0].strip()
+        visual_suggestions = "VISUAL SUGGESTIONS:" + content_parts[1].strip()
+    else:
+        main_content = result.strip()
+        visual_suggestions = "No specific visual suggestions provided."
+
+    # If main_content is empty, use a fallback
+    if not main_content:
+        main_content = f"""
+        {topic}
+
+        Are you tired of allergies disrupting your daily life? Nishamritha Tablets offer a natural, Ayurvedic solution to provide lasting relief from allergy symptoms.
+
+        ## Understanding Allergies
+        Allergies occur when your immune system reacts to foreign substances that are typically harmless. These reactions can cause sneezing, itching, and other uncomfortable symptoms that affect your quality of life.
+
+        ## The Ayurvedic Approach
+        Nishamritha Tablets are formulated based on ancient Ayurvedic principles, using a blend of natural herbs and ingredients known for their anti-allergic properties. Unlike conventional medications, these tablets address the root cause of allergies rather than just masking the symptoms.
+
+        ## Key Benefits
+        - Natural ingredients with no harsh chemicals
+        - Long-lasting relief rather than temporary symptom suppression
+        - No drowsiness or other common side effects
+        - Strengthens your immune system over time
+
+        Try Nishamritha Tablets today and experience the freedom of living without allergy constraints.
+        """
+
+    # Extract title and body from main content
+    lines = main_content.split('\n')
+
+    # The first non-empty line is the title
+    title_lines = [line for line in lines if line.strip()]
+    title = title_lines[0].strip() if title_lines else topic
+
+    # Everything after the title is the body
+    if len(title_lines) > 1:
+        # Find the index of the title in the original lines
+        title_index = lines.index(title_lines[0])
+        # Body is everything after the title
+        body = '\n'.join(lines[title_index+1:]).strip()
+    else:
+        body = ""
+
+    # If body is still empty, use the main_content except the first line
+    if not body and len(lines) > 1:
+        body = '\n'.join(lines[1:]).strip()
+
+    # If body is still empty, use the entire main_content
+    if not body:
+        body = main_content
+
+    # If title is the same as topic and body starts with a potential title, extract it
+    if title == topic and body:
+        body_lines = body.split('\n')
+        if body_lines and body_lines[0].strip():
+            potential_title = body_lines[0].strip()
+            # Check if it looks like a title (not too long, no periods at end)
+            if len(potential_title) < 100 and not potential_title.endswith('.'):
+                title = potential_title
+                body = '\n'.join(body_lines[1:]).strip()
+
+    # If body is still empty after all attempts, use a fallback
+    if not body:
+        body = f"""
+        Are you tired of allergies disrupting your daily life? Nishamritha Tablets offer a natural, Ayurvedic solution to provide lasting relief from allergy symptoms.
+
+        ## Understanding Allergies
+        Allergies occur when your immune system reacts to foreign substances that are typically harmless. These reactions can cause sneezing, itching, and other uncomfortable symptoms that affect your quality of life.
+
+        ## The Ayurvedic Approach
+        Nishamritha Tablets are formulated based on ancient Ayurvedic principles, using a blend of natural herbs and ingredients known for their anti-allergic properties. Unlike conventional medications, these tablets address the root cause of allergies rather than just masking the symptoms.
+
+        ## Key Benefits
+        - Natural ingredients with no harsh chemicals
+        - Long-lasting relief rather than temporary symptom suppression
+        - No drowsiness or other common side effects
+        - Strengthens your immune system over time
+
+        Try Nishamritha Tablets today and experience the freedom of living without allergy constraints.
+        """
+
+
+    return title, body, visual_suggestions
+
+def postprocess_output(raw: str, topic: Optional[str]) -> Tuple[str, str, str]:
+    """Clean crew output and split it into (title, body, visual suggestions)"""
+    return split_generated_content(clean_unicode_content(raw), topic)
+
+def postprocess_batch(items: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, str, str]]:
+    """Post-process several outputs in one task (one round trip to a worker process)"""
+    return [postprocess_output(raw, topic) for raw, topic in items]
+
+def split_title_body(text: str, fallback_title: str) -> Tuple[str, str]:
+    """First non-empty line as the title (markdown markers stripped), the rest as the body"""
+    lines = text.strip().split("\n")
+    for index, line in enumerate(lines):
+        title = line.strip().lstrip("#*").strip().rstrip("*").strip()
+        if title:
+            body = "\n".join(lines[index + 1:]).strip()
+            return title[:255], body or text.strip()
+    return fallback_title[:255], text.strip()
+
+def split_title_body_batch(items: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Split several batch drafts in one task; unlike crew output they are kept verbatim otherwise"""
+    return [split_title_body(text, fallback_title) for text, fallback_title in items]
@@ -0,0 +1,161 @@
+"""
+Incremental maintenance of ``client_content_profiles``.
+
+Each content write is applied to its client's profile as a delta (counts for
+topics, keywords and types, plus the last-N summaries), so reading a client's
+history is a single row lookup instead of a scan of its content.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+from collections import Counter, defaultdict
+from datetime import datetime
+import enum
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.engine import Connection
+from app.db.models import Content, ClientContentProfile
+
+RECENT_LIMIT = 10
+
+def split_keywords(keywords: Optional[str]) -> List[str]:
+    """Split a comma-separated keywords string"""
+    if not keywords:
+        return []
+    return [k.strip() for k in keywords.split(",") if k.strip()]
+
+def summarize(values: Dict[str, Any]) -> Dict[str, Any]:
+    """The per-item summary kept in ``recent_items`` (same shape as the old content_history)"""
+    content_type = values.get("content_type")
+    if isinstance(content_type, enum.Enum):
+        content_type = content_type.value
+    created_at = values.get("created_at") or datetime.now()
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return {
+        "id": values["id"],
+        "title": values.get("title"),
+        "type": content_type,
+        "topic": values.get("topic"),
+        "created_at": created_at,
+        "keywords": values.get("keywords"),
+    }
+
+def _apply(counter: Counter, items: Iterable[str], sign: int) -> None:
+    for item in items:
+        if item:
+            counter[item] += sign
+            if counter[item] <= 0:
+                del counter[item]
+
+def _load_profile(connection: Connection, client_id: int) -> Optional[Dict[str, Any]]:
+    statement = select(ClientContentProfile.__table__).where(ClientContentProfile.client_id == client_id)
+    if connection.dialect.name == "postgresql":
+        statement = statement.with_for_update()  # Serialize concurrent writers for one client
+    row = connection.execute(statement).mappings().first()
+    return dict(row) if row else None
+
+def _recent_from_content(connection: Connection, client_id: int) -> List[Dict[str, Any]]:
+    """Latest items straight from the contents table (used to refill or rebuild)"""
+    rows = connection.execute(
+        select(Content.id, Content.title, Content.content_type, Content.topic, Content.created_at, Content.keywords)
+        .where(Content.client_id == client_id)
+        .order_by(Content.created_at.desc(), Content.id.desc())
+        .limit(RECENT_LIMIT)
+    ).mappings().all()
+    return [summarize(dict(row)) for row in rows]
+
+def apply_changes(connection: Connection, added: List[Dict[str, Any]], removed: List[Dict[str, Any]]) -> None:
+    """Apply content rows added to / removed from clients' profiles (an edit is remove + add)"""
+    by_client: Dict[int, Dict[str, list]] = defaultdict(lambda: {"added": [], "removed": []})
+    for values in added:
+        if values.get("client_id") is not None:
+            by_client[values["client_id"]]["added"].append(values)
+    for values in removed:
+        if values.get("client_id") is not None:
+            by_client[values["client_id"]]["removed"].append(values)
+
+    for client_id, changes in by_client.items():
+        profile = _load_profile(connection, client_id)
+        if profile is None:
+            # No profile yet: build it from scratch, which already includes this flush
+            rebuild_profiles(connection, [client_id])
+            continue
+
+        topics = Counter(profile["topic_counts"] or {})
+        keywords = Counter(profile["keyword_counts"] or {})
+        types = Counter(profile["type_counts"] or {})
+        recent = list(profile["recent_items"] or [])
+        count = profile["content_count"]
+
+        for values in changes["removed"]:
+            count -= 1
+            _apply(topics, [values.get("topic")], -1)
+            _apply(keywords, split_keywords(values.get("keywords")), -1)
+            _apply(types, [summarize(values)["type"]], -1)
+            recent = [item for item in recent if item["id"] != values["id"]]
+
+        for values in changes["added"]:
+            count += 1
+            _apply(topics, [values.get("topic")], 1)
+            _apply(keywords, split_keywords(values.get("keywords")), 1)
+            _apply(types, [summarize(values)["type"]], 1)
+            recent = [item for item in recent if item["id"] != values["id"]]
+            recent.append(summarize(values))
+
+        recent.sort(key=lambda item: (item["created_at"] or "", item["id"]), reverse=True)
+        recent = recent[:RECENT_LIMIT]
+        count = max(count, 0)
+        if len(recent) < min(count, RECENT_LIMIT):
+            # A recent item was deleted; refill from the table
+            recent = _recent_from_content(connection, client_id)
+
+        connection.execute(
+            update(ClientContentProfile.__table__)
+            .where(ClientContentProfile.client_id == client_id)
+            .values(
+                content_count=count,
+                topic_counts=dict(topics),
+                keyword_counts=dict(keywords),
+                type_counts=dict(types),
+                recent_items=recent,
+                version=profile["version"] + 1,
+                updated_at=datetime.now(),
+            )
+        )
+
+def rebuild_profiles(connection: Connection, client_ids: Iterable[int]) -> None:
+    """Recompute profiles from the contents table (first use, bulk imports, migration)"""
+    for client_id in set(client_ids):
+        topics, keywords, types = Counter(), Counter(), Counter()
+        count = 0
+        rows = connection.execute(
+            select(Content.topic, Content.keywords, Content.content_type).where(Content.client_id == client_id)
+        )
+        for row in rows:
+            count += 1
+            _apply(topics, [row.topic], 1)
+            _apply(keywords, split_keywords(row.keywords), 1)
+            _apply(types, [row.content_type.value if row.content_type else None], 1)
+
+        existing = _load_profile(connection, client_id)
+        values = {
+            "content_count": count,
+            "topic_counts": dict(topics),
+            "keyword_counts": dict(keywords),
+            "type_counts": dict(types),
+            "recent_items": _recent_from_content(connection, client_id),
+            "updated_at": datetime.now(),
+        }
+        if existing is None:
+            connection.execute(insert(ClientContentProfile.__table__).values(client_id=client_id, version=1, **values))
+        else:
+            connection.execute(
+                update(ClientContentProfile.__table__)
+                .where(ClientContentProfile.client_id == client_id)
+                .values(version=existing["version"] + 1, **values)
+            )
+
+def delete_profiles(connection: Connection, client_ids: Iterable[int]) -> None:
+    """Drop the profiles of deleted clients"""
+    ids = list(client_ids)
+    if ids:
+        connection.execute(delete(ClientContentProfile.__table__).where(ClientContentProfile.client_id.in_(ids)))
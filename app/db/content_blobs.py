@@ -0,0 +1,204 @@
+"""
+Out-of-row storage for large content text.
+
+``body`` and ``visual_suggestions`` of at least ``BLOB_MIN_LENGTH`` characters are stored
+compressed in ``content_blobs``, keyed by the SHA-256 of the text, and the
+``contents`` row keeps only the digest (the inline column is NULL). Identical
+texts (regenerations, repeated error tracebacks) share one blob. Compression
+is zstd when ``zstandard`` is installed, zlib otherwise; the codec is stored
+per blob so either can read what the other wrote.
+
+ORM objects expose the full text through the ``Content.body`` and
+``Content.visual_suggestions`` properties, which decompress on first read.
+
+Blobs that no ``contents`` row references any more are deleted by a periodic
+sweep, only once they are older than ``BLOB_SWEEP_MIN_AGE_SECONDS``. Blobs are
+shared, so deleting one inside a writer's transaction would race with another
+writer storing the same text.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime, timedelta
+import hashlib
+import zlib
+from sqlalchemy import select, update, insert, delete, func, or_, exists, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from app.db.models import Content, ContentBlob
+from app.core.config import settings
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Text fields that can be stored out of row, with their inline and digest columns
+TEXT_FIELDS = {
+    "body": ("body_text", "body_blob"),
+    "visual_suggestions": ("visual_suggestions_text", "visual_suggestions_blob"),
+}
+
+def compress(text: str) -> Dict[str, Any]:
+    raw = text.encode("utf-8")
+    if ZSTD_AVAILABLE:
+        codec, data = "zstd", zstandard.ZstdCompressor(level=settings.BLOB_ZSTD_LEVEL).compress(raw)
+    else:
+        codec, data = "zlib", zlib.compress(raw, 9)
+    return {"digest": hashlib.sha256(raw).hexdigest(), "codec": codec, "size": len(raw), "data": data}
+
+def decompress(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Content blob is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+def is_large(text: Optional[str]) -> bool:
+    return text is not None and len(text) >= settings.BLOB_MIN_LENGTH
+
+def store_blobs(connection: Connection, texts: Iterable[str]) -> Dict[str, str]:
+    """Write blobs for the given texts (existing digests keep their data); returns text -> digest"""
+    blobs = {}
+    for text in texts:
+        if text not in blobs:
+            blobs[text] = compress(text)
+    if not blobs:
+        return {}
+
+    now = datetime.now()
+    values = [{**blob, "created_at": now} for blob in blobs.values()]
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        statement = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(ContentBlob)
+        # Re-storing an existing text renews its created_at, so the sweep doesn't delete it under this writer
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[ContentBlob.digest], set_={"created_at": statement.excluded.created_at}
+        ), values)
+    else:
+        existing = set(connection.execute(
+            select(ContentBlob.digest).where(ContentBlob.digest.in_([value["digest"] for value in values]))
+        ).scalars())
+        if existing:
+            connection.execute(update(ContentBlob).where(ContentBlob.digest.in_(existing)).values(created_at=now))
+        values = [value for value in values if value["digest"] not in existing]
+        if values:
+            connection.execute(insert(ContentBlob), values)
+    return {text: blob["digest"] for text, blob in blobs.items()}
+
+def load_texts(connection: Connection, digests: Iterable[str]) -> Dict[str, str]:
+    """Decompressed text of each digest"""
+    digests = {digest for digest in digests if digest}
+    if not digests:
+        return {}
+    rows = connection.execute(
+        select(ContentBlob.digest, ContentBlob.codec, ContentBlob.data).where(ContentBlob.digest.in_(digests))
+    )
+    return {row.digest: decompress(row.codec, row.data) for row in rows}
+
+def storage_values(connection: Connection, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Column values for Core writes: large text goes to blobs, the row keeps its digest"""
+    digests = store_blobs(connection, [
+        row[field] for row in rows for field in TEXT_FIELDS if is_large(row.get(field))
+    ])
+    stored = []
+    for row in rows:
+        values = {key: value for key, value in row.items() if key not in TEXT_FIELDS}
+        for field, (inline, blob) in TEXT_FIELDS.items():
+            if field in row:
+                text = row[field]
+                values[inline], values[blob] = (None, digests[text]) if is_large(text) else (text, None)
+        stored.append(values)
+    return stored
+
+def resolve_rows(connection: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Fill in text stored out of row, for rows selected with their ``*_blob`` digests"""
+    texts = load_texts(connection, [row.get(blob) for row in rows for _, blob in TEXT_FIELDS.values()])
+    for row in rows:
+        for field, (_, blob) in TEXT_FIELDS.items():
+            if row.get(blob):
+                row[field] = texts[row[blob]]
+
+def move_large_text(
+    connection: Connection, client_ids: Optional[Iterable[int]] = None, batch_size: int = 200
+) -> None:
+    """Move large inline text into blobs in batches (after COPY, and for the migration)"""
+    table = Content.__table__
+    statement = (
+        select(table.c.id, table.c.body_text.label("body"), table.c.visual_suggestions_text.label("visual_suggestions"))
+        .where(or_(
+            func.length(table.c.body_text) >= settings.BLOB_MIN_LENGTH,
+            func.length(table.c.visual_suggestions_text) >= settings.BLOB_MIN_LENGTH,
+        ))
+        .order_by(table.c.id)
+        .limit(batch_size)
+    )
+    if client_ids is not None:
+        client_ids = list(client_ids)
+        if not client_ids:
+            return
+        statement = statement.where(table.c.client_id.in_(client_ids))
+
+    while True:
+        rows = [dict(row) for row in connection.execute(statement).mappings()]
+        if not rows:
+            return
+        params = []
+        for values in storage_values(connection, rows):
+            values["content_id"] = values.pop("id")
+            params.append(values)
+        connection.execute(update(table).where(table.c.id == bindparam("content_id")), params)
+
+def move_text_inline(connection: Connection, batch_size: int = 200) -> None:
+    """Put out-of-row text back into the contents columns in batches (migration downgrade)"""
+    table = Content.__table__
+    statement = (
+        select(table.c.id, table.c.body_blob, table.c.visual_suggestions_blob)
+        .where(or_(table.c.body_blob.isnot(None), table.c.visual_suggestions_blob.isnot(None)))
+        .order_by(table.c.id)
+        .limit(batch_size)
+    )
+    while True:
+        rows = [dict(row) for row in connection.execute(statement).mappings()]
+        if not rows:
+            return
+        resolve_rows(connection, rows)
+        for row in rows:
+            # Only the fields stored out of row; rows differ in which those are
+            values = {}
+            for field, (inline, blob) in TEXT_FIELDS.items():
+                if row[blob]:
+                    values[inline], values[blob] = row[field], None
+            connection.execute(update(table).where(table.c.id == row["id"]).values(**values))
+
+def _unreferenced():
+    """Condition on ContentBlob: no contents row points at it"""
+    table = Content.__table__
+    return ~or_(
+        exists().where(table.c.body_blob == ContentBlob.digest),
+        exists().where(table.c.visual_suggestions_blob == ContentBlob.digest),
+    )
+
+def remove_unreferenced(connection: Connection, digests: Iterable[str], stored_before: datetime) -> None:
+    """Delete the given blobs unless some content references them again, or they were stored again, by now"""
+    digests = {digest for digest in digests if digest}
+    if digests:
+        connection.execute(delete(ContentBlob).where(
+            ContentBlob.digest.in_(digests), ContentBlob.created_at <= stored_before, _unreferenced()
+        ))
+
+def sweep_unreferenced(connection: Connection, min_age_seconds: int = 0, batch_size: int = 500) -> int:
+    """Delete every unreferenced blob not stored in the last `min_age_seconds`, in batches; returns the count"""
+    stored_before = datetime.now() - timedelta(seconds=min_age_seconds)
+    statement = (
+        select(ContentBlob.digest)
+        .where(ContentBlob.created_at <= stored_before, _unreferenced())
+        .limit(batch_size)
+    )
+    removed = 0
+    while True:
+        digests = connection.execute(statement).scalars().all()
+        if not digests:
+            return removed
+        remove_unreferenced(connection, digests, stored_before)
+        removed += len(digests)
@@ -0,0 +1,63 @@
+"""
+Storage of MinHash signatures for ``contents`` rows.
+
+Like the search index, signatures are written by the application whenever a
+content's topic or body is written (see ``app.db.events``), so the per-client
+LSH indexes only ever need to load rows changed since they last looked.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+from sqlalchemy import select, delete
+from sqlalchemy.engine import Connection
+from app.db.models import Content, ContentSignature
+from app.services import minhash
+
+def _signature_row(values: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return {
+        "content_id": values["id"],
+        "client_id": values["client_id"],
+        "topic_signature": minhash.to_bytes(minhash.topic_signature(values.get("topic"))),
+        "body_signature": minhash.to_bytes(minhash.body_signature(values.get("body"))),
+        "updated_at": now,
+    }
+
+def store_signatures(connection: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Compute and upsert signatures for content rows (dicts with id, client_id, topic, body)"""
+    if not rows:
+        return
+    now = datetime.now()
+    table = ContentSignature.__table__
+    connection.execute(delete(table).where(table.c.content_id.in_([row["id"] for row in rows])))
+    # Content detached from its client keeps no signature
+    signed = [_signature_row(row, now) for row in rows if row.get("client_id") is not None]
+    if signed:
+        connection.execute(table.insert(), signed)
+
+def remove_signatures(connection: Connection, content_ids: Iterable[int]) -> None:
+    ids = list(content_ids)
+    if ids:
+        table = ContentSignature.__table__
+        connection.execute(delete(table).where(table.c.content_id.in_(ids)))
+
+def sign_unsigned_rows(connection: Connection, client_ids: Optional[Iterable[int]] = None, batch_size: int = 500) -> None:
+    """Sign content that has no signature yet (after COPY, and for the migration backfill)"""
+    statement = (
+        select(Content.id, Content.client_id, Content.topic, Content.body.label("body"))
+        .select_from(Content)
+        .outerjoin(ContentSignature, ContentSignature.content_id == Content.id)
+        .where(ContentSignature.content_id.is_(None), Content.client_id.isnot(None))
+        .order_by(Content.id)
+        .limit(batch_size)
+    )
+    client_ids = None if client_ids is None else list(client_ids)
+    if client_ids is not None:
+        if not client_ids:
+            return
+        statement = statement.where(Content.client_id.in_(client_ids))
+
+    while True:
+        rows = [dict(row) for row in connection.execute(statement).mappings()]
+        if not rows:
+            return
+        store_signatures(connection, rows)
@@ -0,0 +1,216 @@
+"""
+Version history of ``contents`` rows, stored as compressed deltas.
+
+Every write that changes a versioned field adds a version (see
+``app.db.events``). Most versions hold only what changed since the previous
+one: short fields whole, long text as a line-level delta (copy ranges of the
+previous text plus inserted lines). Every ``VERSION_SNAPSHOT_INTERVAL``-th
+version is a full snapshot, so rebuilding any version reads at most that many
+rows. Payloads are zlib-compressed JSON.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+from difflib import SequenceMatcher
+import enum
+import json
+import zlib
+from sqlalchemy import select, delete, func, and_, or_, exists
+from sqlalchemy.engine import Connection
+from app.db.models import Content, ContentVersion
+from app.db import content_blobs
+from app.core.config import settings
+
+# Fields kept in the history; DIFF_FIELDS are stored as line deltas, the rest whole when they change
+VERSION_FIELDS = ("title", "body", "content_type", "status", "topic", "keywords", "visual_suggestions")
+DIFF_FIELDS = ("body", "visual_suggestions")
+
+# Generation stages after which a row holds real content (placeholders aren't versioned)
+FINISHED_STAGES = (None, "done", "failed")
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, enum.Enum) else value
+
+def snapshot_of(values: Dict[str, Any]) -> Dict[str, Any]:
+    """The versioned fields of a row, as stored"""
+    return {field: _plain(values.get(field)) for field in VERSION_FIELDS}
+
+def line_delta(old: str, new: str) -> List[Any]:
+    """Ops rebuilding `new` from `old`: [start, end] copies old lines, a string inserts text"""
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    ops: List[Any] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+def apply_line_delta(old: str, ops: List[Any]) -> str:
+    a = old.splitlines(keepends=True)
+    return "".join("".join(a[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+def _delta(base: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"set": {}, "diff": {}}
+    for field in VERSION_FIELDS:
+        old, new = base.get(field), state.get(field)
+        if old == new:
+            continue
+        if field in DIFF_FIELDS and isinstance(old, str) and isinstance(new, str):
+            payload["diff"][field] = line_delta(old, new)
+        else:
+            payload["set"][field] = new
+    return payload
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), 9)
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+def build_state(chain: Iterable[Any]) -> Dict[str, Any]:
+    """Replay versions (ordered, starting at a snapshot) into the fields of the last one"""
+    state: Dict[str, Any] = {}
+    for row in chain:
+        payload = _decode(row.data)
+        if row.is_snapshot:
+            state = dict(payload["set"])
+            continue
+        for field, ops in payload.get("diff", {}).items():
+            state[field] = apply_line_delta(state.get(field) or "", ops)
+        state.update(payload.get("set", {}))
+    return state
+
+def _version_row(content_id: int, version: int, base: Optional[Dict[str, Any]], state: Dict[str, Any], user_id, now):
+    snapshot = base is None or (version - 1) % settings.VERSION_SNAPSHOT_INTERVAL == 0
+    return {
+        "content_id": content_id,
+        "version": version,
+        "is_snapshot": snapshot,
+        "data": _encode({"set": state} if snapshot else _delta(base, state)),
+        "user_id": user_id,
+        "created_at": now,
+    }
+
+class _Version:
+    """In-memory stand-in for a version row (same attributes as the selected rows)"""
+
+    def __init__(self, version: int, is_snapshot: bool, data: bytes):
+        self.version = version
+        self.is_snapshot = is_snapshot
+        self.data = data
+
+def record_versions(connection: Connection, rows: List[Dict[str, Any]], user_id: Optional[str] = None) -> None:
+    """Add a version for each row whose versioned fields differ from its latest version.
+
+    Rows are dicts with id and the versioned fields, plus optionally ``previous``: the
+    fields before this write, recorded first for content that has no history yet.
+    """
+    if not rows:
+        return
+    table = ContentVersion.__table__
+    ids = {row["id"] for row in rows}
+    if connection.dialect.name == "postgresql":
+        # Serialize concurrent writers of the same content, so both can't number the same next version
+        contents = Content.__table__
+        connection.execute(
+            select(contents.c.id).where(contents.c.id.in_(ids)).order_by(contents.c.id).with_for_update()
+        )
+
+    # Latest versions back to (and including) the last snapshot, for every row at once
+    latest = (
+        select(table.c.content_id, func.max(table.c.version).label("latest"))
+        .where(table.c.content_id.in_(ids))
+        .group_by(table.c.content_id)
+        .subquery()
+    )
+    chains: Dict[int, List[Any]] = {}
+    for version in connection.execute(
+        select(table.c.content_id, table.c.version, table.c.is_snapshot, table.c.data)
+        .join(latest, and_(
+            table.c.content_id == latest.c.content_id,
+            table.c.version > latest.c.latest - settings.VERSION_SNAPSHOT_INTERVAL,
+        ))
+        .order_by(table.c.content_id, table.c.version)
+    ):
+        chain = chains.setdefault(version.content_id, [])
+        if version.is_snapshot:
+            chain.clear()
+        chain.append(version)
+
+    now = datetime.now()
+    inserts = []
+    for row in rows:
+        state = snapshot_of(row)
+        chain = chains.get(row["id"])
+        if chain:
+            number, base = chain[-1].version, build_state(chain)
+        else:
+            number, base = 0, None
+            previous = row.get("previous")
+            if previous is not None and snapshot_of(previous) != state:
+                # Content written before versioning started: keep its prior state as version 1
+                base = snapshot_of(previous)
+                number = 1
+                inserts.append(_version_row(row["id"], 1, None, base, None, now))
+        if base == state:
+            continue
+        inserts.append(_version_row(row["id"], number + 1, base, state, user_id, now))
+        # Later rows for the same content in this batch build on this version
+        chains[row["id"]] = [_Version(number + 1, True, _encode({"set": state}))]
+
+    if inserts:
+        connection.execute(table.insert(), inserts)
+
+def version_unversioned_rows(connection: Connection, client_ids: Iterable[int], batch_size: int = 500) -> None:
+    """Record a first version of finished content that has none yet (after COPY)"""
+    client_ids = list(client_ids)
+    if not client_ids:
+        return
+    statement = (
+        select(
+            Content.id,
+            *(getattr(Content, field).label(field) for field in VERSION_FIELDS),
+            Content.body_blob,
+            Content.visual_suggestions_blob,
+        )
+        .where(
+            Content.client_id.in_(client_ids),
+            or_(Content.generation_stage.is_(None), Content.generation_stage.in_(FINISHED_STAGES[1:])),
+            ~exists().where(ContentVersion.content_id == Content.id),
+        )
+        .order_by(Content.id)
+        .limit(batch_size)
+    )
+    while True:
+        rows = [dict(row) for row in connection.execute(statement).mappings()]
+        if not rows:
+            return
+        content_blobs.resolve_rows(connection, rows)
+        record_versions(connection, rows)
+
+def load_version(connection: Connection, content_id: int, version: int) -> Optional[Dict[str, Any]]:
+    """Fields of one version, rebuilt from the nearest snapshot at or before it"""
+    table = ContentVersion.__table__
+    snapshot = connection.execute(
+        select(func.max(table.c.version)).where(
+            table.c.content_id == content_id, table.c.is_snapshot.is_(True), table.c.version <= version
+        )
+    ).scalar()
+    if snapshot is None:
+        return None
+    chain = connection.execute(
+        select(table.c.version, table.c.is_snapshot, table.c.data)
+        .where(table.c.content_id == content_id, table.c.version >= snapshot, table.c.version <= version)
+        .order_by(table.c.version)
+    ).all()
+    if not chain or chain[-1].version != version:
+        return None
+    return build_state(chain)
+
+def remove_versions(connection: Connection, content_ids: Iterable[int]) -> None:
+    ids = list(content_ids)
+    if ids:
+        table = ContentVersion.__table__
+        connection.execute(delete(table).where(table.c.content_id.in_(ids)))
@@ -0,0 +1,166 @@
+"""
+ORM write hooks that keep derived data in sync with ``Content`` rows.
+
+Registered on the ``Session`` class, so they run for sync sessions and for
+the sync session underneath every ``AsyncSession``.
+"""
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.db.models import Client, Content
+from app.db import search_index, client_profiles, content_signatures, content_versions, content_blobs
+
+# Attributes the near-duplicate signatures are computed from
+SIGNATURE_FIELDS = ("client_id", "topic", "body")
+
+# Attributes the client content profile is derived from
+PROFILE_FIELDS = ("id", "client_id", "title", "content_type", "topic", "keywords", "created_at")
+
+def _changed(obj, fields) -> bool:
+    """Whether any of the given attributes changed in this flush (text fields by their inline or blob column)"""
+    state = inspect(obj)
+    return any(
+        state.attrs[attr].history.has_changes()
+        for field in fields
+        for attr in content_blobs.TEXT_FIELDS.get(field, (field,))
+    )
+
+def _previous(obj, attr):
+    """Value of a column attribute before this flush"""
+    history = inspect(obj).attrs[attr].history
+    old = history.deleted or history.unchanged
+    return old[0] if old else None
+
+@event.listens_for(Session, "before_flush")
+def move_large_text(session: Session, flush_context, instances) -> None:
+    """Store large body and visual suggestion text out of row before the content is written"""
+    pending = [
+        (obj, field, getattr(obj, inline))
+        for obj in list(session.new) + list(session.dirty) if isinstance(obj, Content)
+        for field, (inline, _) in content_blobs.TEXT_FIELDS.items()
+        if content_blobs.is_large(getattr(obj, inline))
+    ]
+    if not pending:
+        return
+
+    digests = content_blobs.store_blobs(session.connection(), [text for _, _, text in pending])
+    for obj, field, text in pending:
+        obj.move_out_of_row(field, digests[text], text)
+
+@event.listens_for(Session, "after_flush")
+def maintain_search_index(session: Session, flush_context) -> None:
+    """Reindex content whose searchable text was inserted or changed"""
+    to_index = [
+        obj for obj in session.new
+        if isinstance(obj, Content)
+    ] + [
+        obj for obj in session.dirty
+        if isinstance(obj, Content) and _changed(obj, search_index.SEARCH_FIELDS)
+    ]
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Content)]
+
+    if not to_index and not removed:
+        return
+
+    connection = session.connection()
+    search_index.index_content_rows(connection, [
+        {field: getattr(obj, field) for field in ("id",) + search_index.SEARCH_FIELDS}
+        for obj in to_index
+    ])
+    search_index.remove_content_rows(connection, removed)
+
+def _profile_values(obj, previous: bool = False):
+    """Loaded profile fields of a content object, optionally as they were before this flush"""
+    state = inspect(obj)
+    values = {}
+    for field in PROFILE_FIELDS:
+        if previous:
+            history = state.attrs[field].history
+            old = history.deleted or history.unchanged
+            values[field] = old[0] if old else state.dict.get(field)
+        else:
+            # Read loaded state only; server defaults (created_at) are expired after the flush
+            values[field] = state.dict.get(field)
+    return values
+
+@event.listens_for(Session, "after_flush")
+def maintain_client_profiles(session: Session, flush_context) -> None:
+    """Apply content inserts, edits and deletes to the per-client content profiles"""
+    deleted_clients = {obj.id for obj in session.deleted if isinstance(obj, Client)}
+    added = [_profile_values(obj) for obj in session.new if isinstance(obj, Content)]
+    removed = [_profile_values(obj) for obj in session.deleted if isinstance(obj, Content)]
+    for obj in session.dirty:
+        if isinstance(obj, Content) and _changed(obj, PROFILE_FIELDS[1:]):
+            removed.append(_profile_values(obj, previous=True))
+            added.append(_profile_values(obj))
+
+    added = [values for values in added if values["client_id"] not in deleted_clients]
+    removed = [values for values in removed if values["client_id"] not in deleted_clients]
+    if not added and not removed and not deleted_clients:
+        return
+
+    connection = session.connection()
+    client_profiles.apply_changes(connection, added, removed)
+    client_profiles.delete_profiles(connection, deleted_clients)
+
+@event.listens_for(Session, "after_flush")
+def maintain_content_signatures(session: Session, flush_context) -> None:
+    """Re-sign content whose topic or body was inserted or changed"""
+    to_sign = [
+        obj for obj in session.new
+        if isinstance(obj, Content)
+    ] + [
+        obj for obj in session.dirty
+        if isinstance(obj, Content) and _changed(obj, SIGNATURE_FIELDS)
+    ]
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Content)]
+
+    if not to_sign and not removed:
+        return
+
+    connection = session.connection()
+    content_signatures.store_signatures(connection, [
+        {field: getattr(obj, field) for field in ("id",) + SIGNATURE_FIELDS}
+        for obj in to_sign
+    ])
+    content_signatures.remove_signatures(connection, removed)
+
+def _version_values(obj, connection=None):
+    """Versioned fields of a content object, or as they were before this flush when given a connection"""
+    values = {"id": obj.id}
+    for field in content_versions.VERSION_FIELDS:
+        if connection is None:
+            values[field] = getattr(obj, field)
+        elif field in content_blobs.TEXT_FIELDS:
+            inline, blob = content_blobs.TEXT_FIELDS[field]
+            text, digest = _previous(obj, inline), _previous(obj, blob)
+            if text is None and digest is not None:
+                text = content_blobs.load_texts(connection, [digest]).get(digest)
+            values[field] = text
+        else:
+            values[field] = _previous(obj, field)
+    return values
+
+@event.listens_for(Session, "after_flush")
+def maintain_content_versions(session: Session, flush_context) -> None:
+    """Add a version for content whose versioned fields were inserted or changed"""
+    finished = content_versions.FINISHED_STAGES
+    rows = [
+        _version_values(obj) for obj in session.new
+        if isinstance(obj, Content) and obj.generation_stage in finished
+    ]
+    for obj in session.dirty:
+        if isinstance(obj, Content) and obj.generation_stage in finished and _changed(obj, content_versions.VERSION_FIELDS):
+            values = _version_values(obj)
+            # Content from before versioning keeps its prior state, unless that was a generation placeholder
+            if _previous(obj, "generation_stage") in finished:
+                values["previous"] = _version_values(obj, session.connection())
+            rows.append(values)
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Content)]
+
+    if not rows and not removed:
+        return
+
+    connection = session.connection()
+    content_versions.record_versions(connection, rows, session.info.get("user_id"))
+    content_versions.remove_versions(connection, removed)
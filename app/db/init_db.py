@@ -2,11 +2,21 @@ from app.db.database import Base, engine
 from app.db.models import Client, Content, ContentType, ContentStatus
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
+from app.db.search_index import ensure_search_index
+from app.core.config import settings
 
 def init_db():
     # Create all tables
     Base.metadata.create_all(bind=engine)
+
+    # Create the full-text search index (not part of the ORM metadata)
+    with engine.begin() as connection:
+        ensure_search_index(connection)
     
+    # Sample data needs a real owner (clients.user_id is required); skip it unless one is configured
+    if not settings.SEED_USER_ID:
+        return
+
     # Create a session
     db = SessionLocal()
     
@@ -18,7 +28,8 @@ def init_db():
             "industry": "Technology",
             "brand_voice": "Professional and friendly",
             "target_audience": "Tech professionals aged 25-45",
-            "content_preferences": {"preferred_formats": ["blog", "social"]}
+            "content_preferences": {"preferred_formats": ["blog", "social"]},
+            "user_id": settings.SEED_USER_ID
         }
         
         # Only add website_url if it exists in the model
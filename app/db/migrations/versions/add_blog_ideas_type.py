@@ -0,0 +1,33 @@
+"""add a content type for batch blog ideas
+
+Revision ID: add_blog_ideas_type
+Revises: add_content_blobs
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_blog_ideas_type'
+down_revision = 'add_content_blobs'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # A new enum value can't be used in the transaction that adds it
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE contenttype ADD VALUE IF NOT EXISTS 'BLOG_IDEAS'")
+
+    # Batch idea lists were stored as content plans; only retype rows a batch run logged
+    # (batch drafts are BLOG, so its CONTENT_PLAN rows are idea lists)
+    op.execute(
+        "UPDATE contents SET content_type = 'BLOG_IDEAS' "
+        "WHERE content_type = 'CONTENT_PLAN' AND id IN ("
+        "SELECT content_id FROM interactions "
+        "WHERE interaction_type = 'batch_generated' AND content_id IS NOT NULL)"
+    )
+
+def downgrade():
+    op.execute("UPDATE contents SET content_type = 'CONTENT_PLAN' WHERE content_type = 'BLOG_IDEAS'")
+    # Note: We can't easily remove enum values in PostgreSQL
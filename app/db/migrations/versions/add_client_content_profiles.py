@@ -0,0 +1,37 @@
+"""add per-client content profiles
+
+Revision ID: add_client_content_profiles
+Revises: add_content_search_index
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db.client_profiles import rebuild_profiles
+
+# revision identifiers, used by Alembic.
+revision = 'add_client_content_profiles'
+down_revision = 'add_content_search_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'client_content_profiles',
+        sa.Column('client_id', sa.Integer(), sa.ForeignKey('clients.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('content_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('topic_counts', sa.JSON(), nullable=True),
+        sa.Column('keyword_counts', sa.JSON(), nullable=True),
+        sa.Column('type_counts', sa.JSON(), nullable=True),
+        sa.Column('recent_items', sa.JSON(), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    # Build profiles for the existing clients
+    connection = op.get_bind()
+    client_ids = connection.execute(sa.text("SELECT id FROM clients")).scalars().all()
+    rebuild_profiles(connection, client_ids)
+
+def downgrade():
+    op.drop_table('client_content_profiles')
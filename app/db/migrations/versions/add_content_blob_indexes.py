@@ -0,0 +1,22 @@
+"""index the blob digests of contents, for the sweep of unreferenced blobs
+
+Revision ID: add_content_blob_indexes
+Revises: add_blog_ideas_type
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_blob_indexes'
+down_revision = 'add_blog_ideas_type'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_contents_body_blob', 'contents', ['body_blob'])
+    op.create_index('ix_contents_visual_suggestions_blob', 'contents', ['visual_suggestions_blob'])
+
+def downgrade():
+    op.drop_index('ix_contents_visual_suggestions_blob', table_name='contents')
+    op.drop_index('ix_contents_body_blob', table_name='contents')
@@ -0,0 +1,47 @@
+"""store large content text compressed out of row
+
+Revision ID: add_content_blobs
+Revises: add_content_versions
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db.content_blobs import move_large_text, move_text_inline
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_blobs'
+down_revision = 'add_content_versions'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'content_blobs',
+        sa.Column('digest', sa.String(64), primary_key=True),
+        sa.Column('codec', sa.String(10), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.alter_column('body', existing_type=sa.Text(), nullable=True)
+        batch_op.add_column(sa.Column('body_blob', sa.String(64), nullable=True))
+        batch_op.add_column(sa.Column('visual_suggestions_blob', sa.String(64), nullable=True))
+        batch_op.create_foreign_key('fk_contents_body_blob', 'content_blobs', ['body_blob'], ['digest'])
+        batch_op.create_foreign_key(
+            'fk_contents_visual_suggestions_blob', 'content_blobs', ['visual_suggestions_blob'], ['digest']
+        )
+
+    # Move the existing large text out of row in batches
+    move_large_text(op.get_bind())
+
+def downgrade():
+    move_text_inline(op.get_bind())
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.drop_constraint('fk_contents_visual_suggestions_blob', type_='foreignkey')
+        batch_op.drop_constraint('fk_contents_body_blob', type_='foreignkey')
+        batch_op.drop_column('visual_suggestions_blob')
+        batch_op.drop_column('body_blob')
+        batch_op.alter_column('body', existing_type=sa.Text(), nullable=False)
+    op.drop_table('content_blobs')
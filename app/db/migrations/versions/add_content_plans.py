@@ -0,0 +1,35 @@
+"""add content plan columns to contents
+
+Revision ID: add_content_plans
+Revises: add_interactions
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_plans'
+down_revision = 'add_interactions'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.add_column(sa.Column('parent_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('scheduled_for', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('plan_total', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('plan_completed', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('plan_failed', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_contents_parent_id', 'contents', ['parent_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index('ix_contents_parent_id', ['parent_id'])
+
+def downgrade():
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.drop_index('ix_contents_parent_id')
+        batch_op.drop_constraint('fk_contents_parent_id', type_='foreignkey')
+        batch_op.drop_column('plan_failed')
+        batch_op.drop_column('plan_completed')
+        batch_op.drop_column('plan_total')
+        batch_op.drop_column('scheduled_for')
+        batch_op.drop_column('parent_id')
@@ -0,0 +1,23 @@
+"""add a per-row revision counter to contents, for ETags
+
+Revision ID: add_content_revision
+Revises: add_content_blob_indexes
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_revision'
+down_revision = 'add_content_blob_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), nullable=False, server_default='1'))
+
+def downgrade():
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.drop_column('revision')
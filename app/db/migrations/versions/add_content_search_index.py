@@ -0,0 +1,30 @@
+"""add full-text search index to contents
+
+Revision ID: add_content_search_index
+Revises: add_website_social
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+from app.db.search_index import install_search_index, backfill_search_index
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_search_index'
+down_revision = 'add_website_social'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # tsvector column + GIN index on PostgreSQL, FTS5 table on SQLite
+    connection = op.get_bind()
+    install_search_index(connection)
+
+    # Index the existing rows
+    backfill_search_index(connection)
+
+def downgrade():
+    if op.get_context().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS contents_fts")
+    else:
+        op.execute("DROP INDEX IF EXISTS ix_contents_search_vector")
+        op.drop_column('contents', 'search_vector')
@@ -0,0 +1,36 @@
+"""add MinHash signatures for near-duplicate detection
+
+Revision ID: add_content_signatures
+Revises: add_content_suggestion_cache
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.db.content_signatures import sign_unsigned_rows
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_signatures'
+down_revision = 'add_content_suggestion_cache'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'content_signatures',
+        sa.Column('content_id', sa.Integer(), sa.ForeignKey('contents.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('client_id', sa.Integer(), nullable=False),
+        sa.Column('topic_signature', sa.LargeBinary(), nullable=True),
+        sa.Column('body_signature', sa.LargeBinary(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_content_signatures_client_id', 'content_signatures', ['client_id'])
+    op.create_index('ix_content_signatures_updated_at', 'content_signatures', ['updated_at'])
+
+    # Sign the existing content in batches
+    sign_unsigned_rows(op.get_bind())
+
+def downgrade():
+    op.drop_index('ix_content_signatures_updated_at', table_name='content_signatures')
+    op.drop_index('ix_content_signatures_client_id', table_name='content_signatures')
+    op.drop_table('content_signatures')
@@ -0,0 +1,28 @@
+"""add content suggestion cache
+
+Revision ID: add_content_suggestion_cache
+Revises: add_client_content_profiles
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_suggestion_cache'
+down_revision = 'add_client_content_profiles'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'content_suggestion_cache',
+        sa.Column('client_id', sa.Integer(), sa.ForeignKey('clients.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('suggestion_count', sa.Integer(), primary_key=True),
+        sa.Column('fingerprint', sa.String(64), nullable=False),
+        sa.Column('suggestions', sa.JSON(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(), nullable=False),
+    )
+
+def downgrade():
+    op.drop_table('content_suggestion_cache')
@@ -0,0 +1,32 @@
+"""add content version history
+
+Revision ID: add_content_versions
+Revises: add_llm_usage
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_versions'
+down_revision = 'add_llm_usage'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'content_versions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('content_id', sa.Integer(), sa.ForeignKey('contents.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('is_snapshot', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('user_id', sa.String(36), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_content_versions_content_version', 'content_versions', ['content_id', 'version'], unique=True)
+
+def downgrade():
+    op.drop_index('ix_content_versions_content_version', table_name='content_versions')
+    op.drop_table('content_versions')
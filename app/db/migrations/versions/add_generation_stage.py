@@ -0,0 +1,23 @@
+"""add generation stage to contents
+
+Revision ID: add_generation_stage
+Revises: add_content_plans
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_generation_stage'
+down_revision = 'add_content_plans'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.add_column(sa.Column('generation_stage', sa.String(length=20), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.drop_column('generation_stage')
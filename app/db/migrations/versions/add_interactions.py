@@ -0,0 +1,32 @@
+"""add append-only interaction log
+
+Revision ID: add_interactions
+Revises: add_content_signatures
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_interactions'
+down_revision = 'add_content_signatures'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'interactions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('client_id', sa.Integer(), sa.ForeignKey('clients.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('content_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.String(36), nullable=True),
+        sa.Column('interaction_type', sa.String(50), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_interactions_client_created', 'interactions', ['client_id', 'created_at'])
+
+def downgrade():
+    op.drop_index('ix_interactions_client_created', table_name='interactions')
+    op.drop_table('interactions')
@@ -0,0 +1,23 @@
+"""add per-generation model usage to contents
+
+Revision ID: add_llm_usage
+Revises: add_generation_mode
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_llm_usage'
+down_revision = 'add_generation_mode'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.add_column(sa.Column('llm_usage', sa.JSON(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table('contents') as batch_op:
+        batch_op.drop_column('llm_usage')
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, JSON, Boolean, LargeBinary, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.sql import func, literal_column
 import enum
 from app.db.database import Base
 
@@ -12,6 +13,7 @@ class ContentType(enum.Enum):
     EMAIL = "email"
     WEBSITE = "website"
     CONTENT_PLAN = "content_plan"
+    BLOG_IDEAS = "blog_ideas"  # A list of ideas from a batch run (not a plan with items)
     STRATEGY = "strategy"
     INSTAGRAM = "instagram"
     TWITTER = "twitter"
@@ -54,22 +56,182 @@ class Content(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
-    body = Column(Text, nullable=False)
+    body_text = Column("body", Text, nullable=True)  # Inline body; NULL when stored in content_blobs (see `body`)
+    body_blob = Column(String(64), ForeignKey("content_blobs.digest"), nullable=True, index=True)
     content_type = Column(Enum(ContentType), nullable=False)
     status = Column(Enum(ContentStatus), default=ContentStatus.DRAFT)
     topic = Column(String(255), nullable=True)
     keywords = Column(String(255), nullable=True)
     word_count = Column(Integer, default=500)
-    visual_suggestions = Column(Text, nullable=True)
+    visual_suggestions_text = Column("visual_suggestions", Text, nullable=True)
+    visual_suggestions_blob = Column(String(64), ForeignKey("content_blobs.digest"), nullable=True, index=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    # Bumped by every UPDATE (ORM or Core); ETags use it, updated_at can repeat within a second
+    revision = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("revision") + 1)
     
     # Foreign keys
     client_id = Column(Integer, ForeignKey("clients.id"))
+    parent_id = Column(Integer, ForeignKey("contents.id", ondelete="CASCADE"), nullable=True, index=True)  # Content plan this item belongs to
+
+    # Content plan fields (set on the plan, or on its items)
+    scheduled_for = Column(DateTime, nullable=True)  # Calendar slot of a plan item
+    plan_total = Column(Integer, nullable=True)  # Items in the plan
+    plan_completed = Column(Integer, nullable=True)  # Items generated so far
+    plan_failed = Column(Integer, nullable=True)  # Items whose generation failed
+
+    # Background generation progress: queued, research, strategy, writing, design, done or failed
+    generation_stage = Column(String(20), nullable=True)
+    generation_mode = Column(String(20), nullable=True)  # express, standard or deep
+    llm_usage = Column(JSON, nullable=True)  # Model calls, tokens and time per stage of the generation
     
     # Relationships
     client = relationship("Client", back_populates="contents")
+    children = relationship("Content", cascade="all, delete-orphan")  # Items of a content plan; deleted with it
+    # Out-of-row text, fetched compressed with the row and decompressed on first read
+    body_blob_row = relationship("ContentBlob", foreign_keys=[body_blob], lazy="selectin", viewonly=True)
+    visual_suggestions_blob_row = relationship(
+        "ContentBlob", foreign_keys=[visual_suggestions_blob], lazy="selectin", viewonly=True
+    )
+
+    def _text(self, field):
+        inline, digest = getattr(self, f"{field}_text"), getattr(self, f"{field}_blob")
+        if inline is not None or digest is None:
+            return inline
+        texts = self.__dict__.setdefault("_blob_texts", {})
+        if digest not in texts:
+            blob = getattr(self, f"{field}_blob_row")
+            texts[digest] = content_blobs.decompress(blob.codec, blob.data)
+        return texts[digest]
+
+    def _set_text(self, field, value):
+        setattr(self, f"{field}_text", value)
+        setattr(self, f"{field}_blob", None)  # Large text is moved out of row again on flush
+
+    def move_out_of_row(self, field, digest, text):
+        """Point `field` at its stored blob, keeping the text readable without loading it"""
+        self.__dict__.setdefault("_blob_texts", {})[digest] = text
+        setattr(self, f"{field}_text", None)
+        setattr(self, f"{field}_blob", digest)
+
+    # Full text wherever it is stored; in SQL only the inline column
+    @hybrid_property
+    def body(self):
+        return self._text("body")
+
+    @body.setter
+    def body(self, value):
+        self._set_text("body", value)
+
+    @body.expression
+    def body(cls):
+        return cls.body_text
+
+    @hybrid_property
+    def visual_suggestions(self):
+        return self._text("visual_suggestions")
+
+    @visual_suggestions.setter
+    def visual_suggestions(self, value):
+        self._set_text("visual_suggestions", value)
+
+    @visual_suggestions.expression
+    def visual_suggestions(cls):
+        return cls.visual_suggestions_text
+
+
+# Compressed large content text, shared by every row with the same text (see app.db.content_blobs)
+class ContentBlob(Base):
+    __tablename__ = "content_blobs"
+
+    digest = Column(String(64), primary_key=True)  # SHA-256 of the UTF-8 text
+    codec = Column(String(10), nullable=False)  # zstd or zlib
+    size = Column(Integer, nullable=False)  # Uncompressed bytes
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False)  # Renewed whenever the text is stored again (see the blob sweep)
+
+
+# Per-client content profile, maintained incrementally on every content write
+class ClientContentProfile(Base):
+    __tablename__ = "client_content_profiles"
+
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
+    content_count = Column(Integer, nullable=False, default=0)
+    topic_counts = Column(JSON, nullable=True)  # {topic: count} over the whole history
+    keyword_counts = Column(JSON, nullable=True)  # {keyword: count} over the whole history
+    type_counts = Column(JSON, nullable=True)  # {content type: count}
+    recent_items = Column(JSON, nullable=True)  # Summaries of the latest items, newest first
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every change
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+# Cached AI content suggestions per client and suggestion count
+class ContentSuggestionCache(Base):
+    __tablename__ = "content_suggestion_cache"
+
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
+    suggestion_count = Column(Integer, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # Client + profile version the suggestions were built from
+    suggestions = Column(JSON, nullable=False)
+    generated_at = Column(DateTime, nullable=False)
+
+
+# MinHash signatures of each content's topic and body, for near-duplicate detection
+class ContentSignature(Base):
+    __tablename__ = "content_signatures"
+
+    content_id = Column(Integer, ForeignKey("contents.id", ondelete="CASCADE"), primary_key=True)
+    client_id = Column(Integer, nullable=False, index=True)
+    topic_signature = Column(LargeBinary, nullable=True)  # 128 x uint32, little endian
+    body_signature = Column(LargeBinary, nullable=True)  # None for bodies too short to compare
+    updated_at = Column(DateTime, nullable=False, index=True)  # Lets in-memory indexes load only what changed
+
+
+# Append-only log of what happens to a client's content (requests, edits, approvals, rejections)
+class Interaction(Base):
+    __tablename__ = "interactions"
+    __table_args__ = (
+        Index("ix_interactions_client_created", "client_id", "created_at"),  # Thread reads are a bounded range scan
+    )
+
+    id = Column(Integer, primary_key=True)
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False)
+    content_id = Column(Integer, nullable=True)  # Not a foreign key: the log outlives deleted content
+    user_id = Column(String(36), nullable=True)  # Supabase user UUID
+    interaction_type = Column(String(50), nullable=False)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False)  # Time of the event, not of the batched insert
+
+
+# Idempotency-Key of a POST /content/generate, so client retries return the original job
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(String(36), primary_key=True)  # Keys are scoped per user
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 of the request parameters
+    content_id = Column(Integer, ForeignKey("contents.id", ondelete="CASCADE"), nullable=True)
+    response = Column(JSON, nullable=True)  # Body returned to the first request
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # Purged after this
+
 
+# Revision history of a content row: compressed deltas with a full snapshot every few versions
+class ContentVersion(Base):
+    __tablename__ = "content_versions"
+    __table_args__ = (
+        Index("ix_content_versions_content_version", "content_id", "version", unique=True),
+    )
 
+    id = Column(Integer, primary_key=True)
+    content_id = Column(Integer, ForeignKey("contents.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)  # 1, 2, ... per content row
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    data = Column(LargeBinary, nullable=False)  # zlib-compressed JSON, see app.db.content_versions
+    user_id = Column(String(36), nullable=True)  # Who made the change, when known
+    created_at = Column(DateTime, nullable=False)
 
 
+# Register ORM write hooks (search index, client profiles) once the models exist
+from app.db import events  # noqa: E402,F401
+from app.db import content_blobs  # noqa: E402  (codecs for Content's out-of-row text)
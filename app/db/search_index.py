@@ -0,0 +1,133 @@
+"""
+Full-text search index for content.
+
+PostgreSQL: a weighted ``tsvector`` column on ``contents`` with a GIN index.
+SQLite: an FTS5 virtual table keyed by the content id.
+
+The index is maintained by the application on write (see ``app.db.events``)
+rather than by triggers, so it only needs the text being written.
+"""
+
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+SEARCH_FIELDS = ("title", "body", "topic", "keywords")
+
+# Per-process cache of whether the index objects exist for a dialect
+_index_available: Dict[str, bool] = {}
+
+_PG_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({title}, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({topic}, '') || ' ' || coalesce({keywords}, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce({body}, '')), 'C')
+"""
+
+def install_search_index(connection: Connection) -> None:
+    """Create the search column/index (PostgreSQL) or FTS5 table (SQLite)"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text("ALTER TABLE contents ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_contents_search_vector ON contents USING GIN (search_vector)"
+        ))
+    elif dialect == "sqlite":
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS contents_fts "
+            "USING fts5(title, body, topic, keywords, tokenize='porter unicode61')"
+        ))
+    _index_available.pop(dialect, None)
+
+def backfill_search_index(connection: Connection) -> None:
+    """Index every existing content row (used by the migration and init_db)"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text(
+            "UPDATE contents SET search_vector = "
+            + _PG_VECTOR_SQL.format(title="title", topic="topic", keywords="keywords", body="body")
+        ))
+    elif dialect == "sqlite":
+        connection.execute(text("DELETE FROM contents_fts"))
+        connection.execute(text(
+            "INSERT INTO contents_fts(rowid, title, body, topic, keywords) "
+            "SELECT id, title, body, topic, keywords FROM contents"
+        ))
+
+def ensure_search_index(connection: Connection) -> None:
+    """Install and backfill the index if this database doesn't have it yet"""
+    if not search_index_available(connection):
+        install_search_index(connection)
+        backfill_search_index(connection)
+
+def search_index_available(connection: Connection) -> bool:
+    """Check (once per process) that the index objects exist for this database"""
+    dialect = connection.dialect.name
+    if dialect not in _index_available:
+        if dialect == "postgresql":
+            found = connection.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'contents' AND column_name = 'search_vector'"
+            )).first()
+        elif dialect == "sqlite":
+            found = connection.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contents_fts'"
+            )).first()
+        else:
+            found = None
+        _index_available[dialect] = found is not None
+    return _index_available[dialect]
+
+def index_content_rows(connection: Connection, rows: Iterable[Dict[str, Any]]) -> None:
+    """(Re)index content rows; each row needs ``id`` plus the search fields"""
+    params: List[Dict[str, Any]] = [
+        {"id": row["id"], **{field: row.get(field) for field in SEARCH_FIELDS}}
+        for row in rows
+    ]
+    if not params or not search_index_available(connection):
+        return
+
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(
+            text(
+                "UPDATE contents SET search_vector = "
+                + _PG_VECTOR_SQL.format(
+                    title="CAST(:title AS text)",
+                    topic="CAST(:topic AS text)",
+                    keywords="CAST(:keywords AS text)",
+                    body="CAST(:body AS text)",
+                )
+                + " WHERE id = :id"
+            ),
+            params,
+        )
+    elif dialect == "sqlite":
+        connection.execute(text("DELETE FROM contents_fts WHERE rowid = :id"), [{"id": p["id"]} for p in params])
+        connection.execute(
+            text(
+                "INSERT INTO contents_fts(rowid, title, body, topic, keywords) "
+                "VALUES (:id, :title, :body, :topic, :keywords)"
+            ),
+            params,
+        )
+
+def index_unindexed_rows(connection: Connection, client_ids: Iterable[int]) -> None:
+    """Index rows written without the ORM (e.g. COPY) for the given clients (PostgreSQL)"""
+    ids = list(client_ids)
+    if not ids or connection.dialect.name != "postgresql" or not search_index_available(connection):
+        return
+    connection.execute(
+        text(
+            "UPDATE contents SET search_vector = "
+            + _PG_VECTOR_SQL.format(title="title", topic="topic", keywords="keywords", body="body")
+            + " WHERE search_vector IS NULL AND client_id = ANY(:client_ids)"
+        ),
+        {"client_ids": ids},
+    )
+
+def remove_content_rows(connection: Connection, content_ids: Iterable[int]) -> None:
+    """Drop deleted content from the index (PostgreSQL drops it with the row)"""
+    ids = [{"id": content_id} for content_id in content_ids]
+    if not ids or connection.dialect.name != "sqlite" or not search_index_available(connection):
+        return
+    connection.execute(text("DELETE FROM contents_fts WHERE rowid = :id"), ids)
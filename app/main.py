@@ -1,7 +1,18 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from app.api.api import api_router
 from app.core.config import settings
-from app.db.init_db import init_db
+from app.core.supabase_auth import jwks_cache
+from app.core.lifecycle import lifecycle, InFlightMiddleware
+from app.core.metrics import metrics
+from app.core import circuit_breaker, cassette
+from app.core.compression import CompressionMiddleware
+from app.services.suggestion_service import suggestion_cache
+from app.services.interaction_log import interaction_log
+from app.services.job_events import job_events
+from app.services.idempotency import idempotency_store
+from app.services.blob_sweeper import blob_sweeper
+from app.services.postprocess import postprocessor
 from fastapi.middleware.cors import CORSMiddleware
 
 # Using Supabase PostgreSQL - no local data directory needed
@@ -20,21 +31,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (content bodies and listings)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+
+# Count in-flight requests so shutdown can drain them
+app.add_middleware(InFlightMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# Initialize database on startup
+# Schema creation runs as a deploy step; only do it in the worker when explicitly enabled
 @app.on_event("startup")
 async def startup_event():
-    try:
-        init_db()
-    except Exception as e:
-        # Don't fail the startup, just log the error
-        pass
+    if settings.RUN_DB_INIT_ON_STARTUP:
+        try:
+            from app.db.init_db import init_db
+            init_db()
+        except Exception as e:
+            # Don't fail the startup, just log the error
+            pass
+
+    # Load asymmetric signing keys before the first request needs them
+    jwks_cache.start()
+
+    # Warm up DB pool, model provider and text processing; /readyz fails until this is done
+    lifecycle.start_warm_up()
+
+    # Write buffered interaction events in batches
+    interaction_log.start()
+
+    # Keep content suggestions for active clients pre-generated
+    suggestion_cache.start()
+
+    # Receive generation stage changes from every worker (WebSocket and long-poll)
+    job_events.start()
+
+    # Purge expired Idempotency-Key records
+    idempotency_store.start()
+
+    # Delete content blobs nothing references any more
+    blob_sweeper.start()
+
+# Stop reporting ready and let in-flight requests and background jobs finish
+@app.on_event("shutdown")
+async def shutdown_event():
+    suggestion_cache.stop()
+    idempotency_store.stop()
+    blob_sweeper.stop()
+    # Release long-polls and sockets first so they don't hold up the drain
+    job_events.stop()
+    await lifecycle.drain(settings.SHUTDOWN_DRAIN_SECONDS)
+    # Drained jobs may have logged events; write them before the worker exits
+    await interaction_log.stop()
+    cassette.save()  # Recorded model calls, when LLM_CASSETTE_MODE=record
+    postprocessor.shutdown()
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Smart AI Content Generator API"}
 
+@app.get("/healthz")
+def liveness():
+    """Liveness: the process is up and serving the event loop"""
+    return {"status": "ok"}
 
+@app.get("/readyz")
+async def readiness():
+    """Readiness: warm-up finished, not draining, and dependencies reachable"""
+    ready, report = await lifecycle.readiness()
+    return JSONResponse(report, status_code=200 if ready else 503)
 
+@app.get("/metrics")
+def read_metrics():
+    """Per-worker counters and timings (e.g. suggestion parse time and fallback rate) and model circuit breakers"""
+    return {**metrics.snapshot(), "breakers": circuit_breaker.snapshot()}
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from enum import Enum
+
+class BatchMode(str, Enum):
+    IDEAS = "ideas"
+    DRAFTS = "drafts"
+
+class BatchItem(BaseModel):
+    client_id: int
+    topic: Optional[str] = None  # Drafts only; ideas ignore it
+
+class BatchGenerationRequest(BaseModel):
+    mode: BatchMode = BatchMode.IDEAS
+    items: List[BatchItem]
+    num_ideas: int = Field(5, ge=1, le=20)
+    concurrency: Optional[int] = Field(None, ge=1, le=32)
+    timeout_seconds: Optional[float] = Field(None, gt=0, le=600)
+
+class BatchItemResult(BaseModel):
+    index: int
+    client_id: int
+    topic: Optional[str] = None
+    status: str  # ok, failed or timeout
+    content_id: Optional[int] = None
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+class BatchReport(BaseModel):
+    mode: BatchMode
+    requested: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    results: List[BatchItemResult] = []
+    elapsed_seconds: float = 0.0
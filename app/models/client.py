@@ -14,6 +14,9 @@ class ClientBase(BaseModel):
 class ClientCreate(ClientBase):
     pass
 
+class ClientImportRow(ClientBase):
+    id: Optional[int] = None  # Existing client to update; omitted for new clients
+
 class Client(ClientBase):
     id: int
     created_at: datetime
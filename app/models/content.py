@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -10,12 +10,18 @@ class ContentType(str, Enum):
     EMAIL = "email"
     WEBSITE = "website"
     CONTENT_PLAN = "content_plan"
+    BLOG_IDEAS = "blog_ideas"  # A list of ideas from a batch run (not a plan with items)
     STRATEGY = "strategy"
     INSTAGRAM = "instagram"
     TWITTER = "twitter"
     LINKEDIN = "linkedin"
     FACEBOOK = "facebook"
 
+class GenerationMode(str, Enum):
+    EXPRESS = "express"  # One direct structured call
+    STANDARD = "standard"  # Writer and designer
+    DEEP = "deep"  # Full research, strategy, writing and design crew
+
 class ContentStatus(str, Enum):
     DRAFT = "draft"
     REVIEW = "review"
@@ -34,12 +40,22 @@ class ContentBase(BaseModel):
 class ContentCreate(ContentBase):
     pass
 
+class ContentImportRow(ContentBase):
+    id: Optional[int] = None  # Existing content to update; omitted for new content
+    word_count: Optional[int] = 500
+    visual_suggestions: Optional[str] = None
+
 class Content(ContentBase):
     id: int
     created_at: datetime
     updated_at: datetime
     word_count: Optional[int] = 500
     visual_suggestions: Optional[str] = None
+    parent_id: Optional[int] = None
+    scheduled_for: Optional[datetime] = None
+    generation_stage: Optional[str] = None  # queued, research, strategy, writing, design, done or failed
+    generation_mode: Optional[GenerationMode] = None
+    llm_usage: Optional[Dict[str, Any]] = None
 
     class Config:
         from_attributes = True  # Updated from orm_mode
@@ -55,3 +71,57 @@ class ContentSuggestion(BaseModel):
 
 
 
+
+class ContentPlanItem(BaseModel):
+    id: int
+    title: str
+    topic: Optional[str] = None
+    content_type: ContentType
+    status: Optional[ContentStatus] = None
+    scheduled_for: Optional[datetime] = None
+    generation_stage: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class ContentPlanProgress(BaseModel):
+    plan_id: int
+    title: str
+    status: str  # planning, generating or complete
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    items: List[ContentPlanItem] = []
+
+class ContentSearchResult(BaseModel):
+    id: int
+    title: str
+    content_type: ContentType
+    status: Optional[ContentStatus] = None
+    topic: Optional[str] = None
+    client_id: int
+    created_at: Optional[datetime] = None
+    rank: float
+    snippet: Optional[str] = None
+
+class ContentSearchPage(BaseModel):
+    items: List[ContentSearchResult]
+    next_cursor: Optional[str] = None
+
+class ContentVersionInfo(BaseModel):
+    version: int
+    is_snapshot: bool
+    user_id: Optional[str] = None
+    created_at: datetime
+    stored_bytes: int  # Compressed size of this version's delta or snapshot
+
+class ContentVersionDetail(BaseModel):
+    content_id: int
+    version: int
+    fields: Dict[str, Any]
+
+class ContentVersionDiff(BaseModel):
+    content_id: int
+    from_version: int
+    to_version: int
+    changes: Dict[str, str]  # Unified diff per changed field
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportReport(BaseModel):
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0  # Updates refused because ownership changed during the import
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+    elapsed_seconds: float = 0.0
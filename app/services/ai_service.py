@@ -1,10 +1,11 @@
-import google.generativeai as genai
-from app.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, List
+import asyncio
+import time
+from app.core import llm
 
 class AIService:
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = llm.get_generative_model('gemini-2.0-flash')
     
     async def generate_blog_ideas(self, client_info, num_ideas=5):
         prompt = f"""
@@ -47,5 +48,29 @@ class AIService:
         response = await self.model.generate_content_async(prompt)
         return response.text
 
+    async def run_batch(
+        self,
+        calls: List[Callable[[], Awaitable[str]]],
+        concurrency: int,
+        timeout: float,
+    ) -> List[Dict[str, Any]]:
+        """Run model calls concurrently (at most `concurrency` in flight), each with its own timeout.
 
+        Returns one result per call, in order; a failure or timeout never affects the other calls.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(call) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    output = await asyncio.wait_for(call(), timeout=timeout)
+                    result = {"status": "ok", "output": output}
+                except asyncio.TimeoutError:
+                    result = {"status": "timeout", "error": f"Timed out after {timeout:g}s"}
+                except Exception as e:
+                    result = {"status": "failed", "error": str(e)[:500] or type(e).__name__}
+                result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+                return result
 
+        return await asyncio.gather(*(run_one(call) for call in calls))
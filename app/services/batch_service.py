@@ -0,0 +1,107 @@
+from typing import Any, Dict, List, Optional
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Client, Content, ContentType, ContentStatus
+from app.models.batch import BatchItem, BatchMode
+from app.services.ai_service import AIService
+from app.services.interaction_log import interaction_log
+from app.services.postprocess import postprocessor
+from app.core.text_processing import split_title_body_batch
+from app.core.config import settings
+
+class BatchGenerationService:
+    """Blog ideas or drafts for many clients/topics at once, written back in one flush"""
+
+    def __init__(self, db_session: AsyncSession, user_id: Optional[str] = None):
+        self.db = db_session
+        self.user_id = user_id  # None only for the CLI, which may run across every user's clients
+
+    async def run(
+        self,
+        mode: BatchMode,
+        items: List[BatchItem],
+        num_ideas: int = 5,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        concurrency = concurrency or settings.BATCH_CONCURRENCY
+        timeout = timeout or settings.BATCH_ITEM_TIMEOUT_SECONDS
+
+        # One query for every client in the batch, restricted to the caller's own
+        statement = select(Client).where(Client.id.in_({item.client_id for item in items}))
+        if self.user_id is not None:
+            statement = statement.where(Client.user_id == self.user_id)
+        clients = {client.id: client for client in (await self.db.execute(statement)).scalars().all()}
+
+        results: List[Dict[str, Any]] = [
+            {"index": index, "client_id": item.client_id, "topic": item.topic}
+            for index, item in enumerate(items)
+        ]
+        runnable = []
+        for result, item in zip(results, items):
+            if item.client_id not in clients:
+                result.update(status="failed", error="Client not found or access denied", elapsed_seconds=0.0)
+            else:
+                runnable.append((result, item))
+
+        ai_service = AIService()
+
+        def make_call(item: BatchItem):
+            client = clients[item.client_id]
+            if mode == BatchMode.IDEAS:
+                return lambda: ai_service.generate_blog_ideas(client, num_ideas)
+            return lambda: ai_service.generate_blog_post(client, item.topic)
+
+        outcomes = await ai_service.run_batch([make_call(item) for _, item in runnable], concurrency, timeout)
+
+        succeeded = []
+        for (result, item), outcome in zip(runnable, outcomes):
+            output = outcome.pop("output", None)
+            result.update(outcome)
+            if outcome["status"] == "ok":
+                succeeded.append((result, item, output))
+        if mode == BatchMode.IDEAS:
+            processed = [(f"Blog ideas for {clients[item.client_id].name}", output.strip()) for _, item, output in succeeded]
+        else:
+            # Split all drafts together (batched into the post-processing pool when large)
+            processed = await postprocessor.run_many(
+                [(output, item.topic or "Blog post") for _, item, output in succeeded], split_title_body_batch
+            )
+
+        # Write every successful result in a single flush
+        written = []
+        for (result, item, _), (title, body) in zip(succeeded, processed):
+            content_type = ContentType.BLOG_IDEAS if mode == BatchMode.IDEAS else ContentType.BLOG
+            content = Content(
+                title=title[:255],
+                body=body,
+                content_type=content_type,
+                status=ContentStatus.DRAFT,
+                topic=item.topic,
+                keywords="",
+                client_id=item.client_id,
+            )
+            written.append((result, content))
+
+        if written:
+            self.db.add_all([content for _, content in written])
+            await self.db.commit()
+            for result, content in written:
+                result["content_id"] = content.id
+                interaction_log.record(
+                    content.client_id, "batch_generated",
+                    data={"mode": mode.value, "topic": content.topic},
+                    content_id=content.id, user_id=self.user_id
+                )
+
+        return {
+            "mode": mode,
+            "requested": len(items),
+            "succeeded": sum(1 for r in results if r["status"] == "ok"),
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "timed_out": sum(1 for r in results if r["status"] == "timeout"),
+            "results": results,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
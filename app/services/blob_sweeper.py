@@ -0,0 +1,38 @@
+from typing import Optional
+import asyncio
+from app.db.content_blobs import sweep_unreferenced
+from app.db.database import AsyncSessionLocal
+from app.core.config import settings
+
+class BlobSweeper:
+    """Periodically deletes content blobs no content references any more (old enough not to race with writers)"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> int:
+        async with AsyncSessionLocal() as session:
+            removed = await session.run_sync(
+                lambda sync_db: sweep_unreferenced(sync_db.connection(), settings.BLOB_SWEEP_MIN_AGE_SECONDS)
+            )
+            await session.commit()
+        return removed
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._sweep_loop())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.BLOB_SWEEP_INTERVAL_SECONDS)
+            try:
+                await self.sweep()
+            except Exception:
+                pass  # Unreferenced blobs only cost space; try again next interval
+
+blob_sweeper = BlobSweeper()
@@ -1,9 +1,10 @@
-import google.generativeai as genai
-from app.core.config import settings
+from app.core import llm
+from app.core.text_processing import clean_unicode_content
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.call_budget import BudgetExceeded
 import time
 import random
 from crewai import Agent, Task, Crew, Process
-from langchain_google_genai import ChatGoogleGenerativeAI
 import requests
 from bs4 import BeautifulSoup
 import json
@@ -16,16 +17,34 @@ try:
 except ImportError:
     CREWAI_TOOLS_AVAILABLE = False
 
+# Generation depth: one structured call, writer + designer, or the full research/strategy crew
+EXPRESS = "express"
+STANDARD = "standard"
+DEEP = "deep"
+
+# Response schema for express mode
+EXPRESS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "body": {"type": "string"},
+        "visual_suggestions": {"type": "string"},
+    },
+    "required": ["title", "body", "visual_suggestions"],
+}
+
 class ContentCrewService:
-    def __init__(self):
-        # Initialize the Gemini API
-        if settings.GEMINI_API_KEY:
+    def __init__(self, on_stage=None):
+        # Called with the stage name (research, strategy, writing, design) as the crew moves through its tasks
+        self.on_stage = on_stage
+        self._stage = None
+        self._outputs = {}  # Output of each finished task by stage, kept in case the call budget runs out
+        self._trial_breaker = None  # Chat breaker this crew holds a half-open trial of, given back when it ends
+        # Initialize the Gemini API (or the cassette replaying it)
+        if llm.is_configured():
             try:
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                self.model = genai.GenerativeModel('gemini-2.0-flash')
-                self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=settings.GEMINI_API_KEY)
-                # Test the API key with a simple query
-                response = self.model.generate_content("Hello")
+                self.model = llm.get_generative_model('gemini-2.0-flash')
+                self.llm = llm.get_chat_llm("gemini-2.0-flash")
             except Exception as e:
                 self.model = None
                 self.llm = None
@@ -78,7 +97,7 @@ class ContentCrewService:
             llm=self.llm,
             tools=tools,
             allow_delegation=True,
-            max_iterations=3  # Allow multiple research iterations if needed
+            max_iter=3  # Allow multiple research iterations if needed
         )
 
         # Content Strategist - Plans content approach based on research
@@ -94,7 +113,7 @@ class ContentCrewService:
             llm=self.llm,
             tools=[],
             allow_delegation=False,  # Strategist doesn't need to delegate
-            max_iterations=2  # Allow refinement of strategy
+            max_iter=2  # Allow refinement of strategy
         )
 
         # Content Writer - Creates the actual content
@@ -110,7 +129,7 @@ class ContentCrewService:
             llm=self.llm,
             tools=[],
             allow_delegation=True,  # Can delegate to researcher if needed
-            max_iterations=2  # Allow content refinement
+            max_iter=2  # Allow content refinement
         )
 
         # Visual Designer - Provides visual content suggestions
@@ -124,13 +143,56 @@ class ContentCrewService:
             llm=self.llm,
             tools=[],
             allow_delegation=False,  # Designer doesn't need to delegate
-            max_iterations=1  # Visual suggestions usually only need one iteration
+            max_iter=1  # Visual suggestions usually only need one iteration
         )
 
         return researcher, strategist, writer, designer
 
 
 
+    def _report_stage(self, stage):
+        """Tell the caller which stage the crew has reached (never fails the generation)"""
+        self._stage = stage
+        if self.on_stage:
+            try:
+                self.on_stage(stage)
+            except Exception:
+                pass
+
+    def _provider_degraded(self):
+        """The chat model's breaker rejects the crew: skip the multi-agent crew and its retries.
+
+        When half-open only as many crews as there are trial calls go ahead (their calls are the
+        trials); the others keep degrading until the breaker closes.
+        """
+        breaker = llm.chat_breaker('gemini-2.0-flash')
+        if not breaker.allow():
+            return True
+        self._trial_breaker = breaker
+        return False
+
+    def _release_trial(self):
+        """Give back the half-open trial of a finished crew (no-op when the breaker is closed)"""
+        if self._trial_breaker is not None:
+            self._trial_breaker.release()
+            self._trial_breaker = None
+
+    def _advance_to(self, stage):
+        """Task callback: keep the finished task's output, then move the crew on to `stage` (None for the last task)"""
+        def task_done(output):
+            self._outputs[self._stage] = str(output)
+            if stage:
+                self._report_stage(stage)
+        return task_done
+
+    def _best_output(self):
+        """What the crew produced before its call budget ran out: the content (with visuals if it got that far)"""
+        content = self._outputs.get("writing")
+        if content is None:
+            return self._outputs.get("strategy") or self._outputs.get("research")
+        visuals = self._outputs.get("design")
+        return f"{content}\n\n{visuals}" if visuals else content
+
     def _scrape_website(self, url):
         """Fallback method for website scraping when crewai_tools is not available"""
         try:
@@ -171,15 +233,26 @@ class ContentCrewService:
         retry=retry_if_exception_type((ServiceUnavailable, ResourceExhausted)),
         reraise=True
     )
-    def generate_blog_post(self, client_info, topic, content_type="blog", word_count=500, tone=None, keywords=None):
-        """Generate content using CrewAI agents"""
+    def generate_blog_post(self, client_info, topic, content_type="blog", word_count=500, tone=None, keywords=None, mode=DEEP):
+        """Generate content using CrewAI agents (standard mode skips research and strategy).
+
+        Failures raise (a call budget run out before any output included), so the job is marked failed.
+        """
         try:
             # Check if LLM is initialized
             if not self.llm:
-                return "Error: Gemini API key not configured. Please set GEMINI_API_KEY in your .env file."
+                raise RuntimeError("Gemini API key not configured. Please set GEMINI_API_KEY in your .env file.")
+
+            # Provider brownout: one direct call (or the template) instead of four agents with nested retries
+            if self._provider_degraded():
+                result = self._generate_fallback_content(client_info, topic, content_type, word_count, tone, keywords)
+                return result + "\n\nVISUAL SUGGESTIONS:\nThe AI service is degraded; visual suggestions are not available at this time."
 
             # Create agents with enhanced capabilities
             researcher, strategist, writer, designer = self._create_agents(client_info)
+            deep = mode == DEEP
+            if not deep:
+                writer.allow_delegation = False  # Nobody to delegate research to
 
             # Define research task with conditional website scraping instructions
             website_instruction = ""
@@ -226,7 +299,8 @@ class ContentCrewService:
                 """,
                 agent=researcher,
                 expected_output="Detailed research report focusing on customer engagement, simple language, and natural ingredients",
-                async_execution=False  # Ensure this completes before moving to strategy
+                async_execution=False,  # Ensure this completes before moving to strategy
+                callback=self._advance_to("strategy")
             )
 
             # Add tone and keywords to the strategy task
@@ -263,13 +337,14 @@ class ContentCrewService:
                 agent=strategist,
                 expected_output="Content brief with customer-focused strategy, simple language guidelines, and ingredient recommendations",
                 context=[research_task],
-                async_execution=False
+                async_execution=False,
+                callback=self._advance_to("writing")
             )
 
             # Define writing task with explicit instructions for formatting
             writing_task = Task(
                 description=f"""
-                Create a {word_count}-word {content_type} based on the research and content brief using simple, engaging language.
+                Create a {word_count}-word {content_type} based on {"the research and content brief" if deep else "what you know about the client and the topic"} using simple, engaging language.
 
                 The content should be about: {topic}
 
@@ -313,8 +388,9 @@ class ContentCrewService:
                 """,
                 agent=writer,
                 expected_output="Complete content piece with simple language, ingredient names, and customer-focused benefits",
-                context=[strategy_task],
-                async_execution=False
+                context=[strategy_task] if deep else None,
+                async_execution=False,
+                callback=self._advance_to("design")
             )
 
             # Define design task - make it clear this should be separate from content
@@ -338,28 +414,39 @@ class ContentCrewService:
                 agent=designer,
                 expected_output="Visual content recommendations",
                 context=[writing_task],
-                async_execution=False
+                async_execution=False,
+                callback=self._advance_to(None)
             )
 
             # Create and run the crew with sequential process to ensure proper order
+            if deep:
+                agents = [researcher, strategist, writer, designer]
+                tasks = [research_task, strategy_task, writing_task, design_task]
+            else:
+                agents = [writer, designer]
+                tasks = [writing_task, design_task]
             crew = Crew(
-                agents=[researcher, strategist, writer, designer],
-                tasks=[research_task, strategy_task, writing_task, design_task],
+                agents=agents,
+                tasks=tasks,
                 verbose=2,
                 process=Process.sequential,
                 manager_llm=self.llm  # Use the same LLM for the manager
             )
 
             try:
-                result = crew.kickoff()
+                # Emojis and special Unicode are cleaned in the post-processing stage (app.services.postprocess)
+                self._report_stage("research" if deep else "writing")
+                result = str(crew.kickoff())
 
-                # Clean any emojis or special Unicode characters
-                result = self._clean_unicode_content(str(result))
+            except BudgetExceeded:
+                # Stop gracefully with the best output so far; nothing usable yet is an error
+                result = self._best_output()
+                if result is None:
+                    raise
 
-            except (ServiceUnavailable, ResourceExhausted) as e:
+            except (ServiceUnavailable, ResourceExhausted, CircuitOpenError) as e:
                 result = self._generate_fallback_content(client_info, topic, content_type, word_count, tone, keywords)
                 result += "\n\nVISUAL SUGGESTIONS:\nDue to API limitations, visual suggestions are not available at this time."
-                result = self._clean_unicode_content(result)
 
             # Check if we only got visual suggestions without content
             if result.startswith("VISUAL SUGGESTIONS:"):
@@ -388,13 +475,81 @@ class ContentCrewService:
 
             return result
 
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            return f"Error generating content: {str(e)}"
+        finally:
+            self._release_trial()
+
+    @staticmethod
+    def _platform_guidance(platform):
+        """Writing guidance for a social media platform"""
+        return {
+            "instagram": """Create engaging, visual-first content with 1-2 short paragraphs and 8-15 relevant hashtags.
+            IMPORTANT: Always include hashtags at the end of the post. Use a mix of:
+            - Popular hashtags (#health #wellness #natural)
+            - Niche hashtags (#ayurveda #herbalremedy #naturalhealing)
+            - Branded hashtags (related to the client's brand)
+            - Location hashtags if relevant
+            Format hashtags on separate lines at the end.""",
+            "twitter": "Create concise content under 280 characters with 1-3 relevant hashtags.",
+            "linkedin": "Create professional content with 2-3 paragraphs focusing on industry insights and value.",
+            "facebook": "Create conversational content with 2-3 paragraphs that encourages engagement.",
+            "social": "Create engaging social media content with 1-2 paragraphs and 5-8 relevant hashtags."
+        }.get(platform.lower(), "Create platform-appropriate social media content.")
+
+    def generate_express(self, client_info, topic, content_type="blog", word_count=500, tone=None, keywords=None):
+        """Generate content with one structured model call instead of a crew"""
+        if not self.model:
+            raise RuntimeError("Gemini API key not configured. Please set GEMINI_API_KEY in your .env file.")
+
+        prompt = self._direct_prompt(client_info, topic, content_type, word_count, tone, keywords)
+        if content_type.lower() in ('instagram', 'twitter', 'linkedin', 'facebook', 'social'):
+            prompt += f"""
+        Platform guidance for {content_type}:
+        {self._platform_guidance(content_type)}
+        Ignore the section and subheading requirements above; format the post for {content_type}.
+        """
+        prompt += """
+        Return JSON with: title (the title only), body (the content without the title, formatted as described)
+        and visual_suggestions (2-3 recommended images or graphics and a layout suggestion, plain text).
+        """
+
+        self._report_stage("writing")
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config={"response_mime_type": "application/json", "response_schema": EXPRESS_SCHEMA}
+            )
+        except (ServiceUnavailable, ResourceExhausted, CircuitOpenError):
+            # Provider brownout: the template (the crew's last resort too) instead of an error as content;
+            # other failures raise, so the job is marked failed
+            result = self._template_content(topic)
+            return result + "\n\nVISUAL SUGGESTIONS:\nThe AI service is degraded; visual suggestions are not available at this time."
+
+        try:
+            parts = json.loads(response.text)
+            title, body = parts["title"].strip(), parts["body"].strip()
+            visual_suggestions = parts.get("visual_suggestions", "").strip() or "No specific visual suggestions provided."
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # Not the requested JSON: keep the text as the content
+            return response.text + "\n\nVISUAL SUGGESTIONS:\nNo specific visual suggestions provided."
+        return f"{title}\n\n{body}\n\nVISUAL SUGGESTIONS:\n{visual_suggestions}"
 
     def _generate_fallback_content(self, client_info, topic, content_type="blog", word_count=500, tone=None, keywords=None):
         """Generate fallback content when the crew approach fails"""
+        prompt = self._direct_prompt(client_info, topic, content_type, word_count, tone, keywords)
+
+        try:
+            # Generate content directly using the model with retry logic
+            response = self._generate_with_retry(prompt)
+            content = response.text
+            # Clean any Unicode characters
+            content = self._clean_unicode_content(content)
+            return content
+        except Exception as e:
+            # Return a very basic fallback as last resort
+            return self._template_content(topic)
+
+    def _direct_prompt(self, client_info, topic, content_type="blog", word_count=500, tone=None, keywords=None):
+        """Single-call prompt carrying the crew's language and format guidelines"""
 
         # Prepare keywords string
         keywords_str = ", ".join(keywords) if keywords and isinstance(keywords, list) else keywords or ""
@@ -448,17 +603,11 @@ class ContentCrewService:
 
         Do NOT include any visual suggestions or formatting instructions in the output.
         """
+        return prompt
 
-        try:
-            # Generate content directly using the model with retry logic
-            response = self._generate_with_retry(prompt)
-            content = response.text
-            # Clean any Unicode characters
-            content = self._clean_unicode_content(content)
-            return content
-        except Exception as e:
-            # Return a very basic fallback as last resort
-            return f"""
+    def _template_content(self, topic):
+        """Static content used when the model can't be reached at all"""
+        return f"""
             {topic}
 
             Tired of sneezing and itchy eyes? Natural ingredients like turmeric and ginger can help you feel better without harsh chemicals.
@@ -484,7 +633,8 @@ class ContentCrewService:
     )
     def _generate_with_retry(self, prompt):
         """Generate content with retry logic for handling API overload"""
-        # Add random delay to avoid hitting rate limits
+        # Add random delay to avoid hitting rate limits (the model's circuit breaker stops the retries
+        # with CircuitOpenError, which is not retried, once the provider is failing)
         delay = random.uniform(1, 3)
         time.sleep(delay)
 
@@ -498,28 +648,7 @@ class ContentCrewService:
 
     def _clean_unicode_content(self, content):
         """Remove emojis and problematic Unicode characters that cause encoding issues"""
-        import re
-
-        # Remove emojis and other problematic Unicode characters
-        # This regex removes most emojis and special symbols
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "\U00002702-\U000027B0"  # dingbats
-            "\U000024C2-\U0001F251"  # enclosed characters
-            "]+",
-            flags=re.UNICODE
-        )
-
-        cleaned_content = emoji_pattern.sub('', content)
-
-        # Also remove any other problematic characters
-        cleaned_content = cleaned_content.encode('ascii', 'ignore').decode('ascii')
-
-        return cleaned_content
+        return clean_unicode_content(content)
 
     def _get_content_format_instructions(self, content_type):
         """Get formatting instructions based on content type"""
@@ -596,30 +725,25 @@ class ContentCrewService:
 
         return title, main_content, visual_suggestions
 
-    def generate_social_media_post(self, client_info, topic, platform="instagram", word_count=100, tone=None, keywords=None):
-        """Generate social media content for specific platforms"""
+    def generate_social_media_post(self, client_info, topic, platform="instagram", word_count=100, tone=None, keywords=None, mode=DEEP):
+        """Generate social media content for specific platforms (standard mode skips research); failures raise"""
         try:
             # Check if LLM is initialized
             if not self.llm:
-                return "Error: Gemini API key not configured. Please set GEMINI_API_KEY in your .env file."
+                raise RuntimeError("Gemini API key not configured. Please set GEMINI_API_KEY in your .env file.")
+
+            # Provider brownout: one direct call (or the template) instead of the crew
+            if self._provider_degraded():
+                return self._generate_fallback_content(client_info, topic, platform, word_count, tone, keywords)
 
             # Create agents
             researcher, strategist, writer, designer = self._create_agents(client_info)
+            deep = mode == DEEP
+            if not deep:
+                writer.allow_delegation = False
 
             # Platform-specific guidance
-            platform_guidance = {
-                "instagram": """Create engaging, visual-first content with 1-2 short paragraphs and 8-15 relevant hashtags.
-                IMPORTANT: Always include hashtags at the end of the post. Use a mix of:
-                - Popular hashtags (#health #wellness #natural)
-                - Niche hashtags (#ayurveda #herbalremedy #naturalhealing)
-                - Branded hashtags (related to the client's brand)
-                - Location hashtags if relevant
-                Format hashtags on separate lines at the end.""",
-                "twitter": "Create concise content under 280 characters with 1-3 relevant hashtags.",
-                "linkedin": "Create professional content with 2-3 paragraphs focusing on industry insights and value.",
-                "facebook": "Create conversational content with 2-3 paragraphs that encourages engagement.",
-                "social": "Create engaging social media content with 1-2 paragraphs and 5-8 relevant hashtags."
-            }.get(platform.lower(), "Create platform-appropriate social media content.")
+            platform_guidance = self._platform_guidance(platform)
 
             # Define research task with conditional website scraping
             website_instruction = ""
@@ -658,7 +782,8 @@ class ContentCrewService:
                 """,
                 agent=researcher,
                 expected_output="Research report for social media content",
-                output_file="social_research.txt"
+                output_file="social_research.txt",
+                callback=self._advance_to("writing")
             )
 
             # Define writing task with enhanced Instagram hashtag requirements
@@ -710,8 +835,9 @@ class ContentCrewService:
                 description=writing_description,
                 agent=writer,
                 expected_output=f"Complete {platform} post with hashtags",
-                context=[research_task],
-                output_file="social_content.txt"
+                context=[research_task] if deep else None,
+                output_file="social_content.txt",
+                callback=self._advance_to("design")
             )
 
             # Define design task
@@ -732,18 +858,25 @@ class ContentCrewService:
                 agent=designer,
                 expected_output="Visual recommendations for social media post",
                 context=[writing_task],
-                output_file="social_visuals.txt"
+                output_file="social_visuals.txt",
+                callback=self._advance_to(None)
             )
 
             # Create and run the crew
             crew = Crew(
-                agents=[researcher, writer, designer],
-                tasks=[research_task, writing_task, design_task],
+                agents=[researcher, writer, designer] if deep else [writer, designer],
+                tasks=[research_task, writing_task, design_task] if deep else [writing_task, design_task],
                 verbose=2,
                 process=Process.sequential
             )
 
-            result = crew.kickoff()
+            self._report_stage("research" if deep else "writing")
+            try:
+                result = crew.kickoff()
+            except BudgetExceeded:
+                result = self._best_output()
+                if result is None:
+                    raise
 
             # Process and return the result
             title, main_content, visual_suggestions = self._extract_content_parts(result)
@@ -765,9 +898,7 @@ class ContentCrewService:
 
             return final_content
 
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            return f"Error generating social media content: {str(e)}"
+        finally:
+            self._release_trial()
 
 
@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+import asyncio
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import ContentSignature
+from app.services import minhash
+from app.core.config import settings
+
+# Overlap when loading by updated_at, so rows committed with an earlier timestamp aren't missed
+LOAD_OVERLAP = timedelta(seconds=5)
+
+class _BandIndex:
+    """LSH buckets for one kind of signature (topic or body)"""
+
+    def __init__(self):
+        self.buckets: List[Dict[int, Set[int]]] = [defaultdict(set) for _ in range(minhash.BANDS)]
+        self.signatures: Dict[int, np.ndarray] = {}
+
+    def remove(self, content_id: int) -> None:
+        sig = self.signatures.pop(content_id, None)
+        if sig is not None:
+            for band, key in enumerate(minhash.band_keys(sig)):
+                self.buckets[band][key].discard(content_id)
+
+    def add(self, content_id: int, sig: Optional[np.ndarray]) -> None:
+        self.remove(content_id)
+        if sig is None:
+            return
+        self.signatures[content_id] = sig
+        for band, key in enumerate(minhash.band_keys(sig)):
+            self.buckets[band][key].add(content_id)
+
+    def candidates(self, sig: np.ndarray) -> Set[int]:
+        found: Set[int] = set()
+        for band, key in enumerate(minhash.band_keys(sig)):
+            found |= self.buckets[band].get(key, set())
+        return found
+
+class ClientLSHIndex:
+    """Topic and body LSH indexes for one client, loaded incrementally from content_signatures"""
+
+    def __init__(self):
+        self.topics = _BandIndex()
+        self.bodies = _BandIndex()
+        self.loaded_until: Optional[datetime] = None
+        self.lock = asyncio.Lock()
+
+    def add(self, content_id: int, topic_sig: Optional[np.ndarray], body_sig: Optional[np.ndarray]) -> None:
+        self.topics.add(content_id, topic_sig)
+        self.bodies.add(content_id, body_sig)
+
+    def remove(self, content_id: int) -> None:
+        self.topics.remove(content_id)
+        self.bodies.remove(content_id)
+
+class DuplicateDetector:
+    """Near-duplicate lookups against a client's existing content via per-client LSH indexes"""
+
+    def __init__(self, max_clients: int):
+        self.max_clients = max_clients
+        self._indexes: "OrderedDict[int, ClientLSHIndex]" = OrderedDict()
+
+    def _index_for(self, client_id: int) -> ClientLSHIndex:
+        """LRU of client indexes, so memory stays bounded however many clients there are"""
+        index = self._indexes.get(client_id)
+        if index is None:
+            index = self._indexes[client_id] = ClientLSHIndex()
+            while len(self._indexes) > self.max_clients:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(client_id)
+        return index
+
+    async def _refresh(self, db: AsyncSession, client_id: int, index: ClientLSHIndex) -> None:
+        """Load signatures written since the last refresh (all of them on first use)"""
+        async with index.lock:
+            statement = select(
+                ContentSignature.content_id,
+                ContentSignature.topic_signature,
+                ContentSignature.body_signature,
+                ContentSignature.updated_at,
+            ).where(ContentSignature.client_id == client_id)
+            if index.loaded_until is not None:
+                statement = statement.where(ContentSignature.updated_at >= index.loaded_until - LOAD_OVERLAP)
+
+            latest = index.loaded_until
+            for row in await db.execute(statement):
+                index.add(row.content_id, minhash.from_bytes(row.topic_signature), minhash.from_bytes(row.body_signature))
+                if latest is None or row.updated_at > latest:
+                    latest = row.updated_at
+            index.loaded_until = latest or datetime.min + LOAD_OVERLAP
+
+    async def find(
+        self,
+        db: AsyncSession,
+        client_id: int,
+        topic: Optional[str] = None,
+        body: Optional[str] = None,
+        exclude_id: Optional[int] = None,
+        threshold: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Content of this client whose topic or body is at least `threshold` similar, best match first"""
+        threshold = settings.DUPLICATE_SIMILARITY_THRESHOLD if threshold is None else threshold
+        probes: List[Tuple[str, np.ndarray]] = []
+        topic_sig = minhash.topic_signature(topic)
+        if topic_sig is not None:
+            probes.append(("topic", topic_sig))
+        body_sig = minhash.body_signature(body)
+        if body_sig is not None:
+            probes.append(("body", body_sig))
+        if not probes:
+            return []
+
+        index = self._index_for(client_id)
+        await self._refresh(db, client_id, index)
+
+        matches: Dict[int, Dict[str, Any]] = {}
+        for field, sig in probes:
+            band_index = index.topics if field == "topic" else index.bodies
+            for content_id in band_index.candidates(sig):
+                if content_id == exclude_id:
+                    continue
+                score = minhash.similarity(sig, band_index.signatures[content_id])
+                if score >= threshold and score > matches.get(content_id, {}).get("similarity", 0):
+                    matches[content_id] = {"content_id": content_id, "similarity": round(score, 3), "matched_on": field}
+
+        if matches:
+            # Drop content deleted (or moved) since this worker loaded it
+            result = await db.execute(
+                select(ContentSignature.content_id).where(
+                    ContentSignature.content_id.in_(list(matches)),
+                    ContentSignature.client_id == client_id,
+                )
+            )
+            live = set(result.scalars().all())
+            for content_id in set(matches) - live:
+                index.remove(content_id)
+                del matches[content_id]
+
+        return sorted(matches.values(), key=lambda match: match["similarity"], reverse=True)
+
+duplicate_detector = DuplicateDetector(settings.DUPLICATE_INDEX_MAX_CLIENTS)
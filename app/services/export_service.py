@@ -0,0 +1,119 @@
+from typing import Any, AsyncIterator, Dict, Iterable
+from datetime import datetime
+import csv
+import enum
+import io
+import json
+import zlib
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app.db.models import Content, ContentBlob
+from app.db.database import AsyncSessionLocal
+from app.db.content_blobs import TEXT_FIELDS, decompress
+
+# Rows fetched per round trip from the server-side cursor; the first chunks are smaller
+# (growing by EXPORT_BATCH_GROWTH) so the first rows go out without waiting for a full batch
+EXPORT_BATCH_SIZE = 500
+EXPORT_FIRST_BATCH_SIZE = 10
+EXPORT_BATCH_GROWTH = 5
+
+EXPORT_COLUMNS = (
+    "id",
+    "title",
+    "body",
+    "content_type",
+    "status",
+    "topic",
+    "keywords",
+    "word_count",
+    "visual_suggestions",
+    "created_at",
+    "updated_at",
+)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _plain_value(value: Any) -> Any:
+    """Convert enums and datetimes to JSON/CSV friendly values"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _row_value(row: Any, column: str) -> Any:
+    """Column value of an export row; text stored out of row is decompressed from the joined blob"""
+    if column in TEXT_FIELDS and getattr(row, f"{column}_codec") is not None:
+        return decompress(getattr(row, f"{column}_codec"), getattr(row, f"{column}_data"))
+    return _plain_value(getattr(row, column))
+
+def _encode_ndjson(rows: Iterable[Any]) -> bytes:
+    """One JSON object per line"""
+    lines = [
+        json.dumps({column: _row_value(row, column) for column in EXPORT_COLUMNS}, ensure_ascii=False)
+        for row in rows
+    ]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def _encode_csv(rows: Iterable[Any]) -> bytes:
+    """CSV rows (header is written separately)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_row_value(row, column) for column in EXPORT_COLUMNS])
+    return buffer.getvalue().encode("utf-8")
+
+def _csv_header() -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_COLUMNS)
+    return buffer.getvalue().encode("utf-8")
+
+async def iter_client_export(client_id: int, export_format: str) -> AsyncIterator[bytes]:
+    """Stream a client's content from a server-side cursor, one (growing) batch at a time"""
+    encode = _encode_csv if export_format == "csv" else _encode_ndjson
+
+    # Send something right away so the first byte doesn't wait for the query
+    if export_format == "csv":
+        yield _csv_header()
+
+    # The request's session is closed before a streaming body runs, so use our own
+    async with AsyncSessionLocal() as session:
+        statement = select(*(getattr(Content, column).label(column) for column in EXPORT_COLUMNS))
+        for field, (_, digest) in TEXT_FIELDS.items():
+            # Large text comes compressed in the same row, not with a query per batch
+            blob = aliased(ContentBlob)
+            statement = statement.add_columns(
+                blob.codec.label(f"{field}_codec"), blob.data.label(f"{field}_data")
+            ).outerjoin(blob, blob.digest == getattr(Content, digest))
+        result = await session.stream(
+            statement
+            .where(Content.client_id == client_id)
+            .order_by(Content.id)
+            .execution_options(stream_results=True, max_row_buffer=EXPORT_BATCH_SIZE)
+        )
+        size = EXPORT_FIRST_BATCH_SIZE
+        while True:
+            rows = await result.fetchmany(size)
+            if not rows:
+                return
+            yield encode(rows)
+            size = min(size * EXPORT_BATCH_GROWTH, EXPORT_BATCH_SIZE)
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip a byte stream incrementally, flushing after each chunk"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_headers(client_id: int, export_format: str, compress: bool) -> Dict[str, str]:
+    """Response headers for a download of the export"""
+    filename = f"client-{client_id}-content.{export_format}"
+    if compress:
+        filename += ".gz"
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
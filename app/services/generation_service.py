@@ -0,0 +1,153 @@
+from typing import Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+import asyncio
+from app.db.models import Content, ContentStatus
+from app.db.database import AsyncSessionLocal
+from app.services.interaction_log import interaction_log
+from app.services.postprocess import postprocessor
+from app.services.job_events import job_events, DONE, FAILED
+from app.core.config import settings
+from app.core.call_budget import CallBudget, use_budget
+from app.core.metrics import metrics
+
+# Create a thread pool executor for running the (synchronous) crews
+executor = ThreadPoolExecutor(max_workers=3)
+
+# Generation depth (express, standard or deep; see app.services.crew_service) picked by content type and length
+SOCIAL_MEDIA_TYPES = ('instagram', 'twitter', 'linkedin', 'facebook', 'social')
+LONG_FORM_TYPES = ('article', 'strategy', 'content_plan')
+
+def choose_mode(content_type: str, word_count: Optional[int]) -> str:
+    """Default depth: short-form content gets one call, long-form the full crew"""
+    content_type = content_type.lower()
+    if content_type in SOCIAL_MEDIA_TYPES:
+        return "express"
+    if content_type in LONG_FORM_TYPES:
+        return "deep"
+    if word_count is None:
+        return "standard"  # Length unknown: neither a one-line post nor a long read
+    if word_count <= settings.GENERATION_EXPRESS_MAX_WORDS:
+        return "express"
+    if word_count >= settings.GENERATION_DEEP_MIN_WORDS:
+        return "deep"
+    return "standard"
+
+def new_budget() -> CallBudget:
+    """Model call budget for one generation job"""
+    return CallBudget(settings.LLM_BUDGET_MAX_CALLS, settings.LLM_BUDGET_MAX_TOKENS, settings.LLM_BUDGET_MAX_SECONDS)
+
+def run_crew_ai(client_info, topic, content_type="blog", word_count=500, tone=None, keywords=None, on_stage=None, mode="deep", budget=None):
+    """Run CrewAI in a separate thread, within the job's call budget if one is given"""
+    with use_budget(budget):
+        def report_stage(stage):
+            # Usage is charged to the stage the crew is in
+            if budget is not None:
+                budget.stage = stage
+            if on_stage:
+                on_stage(stage)
+        return _run_crew(client_info, topic, content_type, word_count, tone, keywords, report_stage, mode)
+
+def _run_crew(client_info, topic, content_type, word_count, tone, keywords, on_stage, mode):
+    # Imported here so the API process doesn't load crewai/langchain until a generation runs
+    from app.services.crew_service import ContentCrewService
+    crew_service = ContentCrewService(on_stage=on_stage)
+
+    # Express: one structured call, no crew
+    if mode == "express":
+        return crew_service.generate_express(client_info, topic, content_type.lower(), word_count, tone, keywords)
+
+    # Check if this is a social media post that needs special handling
+    if content_type.lower() in SOCIAL_MEDIA_TYPES:
+        # Use the specialized social media generation method
+        return crew_service.generate_social_media_post(
+            client_info,
+            topic,
+            platform=content_type.lower(),
+            word_count=word_count or 100,  # Default to 100 words for social media
+            tone=tone,
+            keywords=keywords,
+            mode=mode
+        )
+
+    # Use the standard blog post generation method
+    return crew_service.generate_blog_post(
+        client_info,
+        topic,
+        content_type.lower(),
+        word_count,
+        tone,
+        keywords,
+        mode=mode
+    )
+
+async def generate_and_store(
+    content_id: int,
+    client_id: int,
+    client_info,
+    topic: Optional[str],
+    content_type: str,
+    word_count: Optional[int],
+    tone: Optional[str],
+    keywords: Optional[str],
+    run_on: Optional[Executor] = None,
+    user_id: Optional[str] = None,
+    mode: str = "deep",
+) -> bool:
+    """Run the crew for a placeholder content row and write the result (or the error) into it"""
+    title = body = visual_suggestions = None
+    error = error_details = None
+    budget = new_budget()
+    try:
+        # The crew is synchronous, so run it on an executor to keep the event loop free
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            run_on or executor,
+            run_crew_ai,
+            client_info,
+            topic,
+            content_type,
+            word_count,
+            tone,
+            keywords,
+            job_events.stage_reporter(content_id, user_id),  # Pushes research/strategy/writing/design to subscribers
+            mode,
+            budget
+        )
+        # Cleaning and splitting run in the post-processing pool for large outputs
+        title, body, visual_suggestions = await postprocessor.run(result, topic)
+    except Exception as e:
+        import traceback
+        error = e
+        error_details = traceback.format_exc()
+
+    # Get a new session since we're in a background task (one for both outcomes)
+    stage = DONE if error is None else FAILED
+    async with AsyncSessionLocal() as session:
+        content_obj = await session.get(Content, content_id)
+        if content_obj:
+            if error is None:
+                # Update the content in the database
+                content_obj.title = title
+                content_obj.body = body
+                content_obj.visual_suggestions = visual_suggestions
+            else:
+                # Update content with error message
+                content_obj.title = f"Error: {str(error)[:50]}"
+                content_obj.body = f"Error generating content: {str(error)}\n\n{error_details}"
+            content_obj.status = ContentStatus.REVIEW
+            content_obj.generation_stage = stage
+            content_obj.llm_usage = budget.report()
+            content_obj.updated_at = datetime.now()
+            # The final stage reaches subscribers with the same commit that stores the content
+            event = await job_events.publish_in(session, content_id, user_id, stage)
+            await session.commit()
+            job_events.committed(event)
+    if budget.stopped:
+        metrics.increment(f"generation.budget_stopped.{budget.stopped}")
+    interaction_log.record(
+        client_id, "generated" if error is None else "generation_failed",
+        data={"title": title} if error is None else {"error": str(error)[:200]},
+        content_id=content_id
+    )
+    return error is None
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import json
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Content, IdempotencyKey
+from app.db.database import AsyncSessionLocal
+from app.core.config import settings
+
+class IdempotencyKeyReused(ValueError):
+    """The key was already used for a request with different parameters"""
+
+def request_fingerprint(params: Dict[str, Any]) -> str:
+    """Stable hash of the request parameters a key is bound to"""
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+class IdempotencyStore:
+    """Idempotency-Key records for generation requests: replay lookups, inserts and purging of expired keys"""
+
+    def __init__(self):
+        self._purge_task: Optional[asyncio.Task] = None
+
+    async def lookup(self, db: AsyncSession, user_id: str, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """The original response for a live key (with the job's current stage), or None if the key is new"""
+        row = (await db.execute(
+            select(IdempotencyKey.fingerprint, IdempotencyKey.response, IdempotencyKey.expires_at, Content.generation_stage)
+            .outerjoin(Content, Content.id == IdempotencyKey.content_id)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        )).first()
+        if row is None:
+            return None
+        if row.expires_at <= datetime.now():
+            # Expired but not purged yet: free the key for this request
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key))
+            return None
+        if row.fingerprint != fingerprint:
+            raise IdempotencyKeyReused(key)
+        return {**(row.response or {}), "generation_stage": row.generation_stage}
+
+    def remember(
+        self, db: AsyncSession, user_id: str, key: str, fingerprint: str, content_id: int, response: Dict[str, Any]
+    ) -> None:
+        """Add the key to the session; it commits with the placeholder row, so both exist or neither does"""
+        now = datetime.now()
+        db.add(IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            content_id=content_id,
+            response=response,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        ))
+
+    async def purge_expired(self) -> int:
+        """Delete expired keys (a range scan on the expires_at index)"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now()))
+            await session.commit()
+            return result.rowcount or 0
+
+    def start(self) -> None:
+        """Purge expired keys periodically"""
+        if self._purge_task is None:
+            self._purge_task = asyncio.get_running_loop().create_task(self._purge_loop())
+
+    def stop(self) -> None:
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            self._purge_task = None
+
+    async def _purge_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+            try:
+                await self.purge_expired()
+            except Exception:
+                pass  # Expired keys are also ignored on lookup; try again next interval
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,323 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
+import json
+import time
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, insert, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Client, Content, ContentType, ContentStatus
+from app.db.search_index import index_content_rows, index_unindexed_rows
+from app.db.client_profiles import rebuild_profiles
+from app.db.content_signatures import store_signatures, sign_unsigned_rows
+from app.db.content_versions import record_versions, version_unversioned_rows
+from app.db.content_blobs import storage_values, move_large_text, TEXT_FIELDS
+from app.models.client import ClientImportRow
+from app.models.content import ContentImportRow
+from app.core.config import settings
+
+CLIENT_COLUMNS = (
+    "name",
+    "industry",
+    "brand_voice",
+    "target_audience",
+    "content_preferences",
+    "website_url",
+    "social_profiles",
+)
+
+CONTENT_COLUMNS = (
+    "title",
+    "body",
+    "content_type",
+    "status",
+    "topic",
+    "keywords",
+    "word_count",
+    "visual_suggestions",
+    "client_id",
+)
+
+# Content column keys as written: large text is stored out of row (see app.db.content_blobs)
+CONTENT_STORAGE_COLUMNS = tuple(
+    key for column in CONTENT_COLUMNS for key in TEXT_FIELDS.get(column, (column,))
+)
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a byte stream into (line number, line) pairs, skipping blank lines"""
+    buffer = b""
+    line_no = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+class BulkImportService:
+    """Streaming NDJSON import of clients and content with batched writes and per-row errors"""
+
+    def __init__(self, db_session: AsyncSession, user_id: str, batch_size: Optional[int] = None):
+        self.db = db_session
+        self.user_id = user_id
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.dialect = db_session.bind.dialect.name
+        self.report: Dict[str, Any] = {
+            "received": 0,
+            "inserted": 0,
+            "updated": 0,
+            "skipped": 0,
+            "failed": 0,
+            "errors": [],
+            "errors_truncated": False,
+        }
+
+    def _error(self, line_no: int, message: str) -> None:
+        """Record a failed row without stopping the import"""
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"line": line_no, "error": message})
+        else:
+            self.report["errors_truncated"] = True
+
+    def _parse(self, line_no: int, raw: bytes, schema: Type[BaseModel]) -> Optional[BaseModel]:
+        """Validate one NDJSON line against the row schema"""
+        self.report["received"] += 1
+        try:
+            return schema.model_validate(json.loads(raw))
+        except json.JSONDecodeError as e:
+            self._error(line_no, f"Invalid JSON: {e.msg}")
+        except ValidationError as e:
+            self._error(line_no, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+        return None
+
+    def _insert(self, model):
+        """Dialect-specific INSERT that supports ON CONFLICT"""
+        if self.dialect == "postgresql":
+            return postgresql.insert(model)
+        return sqlite.insert(model)
+
+    async def _run(self, stream: AsyncIterator[bytes], schema: Type[BaseModel], prepare_batch, write_batch) -> Dict[str, Any]:
+        """Validate lines as they arrive and write them in batches"""
+        started = time.perf_counter()
+        batch: List[Tuple[int, BaseModel]] = []
+        async for line_no, raw in iter_ndjson(stream):
+            row = self._parse(line_no, raw, schema)
+            if row is not None:
+                batch.append((line_no, row))
+            if len(batch) >= self.batch_size:
+                await self._write_isolated(await prepare_batch(batch), write_batch)
+                batch = []
+        if batch:
+            await self._write_isolated(await prepare_batch(batch), write_batch)
+
+        self.report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return self.report
+
+    async def _write_isolated(self, rows: List[Tuple[int, Dict[str, Any]]], write_batch) -> None:
+        """Write a batch in one transaction; if it fails, retry row by row to isolate bad rows"""
+        if not rows:
+            return
+
+        try:
+            async with self.db.begin_nested():
+                counts = await write_batch([values for _, values in rows])
+            await self.db.commit()
+            self.report["inserted"] += counts[0]
+            self.report["updated"] += counts[1]
+            self.report["skipped"] += counts[2]
+            return
+        except Exception:
+            pass  # The savepoint was rolled back; fall through to row-by-row
+
+        for line_no, values in rows:
+            try:
+                async with self.db.begin_nested():
+                    counts = await write_batch([values])
+                self.report["inserted"] += counts[0]
+                self.report["updated"] += counts[1]
+                self.report["skipped"] += counts[2]
+            except Exception as e:
+                self._error(line_no, f"Database error: {str(e).splitlines()[0][:200]}")
+        await self.db.commit()
+
+    # Clients
+
+    async def import_clients(self, stream: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Import clients for the current user; rows with an id update that client"""
+        return await self._run(stream, ClientImportRow, self._prepare_client_batch, self._write_client_batch)
+
+    async def _prepare_client_batch(self, batch: List[Tuple[int, ClientImportRow]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Check ownership of rows that update existing clients and build column values"""
+        ids = [row.id for _, row in batch if row.id is not None]
+        owners: Dict[int, str] = {}
+        if ids:
+            result = await self.db.execute(select(Client.id, Client.user_id).where(Client.id.in_(ids)))
+            owners = dict(result.all())
+
+        prepared = []
+        for line_no, row in batch:
+            if row.id is not None and owners.get(row.id) != self.user_id:
+                self._error(line_no, f"Client {row.id} not found or access denied")
+                continue
+            values = {column: getattr(row, column) for column in CLIENT_COLUMNS}
+            values["user_id"] = self.user_id
+            if row.id is not None:
+                values["id"] = row.id
+            prepared.append((line_no, values))
+        return prepared
+
+    async def _write_client_batch(self, rows: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+        new_rows = [values for values in rows if "id" not in values]
+        upserts = [values for values in rows if "id" in values]
+
+        if new_rows:
+            await self.db.execute(insert(Client), new_rows)
+
+        if upserts:
+            statement = self._insert(Client)
+            statement = statement.on_conflict_do_update(
+                index_elements=[Client.id],
+                set_={
+                    **{column: statement.excluded[column] for column in CLIENT_COLUMNS},
+                    "updated_at": func.now(),
+                },
+                where=Client.user_id == self.user_id,  # Guard against ownership changing mid-import
+            ).returning(Client.id)
+            # Rows the guard skipped aren't returned
+            updated = len((await self.db.execute(statement, upserts)).scalars().all())
+        else:
+            updated = 0
+
+        return len(new_rows), updated, len(upserts) - updated
+
+    # Content
+
+    async def import_content(self, stream: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Import content into the current user's clients; rows with an id update that content"""
+        result = await self.db.execute(select(Client.id).where(Client.user_id == self.user_id))
+        self.owned_client_ids = set(result.scalars().all())
+        self.touched_client_ids = set()
+        self.previous_client_ids: Dict[int, int] = {}
+        report = await self._run(stream, ContentImportRow, self._prepare_content_batch, self._write_content_batch)
+
+        # Core writes bypass the ORM hooks; recompute the touched profiles once rather than per batch
+        if self.touched_client_ids:
+            await self.db.run_sync(lambda sync_db: rebuild_profiles(sync_db.connection(), self.touched_client_ids))
+            await self.db.commit()
+        return report
+
+    async def _prepare_content_batch(self, batch: List[Tuple[int, ContentImportRow]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Check client/content ownership and build column values"""
+        ids = [row.id for _, row in batch if row.id is not None]
+        existing: Dict[int, int] = {}
+        if ids:
+            result = await self.db.execute(select(Content.id, Content.client_id).where(Content.id.in_(ids)))
+            existing = dict(result.all())
+            self.previous_client_ids.update(existing)
+
+        prepared = []
+        for line_no, row in batch:
+            if row.client_id not in self.owned_client_ids:
+                self._error(line_no, f"Client {row.client_id} not found or access denied")
+                continue
+            if row.id is not None and existing.get(row.id) not in self.owned_client_ids:
+                self._error(line_no, f"Content {row.id} not found or access denied")
+                continue
+
+            values = {column: getattr(row, column) for column in CONTENT_COLUMNS}
+            values["content_type"] = ContentType[row.content_type.value.upper()]
+            values["status"] = ContentStatus[row.status.value.upper()]
+            if row.id is not None:
+                values["id"] = row.id
+            prepared.append((line_no, values))
+        return prepared
+
+    async def _write_content_batch(self, rows: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+        new_rows = [values for values in rows if "id" not in values]
+        upserts = [values for values in rows if "id" in values]
+        self.touched_client_ids.update(values["client_id"] for values in rows)
+        # An upsert can move content away from another owned client
+        self.touched_client_ids.update(
+            self.previous_client_ids[values["id"]] for values in upserts if values["id"] in self.previous_client_ids
+        )
+
+        if new_rows:
+            if self.dialect == "postgresql" and settings.IMPORT_USE_COPY:
+                await self._copy_content(new_rows)
+            else:
+                result = await self.db.execute(
+                    insert(Content).returning(Content.id, sort_by_parameter_order=True),
+                    await self._storage_values(new_rows)
+                )
+                await self._reindex([
+                    {"id": content_id, **values}
+                    for content_id, values in zip(result.scalars().all(), new_rows)
+                ])
+
+        if upserts:
+            statement = self._insert(Content)
+            statement = statement.on_conflict_do_update(
+                index_elements=[Content.id],
+                set_={
+                    # `excluded` is keyed by column name; the text columns are mapped under other attribute names
+                    **{
+                        column: statement.excluded[column.name]
+                        for column in (Content.__mapper__.columns[key] for key in CONTENT_STORAGE_COLUMNS)
+                    },
+                    "updated_at": func.now(),
+                    "revision": Content.revision + 1,
+                },
+                where=Content.client_id.in_(select(Client.id).where(Client.user_id == self.user_id)),
+            ).returning(Content.id)
+            # Rows the guard skipped aren't returned, and keep their index entries and history
+            result = await self.db.execute(statement, await self._storage_values(upserts))
+            updated_ids = set(result.scalars().all())
+            await self._reindex([values for values in upserts if values["id"] in updated_ids])
+            updated = len(updated_ids)
+        else:
+            updated = 0
+
+        return len(new_rows), updated, len(upserts) - updated
+
+    async def _copy_content(self, rows: List[Dict[str, Any]]) -> None:
+        """Load new content rows with COPY on the session's own connection (PostgreSQL)"""
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        records = [
+            tuple(
+                # Enum columns store the member name
+                row[column].name if column in ("content_type", "status") else row[column]
+                for column in CONTENT_COLUMNS
+            )
+            for row in rows
+        ]
+        await raw.driver_connection.copy_records_to_table(
+            Content.__tablename__,
+            records=records,
+            columns=list(CONTENT_COLUMNS),
+        )
+
+        # COPY bypasses the ORM hooks, so index, sign and version the new rows set-wise
+        client_ids = {row["client_id"] for row in rows}
+        await connection.run_sync(lambda sync_conn: index_unindexed_rows(sync_conn, client_ids))
+        await connection.run_sync(lambda sync_conn: sign_unsigned_rows(sync_conn, client_ids))
+        await connection.run_sync(lambda sync_conn: version_unversioned_rows(sync_conn, client_ids))
+        # The set-wise index reads the inline text, so large text moves out of row last
+        await connection.run_sync(lambda sync_conn: move_large_text(sync_conn, client_ids))
+
+    async def _storage_values(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Row values with large text replaced by blob digests (the blobs are written first)"""
+        return await self.db.run_sync(lambda sync_db: storage_values(sync_db.connection(), rows))
+
+    async def _reindex(self, rows: List[Dict[str, Any]]) -> None:
+        """Keep the search index, duplicate signatures and version history current for rows written with Core statements"""
+        def reindex(sync_db):
+            index_content_rows(sync_db.connection(), rows)
+            store_signatures(sync_db.connection(), rows)
+            record_versions(sync_db.connection(), rows, self.user_id)
+        await self.db.run_sync(reindex)
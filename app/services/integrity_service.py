@@ -0,0 +1,146 @@
+from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+import asyncio
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Client, Content
+from app.db.database import AsyncSessionLocal
+from app.core.config import settings
+from app.core.lifecycle import lifecycle
+
+# Cached result of the last integrity run, shared by every request in this worker
+_report_state: Dict[str, Any] = {
+    "status": "idle",
+    "started_at": None,
+    "finished_at": None,
+    "report": None,
+    "error": None,
+}
+_report_lock = asyncio.Lock()
+
+def _client_missing_user_id():
+    """Filter for clients that aren't linked to a Supabase user"""
+    return or_(Client.user_id.is_(None), Client.user_id == "")
+
+class IntegrityService:
+    """Set-based data integrity checks (no per-row queries, nothing loaded wholesale)"""
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def build_summary(self) -> Dict[str, Any]:
+        """Compute the integrity summary with a handful of aggregate queries"""
+        total_clients = await self.db.scalar(select(func.count(Client.id)))
+        total_content = await self.db.scalar(select(func.count(Content.id)))
+        clients_without_user_id = await self.db.scalar(
+            select(func.count(Client.id)).where(_client_missing_user_id())
+        )
+
+        # Orphaned content: outer join to clients and keep rows with no match
+        orphaned_content = await self.db.scalar(
+            select(func.count(Content.id))
+            .select_from(Content)
+            .outerjoin(Client, Client.id == Content.client_id)
+            .where(Client.id.is_(None))
+        )
+
+        total_users = await self.db.scalar(
+            select(func.count(func.distinct(Client.user_id))).where(~_client_missing_user_id())
+        )
+
+        return {
+            "total_clients": total_clients,
+            "total_content": total_content,
+            "clients_with_user_id": total_clients - clients_without_user_id,
+            "clients_without_user_id": clients_without_user_id,
+            "orphaned_content": orphaned_content,
+            "total_users": total_users,
+        }
+
+    async def orphaned_content_page(self, after_id: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Page through content rows whose client no longer exists (keyset on id)"""
+        result = await self.db.execute(
+            select(Content.id, Content.title, Content.client_id, Content.created_at)
+            .select_from(Content)
+            .outerjoin(Client, Client.id == Content.client_id)
+            .where(Client.id.is_(None), Content.id > after_id)
+            .order_by(Content.id)
+            .limit(limit)
+        )
+        items = [
+            {
+                "id": row.id,
+                "title": row.title,
+                "client_id": row.client_id,
+                "created_at": row.created_at,
+            }
+            for row in result
+        ]
+        return {"items": items, "next_after_id": items[-1]["id"] if len(items) == limit else None}
+
+    async def clients_without_user_page(self, after_id: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Page through clients missing a user_id (keyset on id)"""
+        result = await self.db.execute(
+            select(Client.id, Client.name, Client.created_at)
+            .where(_client_missing_user_id(), Client.id > after_id)
+            .order_by(Client.id)
+            .limit(limit)
+        )
+        items = [
+            {"id": row.id, "name": row.name, "created_at": row.created_at}
+            for row in result
+        ]
+        return {"items": items, "next_after_id": items[-1]["id"] if len(items) == limit else None}
+
+    async def user_totals_page(self, after_user_id: str = "", limit: int = 100) -> Dict[str, Any]:
+        """Per-user client and content totals from one grouped query (keyset on user_id)"""
+        result = await self.db.execute(
+            select(
+                Client.user_id,
+                func.count(func.distinct(Client.id)).label("client_count"),
+                func.count(Content.id).label("content_count"),
+            )
+            .select_from(Client)
+            .outerjoin(Content, Content.client_id == Client.id)
+            .where(~_client_missing_user_id(), Client.user_id > after_user_id)
+            .group_by(Client.user_id)
+            .order_by(Client.user_id)
+            .limit(limit)
+        )
+        items = [
+            {
+                "user_id": row.user_id,
+                "client_count": row.client_count,
+                "content_count": row.content_count,
+            }
+            for row in result
+        ]
+        return {"items": items, "next_after_user_id": items[-1]["user_id"] if len(items) == limit else None}
+
+def get_cached_report() -> Dict[str, Any]:
+    """Return the last integrity report and the state of the background job"""
+    state = dict(_report_state)
+    finished_at: Optional[datetime] = state["finished_at"]
+    state["stale"] = (
+        finished_at is None
+        or datetime.now() - finished_at > timedelta(seconds=settings.INTEGRITY_REPORT_TTL_SECONDS)
+    )
+    return state
+
+def report_is_running() -> bool:
+    """Whether a background integrity run is in progress in this worker"""
+    return _report_state["status"] == "running"
+
+async def run_integrity_report() -> None:
+    """Background job: rebuild the integrity summary and cache it"""
+    if _report_lock.locked():
+        return
+
+    async with _report_lock, lifecycle.track_job():
+        _report_state.update(status="running", started_at=datetime.now(), error=None)
+        try:
+            async with AsyncSessionLocal() as db:
+                summary = await IntegrityService(db).build_summary()
+            _report_state.update(status="done", report=summary, finished_at=datetime.now())
+        except Exception as e:
+            _report_state.update(status="failed", error=str(e), finished_at=datetime.now())
@@ -0,0 +1,124 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import threading
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from app.db.models import Interaction
+from app.db.database import AsyncSessionLocal
+from app.core.config import settings
+
+class InteractionLog:
+    """Buffers interaction events in memory and writes them in batched inserts off the request path"""
+
+    def __init__(self):
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()  # record() may be called from executor threads
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self.dropped = 0  # Lost to the buffer limit
+        self.rejected = 0  # Refused by the database (e.g. the client or content was deleted)
+
+    def record(
+        self,
+        client_id: int,
+        interaction_type: str,
+        data: Optional[Dict[str, Any]] = None,
+        content_id: Optional[int] = None,
+        user_id: Optional[str] = None,
+    ) -> None:
+        """Queue one event; never touches the database"""
+        event = {
+            "client_id": client_id,
+            "content_id": content_id,
+            "user_id": user_id,
+            "interaction_type": interaction_type,
+            "data": data,
+            "created_at": datetime.now(),
+        }
+        with self._lock:
+            self._pending.append(event)
+            overflow = len(self._pending) - settings.INTERACTION_BUFFER_LIMIT
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+            full = len(self._pending) >= settings.INTERACTION_FLUSH_SIZE
+
+        if full and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    async def flush(self) -> int:
+        """Write everything buffered so far in one executemany; requeue it if the write fails.
+
+        Rows the database refuses (constraint violations) are found by retrying in halves
+        and dropped, so one bad event can't hold back the rest.
+        """
+        async with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            handled: set = set()  # ids of events written or rejected
+            try:
+                return await self._write(batch, handled)
+            except BaseException:
+                with self._lock:
+                    # Keep order; retried on the next flush (also if cancelled)
+                    self._pending[:0] = [event for event in batch if id(event) not in handled]
+                    overflow = len(self._pending) - settings.INTERACTION_BUFFER_LIMIT
+                    if overflow > 0:
+                        del self._pending[:overflow]
+                        self.dropped += overflow
+                raise
+
+    async def _write(self, batch: List[Dict[str, Any]], handled: set) -> int:
+        """Insert a batch, bisecting it on integrity errors; returns the rows written"""
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(Interaction), batch)
+                await session.commit()
+            handled.update(id(event) for event in batch)
+            return len(batch)
+        except IntegrityError:
+            if len(batch) == 1:
+                handled.add(id(batch[0]))
+                self.rejected += 1
+                return 0
+        middle = len(batch) // 2
+        return await self._write(batch[:middle], handled) + await self._write(batch[middle:], handled)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.INTERACTION_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                pass  # Events stay buffered until the database is back
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop"""
+        if self._flusher is None:
+            self._loop = asyncio.get_running_loop()
+            self._flusher = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still buffered"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        try:
+            await self.flush()
+        except Exception:
+            pass
+
+interaction_log = InteractionLog()
@@ -0,0 +1,205 @@
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+import asyncio
+import json
+from sqlalchemy import select, update, func, text, or_
+from app.db.models import Content, Client
+from app.db.database import AsyncSessionLocal, async_engine
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Generation stages, in order; a content row without a stage was never generated
+QUEUED = "queued"
+DONE = "done"
+FAILED = "failed"
+STAGES = (QUEUED, "research", "strategy", "writing", "design", DONE, FAILED)
+TERMINAL_STAGES = (DONE, FAILED)
+
+CHANNEL = "content_generation"  # LISTEN/NOTIFY channel on PostgreSQL
+CLOSING = {"stage": None, "closing": True}  # Sent to subscribers when the worker shuts down
+
+class JobEvents:
+    """Publishes generation stage changes and fans them out to subscribers in this worker.
+
+    On PostgreSQL every worker LISTENs on one channel and stage changes are sent with
+    NOTIFY, so any worker can serve the waiting client. ``set_stage`` and ``publish_in``
+    send it in the transaction that writes the stage; ``announce`` sends it in its own
+    transaction after the caller's commit. Other databases poll for changed rows, and
+    only while someone is subscribed.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[Tuple[str, Any], Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._delivered: "OrderedDict[int, str]" = OrderedDict()  # Last stage sent per content (polling dedupe)
+        self._notify = async_engine.dialect.name == "postgresql"
+
+    # Publishing
+
+    def _event(self, content_id: int, user_id: Optional[str], stage: str) -> Dict[str, Any]:
+        return {"content_id": content_id, "user_id": user_id, "stage": stage, "at": datetime.now().isoformat()}
+
+    async def _send(self, session, event: Dict[str, Any]) -> None:
+        """Queue a NOTIFY in the session's transaction (delivered to every worker on commit)"""
+        if self._notify:
+            await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": json.dumps(event)})
+
+    def _sent(self, event: Dict[str, Any]) -> None:
+        """After commit: without NOTIFY, deliver locally right away (the poller skips it later)"""
+        metrics.increment("job_events.published")
+        if not self._notify:
+            self._deliver(event)
+
+    async def set_stage(self, content_id: int, user_id: Optional[str], stage: str) -> None:
+        """Move a generation to `stage` and tell everyone waiting on it"""
+        event = self._event(content_id, user_id, stage)
+        async with AsyncSessionLocal() as session:
+            # A late intermediate stage never overwrites a finished generation
+            result = await session.execute(
+                update(Content)
+                .where(Content.id == content_id, or_(Content.generation_stage.is_(None), Content.generation_stage.notin_(TERMINAL_STAGES)))
+                .values(generation_stage=stage, updated_at=datetime.now())
+            )
+            if result.rowcount == 0:
+                return
+            await self._send(session, event)
+            await session.commit()
+        self._sent(event)
+
+    async def publish_in(self, session, content_id: int, user_id: Optional[str], stage: str) -> Dict[str, Any]:
+        """Publish a stage the caller writes in `session`, with the same commit; pass the
+        returned event to `committed()` once the commit succeeded"""
+        event = self._event(content_id, user_id, stage)
+        await self._send(session, event)
+        return event
+
+    def committed(self, event: Dict[str, Any]) -> None:
+        self._sent(event)
+
+    async def announce(self, content_id: int, user_id: Optional[str], stage: str) -> None:
+        """Publish a stage the caller has already written (e.g. together with the generated content)"""
+        event = self._event(content_id, user_id, stage)
+        if self._notify:
+            async with AsyncSessionLocal() as session:
+                await self._send(session, event)
+                await session.commit()
+        self._sent(event)
+
+    def stage_reporter(self, content_id: int, user_id: Optional[str]) -> Callable[[str], None]:
+        """Callback for the (threaded) crew: schedules stage updates on this event loop, never raises"""
+        loop = asyncio.get_running_loop()
+
+        async def report(stage: str) -> None:
+            try:
+                await self.set_stage(content_id, user_id, stage)
+            except Exception:
+                metrics.increment("job_events.publish_failed")
+
+        return lambda stage: asyncio.run_coroutine_threadsafe(report(stage), loop)
+
+    # Subscribing
+
+    @asynccontextmanager
+    async def subscribe(self, content_id: Optional[int] = None, user_id: Optional[str] = None):
+        """Queue of events for one content row, or for every generation of one user"""
+        key = ("content", content_id) if content_id is not None else ("user", user_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.JOB_EVENTS_QUEUE_SIZE)
+        self._subscribers.setdefault(key, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(key)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[key]
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        self._delivered[event["content_id"]] = event.get("stage")
+        self._delivered.move_to_end(event["content_id"])
+        while len(self._delivered) > 10000:
+            self._delivered.popitem(last=False)
+        for key in (("content", event["content_id"]), ("user", event.get("user_id"))):
+            for queue in self._subscribers.get(key, ()):
+                self._put(queue, event)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        if queue.full():
+            queue.get_nowait()  # A slow consumer loses the oldest event, not the newest
+        queue.put_nowait(event)
+
+    # Cross-worker transport
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self._deliver(json.loads(payload))
+        except ValueError:
+            metrics.increment("job_events.bad_payload")
+
+    async def _listen(self) -> None:
+        """Hold one connection LISTENing on the channel, reconnecting if it drops"""
+        while True:
+            try:
+                async with async_engine.connect() as connection:
+                    driver = (await connection.get_raw_connection()).driver_connection
+                    await driver.add_listener(CHANNEL, self._on_notify)
+                    try:
+                        while not driver.is_closed():
+                            await asyncio.sleep(settings.JOB_EVENTS_RECONNECT_SECONDS)
+                    finally:
+                        if not driver.is_closed():
+                            await driver.remove_listener(CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                metrics.increment("job_events.listener_errors")
+            await asyncio.sleep(settings.JOB_EVENTS_RECONNECT_SECONDS)
+
+    async def _poll(self) -> None:
+        """Without NOTIFY: look for rows whose stage changed since the last look, while anyone is subscribed"""
+        cursor: Optional[datetime] = None
+        while True:
+            await asyncio.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+            if not self._subscribers:
+                cursor = None  # Nobody to tell; start from the current state when someone subscribes
+                continue
+            try:
+                async with AsyncSessionLocal() as session:
+                    if cursor is None:
+                        cursor = await session.scalar(select(func.max(Content.updated_at))) or datetime.min
+                        continue
+                    rows = (await session.execute(
+                        select(Content.id, Content.generation_stage, Content.updated_at, Client.user_id)
+                        .join(Client)
+                        .where(Content.generation_stage.isnot(None), Content.updated_at >= cursor)
+                        .order_by(Content.updated_at)
+                        .limit(500)
+                    )).all()
+            except Exception:
+                metrics.increment("job_events.poll_errors")
+                continue
+            for row in rows:
+                cursor = max(cursor, row.updated_at) if cursor else row.updated_at
+                # Rows at the cursor come back on the next poll, and other edits bump updated_at too
+                if self._delivered.get(row.id) != row.generation_stage:
+                    self._deliver(self._event(row.id, row.user_id, row.generation_stage))
+
+    def start(self) -> None:
+        """Start receiving stage changes from other workers"""
+        if self._task is None:
+            loop = asyncio.get_running_loop()
+            self._task = loop.create_task(self._listen() if self._notify else self._poll())
+
+    def stop(self) -> None:
+        """Stop receiving and release every waiting request and socket"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for queues in list(self._subscribers.values()):
+            for queue in queues:
+                self._put(queue, CLOSING)
+
+job_events = JobEvents()
@@ -1,45 +1,75 @@
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from app.db.models import Client, Content
-import google.generativeai as genai
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Client, ClientContentProfile, Interaction
+from app.db import client_profiles
+from app.core import llm
 from app.core.config import settings
+from app.core.json_stream import JSONObjectExtractor
+from app.core.metrics import metrics
+from app.services.interaction_log import interaction_log
+import time
+
+# Response schema for suggestions (the model is constrained to emit exactly this JSON shape)
+SUGGESTIONS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "content_type": {"type": "string"},
+            "description": {"type": "string"},
+            "keywords": {"type": "array", "items": {"type": "string"}},
+            "hashtags": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["title", "content_type", "description", "keywords", "hashtags"],
+    },
+}
 
 class MemoryService:
     """Service to maintain context and history for client interactions"""
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Union[Session, AsyncSession]):
         self.db = db_session
-        # Initialize Gemini if API key is available
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
-        else:
-            self.model = None
+        self._model = None
+
+    @property
+    def model(self):
+        """Gemini model, created on first use (None if no API key is configured)"""
+        if self._model is None and llm.is_configured():
+            self._model = llm.get_generative_model('gemini-2.0-flash')
+        return self._model
     
     def get_client_history(self, client_id: int, limit: int = 10) -> Dict[str, Any]:
         """Get client's content history and context for AI generation"""
-        # Get client information
-        client = self.db.query(Client).filter(Client.id == client_id).first()
-        if not client:
+        return self._build_client_history(self.db, client_id, limit)
+
+    async def get_client_history_async(self, client_id: int, limit: int = 10) -> Dict[str, Any]:
+        """Get client history without blocking the event loop when backed by an AsyncSession"""
+        if isinstance(self.db, AsyncSession):
+            return await self.db.run_sync(
+                lambda sync_db: self._build_client_history(sync_db, client_id, limit)
+            )
+        return self.get_client_history(client_id, limit)
+
+    def _build_client_history(self, db: Session, client_id: int, limit: int) -> Dict[str, Any]:
+        """Build the client context object using a synchronous session"""
+        # Client and its precomputed content profile in one indexed lookup
+        row = db.query(Client, ClientContentProfile).outerjoin(
+            ClientContentProfile, ClientContentProfile.client_id == Client.id
+        ).filter(Client.id == client_id).first()
+        if not row:
             return {"error": "Client not found"}
-        
-        # Get recent content
-        recent_content = self.db.query(Content).filter(
-            Content.client_id == client_id
-        ).order_by(Content.created_at.desc()).limit(limit).all()
-        
-        # Format content history
-        content_history = []
-        for content in recent_content:
-            content_history.append({
-                "id": content.id,
-                "title": content.title,
-                "type": content.content_type.value,
-                "topic": content.topic,
-                "created_at": content.created_at.isoformat(),
-                "keywords": content.keywords
-            })
+        client, profile = row
+
+        if profile is None:
+            # First read for this client since profiles were introduced: build it now
+            client_profiles.rebuild_profiles(db.connection(), [client_id])
+            db.commit()
+            profile = db.get(ClientContentProfile, client_id, populate_existing=True)
+
+        content_history = (profile.recent_items or [])[:limit]
         
         # Build context object for AI
         context = {
@@ -52,51 +82,60 @@ class MemoryService:
                 "content_preferences": client.content_preferences
             },
             "content_history": content_history,
-            "content_patterns": self._analyze_content_patterns(content_history),
-            "conversation_threads": self._get_conversation_threads(client_id)
+            "content_patterns": self._profile_patterns(profile),
+            "conversation_threads": self._get_conversation_threads(db, client_id)
         }
         
         return context
-    
-    def _analyze_content_patterns(self, content_history: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze patterns in client's content history"""
-        if not content_history:
+
+    def _profile_patterns(self, profile: ClientContentProfile) -> Dict[str, Any]:
+        """Content patterns over the client's whole history, from the profile's running counts"""
+        if not profile.content_count:
             return {}
-        
-        # Extract topics and keywords
-        topics = [c.get("topic", "") for c in content_history if c.get("topic")]
-        all_keywords = []
-        for content in content_history:
-            if content.get("keywords"):
-                keywords = [k.strip() for k in content.get("keywords", "").split(",")]
-                all_keywords.extend(keywords)
-        
-        # Count keyword frequency
-        keyword_frequency = {}
-        for keyword in all_keywords:
-            if keyword:
-                keyword_frequency[keyword] = keyword_frequency.get(keyword, 0) + 1
-        
-        # Sort by frequency
-        top_keywords = sorted(keyword_frequency.items(), key=lambda x: x[1], reverse=True)[:10]
-        
+
+        keyword_counts = profile.keyword_counts or {}
+        top_keywords = sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        topic_counts = profile.topic_counts or {}
+        top_topics = sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+
         return {
-            "recurring_topics": list(set(topics)),
+            "recurring_topics": [t[0] for t in top_topics],
             "top_keywords": [k[0] for k in top_keywords],
-            "content_types": list(set(c.get("type") for c in content_history if c.get("type")))
+            "content_types": list((profile.type_counts or {}).keys())
         }
     
-    def _get_conversation_threads(self, client_id: int) -> List[Dict[str, Any]]:
-        """Get conversation threads for a client"""
-        # This would query a dedicated conversations table
-        # For now, return a placeholder
-        return []
+    def _get_conversation_threads(self, db: Session, client_id: int) -> List[Dict[str, Any]]:
+        """Recent interactions grouped into one thread per piece of content (bounded window, newest first)"""
+        since = datetime.now() - timedelta(days=settings.INTERACTION_THREAD_WINDOW_DAYS)
+        # Range scan on ix_interactions_client_created; never reads more than the configured limit
+        events = db.query(Interaction).filter(
+            Interaction.client_id == client_id,
+            Interaction.created_at >= since
+        ).order_by(Interaction.created_at.desc()).limit(settings.INTERACTION_THREAD_LIMIT).all()
+
+        threads: Dict[Any, Dict[str, Any]] = {}
+        for event in events:
+            thread = threads.setdefault(event.content_id, {
+                "content_id": event.content_id,
+                "last_activity": event.created_at.isoformat(),
+                "events": []
+            })
+            thread["events"].append({
+                "type": event.interaction_type,
+                "data": event.data,
+                "created_at": event.created_at.isoformat()
+            })
+        return list(threads.values())
     
     def store_interaction(self, client_id: int, interaction_type: str, data: Dict[str, Any]) -> bool:
-        """Store client interaction for future context"""
-        # This would store in a dedicated interactions table
-        # For now, we'll just return True as a placeholder
-        # In a real implementation, you would create and store an Interaction object
+        """Store client interaction for future context (buffered; written in batches in the background)"""
+        interaction_log.record(
+            client_id,
+            interaction_type,
+            data=data,
+            content_id=data.get("content_id") if data else None,
+            user_id=data.get("user_id") if data else None
+        )
         return True
     
     async def generate_content_suggestions(self, client_id: int, suggestion_count: int = 3) -> List[Dict[str, Any]]:
@@ -105,7 +144,7 @@ class MemoryService:
             return [{"error": "Gemini API key not configured. Please set GEMINI_API_KEY in your .env file."}]
         
         # Get client context
-        context = self.get_client_history(client_id)
+        context = await self.get_client_history_async(client_id)
         if "error" in context:
             return [{"error": context["error"]}]
         
@@ -131,118 +170,100 @@ class MemoryService:
         """
         
         try:
-            # Generate suggestions using Gemini
-            response = await self.model.generate_content_async(prompt)
-            response_text = response.text
+            # Ask for schema-constrained JSON and parse the stream as it arrives
+            extractor = JSONObjectExtractor()
+            suggestions = []
+            response_text = ""
+            parse_ms = 0.0
+            response = await self.model.generate_content_async(
+                prompt,
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "response_schema": SUGGESTIONS_SCHEMA,
+                },
+                stream=True
+            )
+            async for chunk in response:
+                text = chunk.text
+                response_text += text
+                started = time.perf_counter()
+                suggestions.extend(extractor.feed(text))
+                parse_ms += (time.perf_counter() - started) * 1000
+                if len(suggestions) >= suggestion_count:
+                    break  # Everything we need has arrived; don't wait for the rest
+            metrics.observe("suggestions.parse", parse_ms)
+            metrics.increment("suggestions.responses")
+            if extractor.truncated:
+                metrics.increment("suggestions.truncated")
             
-            # Try to parse JSON from the response
-            try:
-                import json
-                import re
-                
-                # Look for JSON-like content in the response
-                json_match = re.search(r'\[\s*\{.*\}\s*\]', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                    suggestions = json.loads(json_str)
-                else:
-                    # If no JSON found, create structured suggestions from the text
-                    lines = response_text.split('\n')
-                    suggestions = []
-                    current_suggestion = {}
-                    
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith('Title:') or line.startswith('1.'):
-                            if current_suggestion and 'title' in current_suggestion:
-                                suggestions.append(current_suggestion)
-                                current_suggestion = {}
-                            current_suggestion['title'] = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
-                        elif line.startswith('Content Type:') or line.startswith('2.'):
-                            current_suggestion['content_type'] = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
-                        elif line.startswith('Description:') or line.startswith('3.'):
-                            current_suggestion['description'] = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
-                        elif line.startswith('Keywords:') or line.startswith('4.'):
-                            keywords_text = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
-                            current_suggestion['keywords'] = [k.strip() for k in keywords_text.split(',')]
-                        elif line.startswith('Hashtags:') or line.startswith('5.'):
-                            hashtags_text = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
-                            # Ensure hashtags start with #
-                            current_suggestion['hashtags'] = [
-                                h.strip() if h.strip().startswith('#') else f"#{h.strip()}" 
-                                for h in hashtags_text.split(',')
-                            ]
-                    
-                    if current_suggestion and 'title' in current_suggestion:
-                        suggestions.append(current_suggestion)
-                
-                # Ensure we have the requested number of suggestions
-                if len(suggestions) < suggestion_count:
-                    # Fill in with some generated suggestions
-                    for i in range(len(suggestions), suggestion_count):
-                        suggestions.append({
-                            "title": f"The Future of {context['client']['industry']} in {2024 + i}",
-                            "content_type": ["blog", "whitepaper", "case study", "infographic"][i % 4],
-                            "description": f"An analysis of upcoming trends in {context['client']['industry']} and how businesses can prepare for the changing landscape.",
-                            "keywords": ["innovation", "future trends", context['client']['industry'].lower(), "business strategy"],
-                            "hashtags": [f"#{context['client']['industry'].lower().replace(' ', '')}", "#innovation", "#futureof" + context['client']['industry'].lower().replace(' ', ''), "#business"]
-                        })
-                
-                # Limit to requested number and ensure all have required fields
-                suggestions = suggestions[:suggestion_count]
-                for suggestion in suggestions:
-                    if 'title' not in suggestion:
-                        suggestion['title'] = f"Content Strategy for {context['client']['industry']}"
-                    if 'content_type' not in suggestion:
-                        suggestion['content_type'] = "blog"
-                    if 'description' not in suggestion:
-                        suggestion['description'] = f"Strategic content tailored for {context['client']['target_audience']}."
-                    if 'keywords' not in suggestion or not suggestion['keywords']:
-                        suggestion['keywords'] = context['content_patterns'].get('top_keywords', [])[:3] or ["content", "strategy", context['client']['industry'].lower()]
-                    # Ensure keywords is a list
-                    if isinstance(suggestion['keywords'], str):
-                        suggestion['keywords'] = [k.strip() for k in suggestion['keywords'].split(',')]
-                    
-                    # Add hashtags if missing
-                    if 'hashtags' not in suggestion or not suggestion['hashtags']:
-                        industry_tag = context['client']['industry'].lower().replace(' ', '')
-                        suggestion['hashtags'] = [
-                            f"#{industry_tag}", 
-                            f"#{suggestion['content_type'].lower()}", 
-                            f"#trending{industry_tag.capitalize()}", 
-                            f"#{context['client']['name'].replace(' ', '').lower()}"
-                        ]
-                    # Ensure hashtags start with #
-                    suggestion['hashtags'] = [
-                        h if h.startswith('#') else f"#{h}" 
-                        for h in suggestion['hashtags']
-                    ]
-                
-                return suggestions
-                
-            except Exception as parsing_error:
-                                # Fallback to generated suggestions with hashtags
-                industry_tag = context['client']['industry'].lower().replace(' ', '')
-                return [
-                    {
-                        "title": f"{context['client']['industry']} Trends for {['Q1', 'Q2', 'Q3', 'Q4'][i % 4]} 2024",
-                        "content_type": ["blog", "whitepaper", "social", "email", "video"][i % 5],
-                        "description": f"A comprehensive analysis of the latest trends in {context['client']['industry']} with actionable insights for {context['client']['target_audience']}.",
-                        "keywords": ["trends", context['client']['industry'].lower(), "innovation", "strategy", "insights"],
-                        "hashtags": [
-                            f"#{industry_tag}", 
-                            f"#{industry_tag}Trends", 
-                            f"#2024{industry_tag.capitalize()}", 
-                            f"#{['innovation', 'strategy', 'business', 'growth', 'success'][i % 5]}"
-                        ]
-                    }
-                    for i in range(suggestion_count)
-                ]
+            if not suggestions:
+                # No JSON objects at all: recover what we can from a plain-text answer
+                metrics.increment("suggestions.fallback")
+                suggestions = self._parse_suggestion_lines(response_text)
+            if len(suggestions) < suggestion_count:
+                metrics.increment("suggestions.short")
+            
+            return [self._normalize_suggestion(suggestion, context) for suggestion in suggestions[:suggestion_count]]
                 
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
             return [{"error": f"Failed to generate suggestions: {str(e)}"}]
 
+    def _parse_suggestion_lines(self, response_text: str) -> List[Dict[str, Any]]:
+        """Heuristic parse of a numbered / labelled plain-text answer"""
+        lines = response_text.split('\n')
+        suggestions = []
+        current_suggestion = {}
+        
+        for line in lines:
+            line = line.strip()
+            if line.startswith('Title:') or line.startswith('1.'):
+                if current_suggestion and 'title' in current_suggestion:
+                    suggestions.append(current_suggestion)
+                    current_suggestion = {}
+                current_suggestion['title'] = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
+            elif line.startswith('Content Type:') or line.startswith('2.'):
+                current_suggestion['content_type'] = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
+            elif line.startswith('Description:') or line.startswith('3.'):
+                current_suggestion['description'] = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
+            elif line.startswith('Keywords:') or line.startswith('4.'):
+                keywords_text = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
+                current_suggestion['keywords'] = [k.strip() for k in keywords_text.split(',')]
+            elif line.startswith('Hashtags:') or line.startswith('5.'):
+                hashtags_text = line.split(':', 1)[1].strip() if ':' in line else line.split('.', 1)[1].strip()
+                current_suggestion['hashtags'] = [h.strip() for h in hashtags_text.split(',')]
+        
+        if current_suggestion and 'title' in current_suggestion:
+            suggestions.append(current_suggestion)
+        return suggestions
 
-
+    def _normalize_suggestion(self, suggestion: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill missing fields and coerce keywords/hashtags to lists"""
+        if not suggestion.get('title'):
+            suggestion['title'] = f"Content Strategy for {context['client']['industry']}"
+        if not suggestion.get('content_type'):
+            suggestion['content_type'] = "blog"
+        if not suggestion.get('description'):
+            suggestion['description'] = f"Strategic content tailored for {context['client']['target_audience']}."
+        if not suggestion.get('keywords'):
+            suggestion['keywords'] = context['content_patterns'].get('top_keywords', [])[:3] or ["content", "strategy", (context['client']['industry'] or "").lower()]
+        # Ensure keywords is a list
+        if isinstance(suggestion['keywords'], str):
+            suggestion['keywords'] = [k.strip() for k in suggestion['keywords'].split(',')]
+        
+        # Add hashtags if missing
+        if not suggestion.get('hashtags'):
+            industry_tag = (context['client']['industry'] or "").lower().replace(' ', '')
+            suggestion['hashtags'] = [
+                f"#{industry_tag}", 
+                f"#{suggestion['content_type'].lower()}", 
+                f"#trending{industry_tag.capitalize()}", 
+                f"#{context['client']['name'].replace(' ', '').lower()}"
+            ]
+        if isinstance(suggestion['hashtags'], str):
+            suggestion['hashtags'] = [h.strip() for h in suggestion['hashtags'].split(',')]
+        # Ensure hashtags start with #
+        suggestion['hashtags'] = [
+            h if h.startswith('#') else f"#{h}" 
+            for h in suggestion['hashtags'] if h
+        ]
+        return suggestion
@@ -0,0 +1,76 @@
+"""
+MinHash signatures and LSH banding for near-duplicate detection.
+
+Shingles are hashed once with CRC32 and all permutations are applied in one
+vectorized numpy expression, so a signature costs a few array operations
+rather than a Python loop per permutation.
+"""
+
+from typing import List, Optional, Set
+import re
+import zlib
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS  # 4 rows -> candidates from roughly 0.4 Jaccard upwards
+
+# Bodies with fewer shingles than this (e.g. the "being generated" placeholder) get no signature
+MIN_BODY_SHINGLES = 20
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = np.random.RandomState(1275)
+_PERM_A = _rng.randint(1, (1 << 32) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 32) - 1, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+def _words(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+def topic_shingles(topic: Optional[str]) -> Set[str]:
+    """Character 3-grams of the normalized topic (robust to small wording changes)"""
+    normalized = " ".join(_words(topic or ""))
+    if len(normalized) < 3:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+def body_shingles(body: Optional[str]) -> Set[str]:
+    """Word 3-grams of the body"""
+    words = _words(body or "")
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+def signature(shingles: Set[str]) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERM uint32 values) of a shingle set, or None if it is empty"""
+    if not shingles:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p for every shingle and permutation at once; uint64 overflow wraps as intended
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+def topic_signature(topic: Optional[str]) -> Optional[np.ndarray]:
+    return signature(topic_shingles(topic))
+
+def body_signature(body: Optional[str]) -> Optional[np.ndarray]:
+    shingles = body_shingles(body)
+    if len(shingles) < MIN_BODY_SHINGLES:
+        return None
+    return signature(shingles)
+
+def to_bytes(sig: Optional[np.ndarray]) -> Optional[bytes]:
+    return sig.astype("<u4").tobytes() if sig is not None else None
+
+def from_bytes(data: Optional[bytes]) -> Optional[np.ndarray]:
+    return np.frombuffer(data, dtype="<u4") if data else None
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    """One bucket key per LSH band (buckets are kept per band, so keys only need to differ within one)"""
+    return [zlib.crc32(band.tobytes()) for band in sig.reshape(BANDS, ROWS_PER_BAND)]
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
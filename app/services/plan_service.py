@@ -0,0 +1,181 @@
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import asyncio
+from sqlalchemy import update
+from app.db.models import Content, ContentType, ContentStatus
+from app.db.database import AsyncSessionLocal
+from app.core import llm
+from app.core.config import settings
+from app.core.json_stream import JSONObjectExtractor
+from app.services.generation_service import generate_and_store, choose_mode
+from app.services.job_events import job_events, QUEUED, DONE, FAILED
+
+# Plan items get their own pool so a plan runs PLAN_CONCURRENCY crews at once without starving single generations
+plan_executor = ThreadPoolExecutor(max_workers=settings.PLAN_CONCURRENCY)
+
+# Response schema for the calendar (one object per plan item)
+PLAN_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "topic": {"type": "string"},
+            "content_type": {"type": "string"},
+            "keywords": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["title", "topic", "content_type", "keywords"],
+    },
+}
+
+def _content_type(value: Any, allowed: List[str]) -> str:
+    """Map the model's content type onto one of the requested types"""
+    value = str(value or "").strip().lower()
+    return value if value in allowed else allowed[0]
+
+def render_calendar(items: List[Dict[str, Any]]) -> str:
+    """Readable calendar stored as the plan's body"""
+    lines = []
+    for item in items:
+        lines.append(f"{item['scheduled_for']:%Y-%m-%d} [{item['content_type']}] {item['title']}")
+        if item["keywords"]:
+            lines.append(f"    Keywords: {item['keywords']}")
+    return "\n".join(lines)
+
+async def draft_calendar(
+    client_info,
+    theme: str,
+    item_count: int,
+    content_types: List[str],
+    start_date: datetime,
+    cadence_days: int,
+) -> List[Dict[str, Any]]:
+    """Ask the model for a structured calendar of `item_count` items"""
+    prompt = f"""
+    You are a content strategist for {client_info.name}, a company in the {client_info.industry} industry.
+    Their target audience: {client_info.target_audience}. Brand voice: {client_info.brand_voice}.
+
+    Plan {item_count} pieces of content around the theme "{theme}", one every {cadence_days} day(s) starting {start_date:%Y-%m-%d}.
+    Each piece must have a distinct angle. Use only these content types: {', '.join(content_types)}.
+
+    Return a JSON array of {item_count} objects in publishing order, each with title, topic (one sentence brief),
+    content_type and keywords (3-5 strings).
+    """
+    extractor = JSONObjectExtractor()
+    entries: List[Dict[str, Any]] = []
+    response = await llm.get_generative_model().generate_content_async(
+        prompt,
+        generation_config={"response_mime_type": "application/json", "response_schema": PLAN_SCHEMA},
+        stream=True
+    )
+    async for chunk in response:
+        entries.extend(extractor.feed(chunk.text))
+        if len(entries) >= item_count:
+            break
+
+    items = []
+    for index, entry in enumerate(entries[:item_count]):
+        keywords = entry.get("keywords") or []
+        if isinstance(keywords, str):
+            keywords = [k.strip() for k in keywords.split(",")]
+        title = str(entry.get("title") or entry.get("topic") or f"{theme} #{index + 1}")
+        items.append({
+            "title": title[:255],
+            "topic": str(entry.get("topic") or title)[:255],
+            "content_type": _content_type(entry.get("content_type"), content_types),
+            "keywords": ", ".join(k for k in keywords if k)[:255],
+            "scheduled_for": start_date + timedelta(days=index * cadence_days),
+        })
+    return items
+
+async def _record_progress(plan_id: int, succeeded: bool) -> None:
+    """Count one finished item on the plan (a single atomic UPDATE, safe with items finishing together)"""
+    column = Content.plan_completed if succeeded else Content.plan_failed
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(Content).where(Content.id == plan_id).values({column: column + 1})
+        )
+        await session.commit()
+
+async def expand_plan(
+    plan_id: int,
+    client_id: int,
+    client_info,
+    theme: str,
+    item_count: int,
+    content_types: List[str],
+    start_date: datetime,
+    cadence_days: int,
+    word_count: Optional[int],
+    tone: Optional[str],
+    user_id: Optional[str] = None,
+) -> None:
+    """Draft the calendar, create one child job per item and generate them in parallel under a cap"""
+    try:
+        items = await draft_calendar(client_info, theme, item_count, content_types, start_date, cadence_days)
+        if not items:
+            raise ValueError("The model returned no plan items")
+    except Exception as e:
+        async with AsyncSessionLocal() as session:
+            plan = await session.get(Content, plan_id)
+            if plan:
+                plan.title = f"Error: {str(e)[:50]}"
+                plan.body = f"Error generating content plan: {str(e)}"
+                plan.plan_total = 0
+                plan.status = ContentStatus.REVIEW
+                plan.generation_stage = FAILED
+                await session.commit()
+        await job_events.announce(plan_id, user_id, FAILED)
+        return
+
+    # Materialize the calendar: the plan's body plus one placeholder child per item, in one flush
+    async with AsyncSessionLocal() as session:
+        plan = await session.get(Content, plan_id)
+        if plan is None:
+            return  # Deleted while the calendar was being drafted
+        plan.title = f"Content plan: {theme}"[:255]
+        plan.body = render_calendar(items)
+        plan.plan_total = len(items)
+        children = [
+            Content(
+                title=f"Generating {item['title']}..."[:255],
+                body="Content is being generated. Please check back in a few minutes.",
+                content_type=ContentType[item["content_type"].upper()],
+                status=ContentStatus.DRAFT,
+                topic=item["topic"],
+                keywords=item["keywords"],
+                client_id=client_id,
+                word_count=word_count,
+                parent_id=plan_id,
+                scheduled_for=item["scheduled_for"],
+                generation_stage=QUEUED,
+                generation_mode=choose_mode(item["content_type"], word_count),
+            )
+            for item in items
+        ]
+        session.add_all(children)
+        await session.commit()
+        jobs = [(child.id, child.generation_mode, item) for child, item in zip(children, items)]
+    for child_id, _, _ in jobs:
+        await job_events.announce(child_id, user_id, QUEUED)
+
+    semaphore = asyncio.Semaphore(settings.PLAN_CONCURRENCY)
+
+    async def generate_item(child_id: int, mode: str, item: Dict[str, Any]) -> None:
+        async with semaphore:
+            succeeded = await generate_and_store(
+                child_id, client_id, client_info, item["topic"], item["content_type"],
+                word_count, tone, item["keywords"], run_on=plan_executor, user_id=user_id, mode=mode
+            )
+        await _record_progress(plan_id, succeeded)
+
+    await asyncio.gather(*(generate_item(child_id, mode, item) for child_id, mode, item in jobs))
+
+    async with AsyncSessionLocal() as session:
+        plan = await session.get(Content, plan_id)
+        if plan:
+            plan.status = ContentStatus.REVIEW
+            plan.generation_stage = DONE
+            await session.commit()
+    await job_events.announce(plan_id, user_id, DONE)
@@ -0,0 +1,104 @@
+from typing import Any, Callable, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import multiprocessing
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.text_processing import clean_unicode_content, postprocess_output, postprocess_batch
+
+Processed = Tuple[str, str, str]  # (title, body, visual suggestions)
+
+class PostProcessor:
+    """Runs CPU-heavy post-processing of model output in worker processes.
+
+    Small outputs are processed inline (the IPC round trip would cost more than the work).
+    Submissions are bounded, so a bulk run queues here instead of piling up inside the pool.
+    """
+
+    def __init__(self, workers: int, inline_max_chars: int, max_pending: int, batch_size: int):
+        self.workers = workers
+        self.inline_max_chars = inline_max_chars
+        self.batch_size = batch_size
+        self._pending = asyncio.Semaphore(max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            # spawn: workers must not inherit the event loop, DB connections or threads of the API process
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def _submit(self, function, *args):
+        """Run a function in the pool, waiting for a free slot first; None if the pool is unavailable"""
+        pool = self._get_pool()
+        if pool is None:
+            return None
+        async with self._pending:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, function, *args)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool next time and process this payload inline
+                self._pool = None
+                metrics.increment("postprocess.pool_broken")
+                return None
+
+    async def _process(self, raw: str, function, *args):
+        """Run inline for small payloads, in the pool otherwise (inline again if the pool is unavailable)"""
+        if len(raw) > self.inline_max_chars:
+            result = await self._submit(function, raw, *args)
+            if result is not None:
+                metrics.increment("postprocess.pool")
+                return result
+        metrics.increment("postprocess.inline")
+        return function(raw, *args)
+
+    async def run(self, raw: str, topic: Optional[str]) -> Processed:
+        """Clean and split one crew output"""
+        return await self._process(raw, postprocess_output, topic)
+
+    async def clean(self, raw: str) -> str:
+        """Only remove emojis and special Unicode"""
+        return await self._process(raw, clean_unicode_content)
+
+    async def run_many(
+        self, items: List[Tuple[str, Any]], function: Callable[[list], list] = postprocess_batch
+    ) -> List[Any]:
+        """Post-process many (raw, argument) outputs with a batch function of the pure module,
+        submitting them to the pool in batches of `batch_size` (crew output by default)"""
+        if sum(len(raw) for raw, _ in items) <= self.inline_max_chars:
+            return function(items)
+
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+
+        async def run_batch(batch):
+            result = await self._submit(function, batch)
+            return result if result is not None else function(batch)
+
+        results: List[Any] = []
+        for processed in await asyncio.gather(*(run_batch(batch) for batch in batches)):
+            results.extend(processed)
+        return results
+
+    async def warm_up(self) -> None:
+        """Start the worker processes (and their imports) before the first large output arrives"""
+        pool = self._get_pool()
+        if pool is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(
+                loop.run_in_executor(pool, postprocess_output, "warm-up", None) for _ in range(self.workers)
+            ))
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+postprocessor = PostProcessor(
+    workers=settings.POSTPROCESS_WORKERS,
+    inline_max_chars=settings.POSTPROCESS_INLINE_MAX_CHARS,
+    max_pending=settings.POSTPROCESS_MAX_PENDING,
+    batch_size=settings.POSTPROCESS_BATCH_SIZE,
+)
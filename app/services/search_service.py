@@ -0,0 +1,167 @@
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import ContentType, ContentStatus
+from app.db.content_blobs import load_texts
+
+SNIPPET_START = "<mark>"
+SNIPPET_STOP = "</mark>"
+HEADLINE_OPTIONS = f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxFragments=2, MaxWords=30, MinWords=10"
+
+def encode_cursor(score: float, content_id: int) -> str:
+    """Encode a (score, id) keyset position as an opaque cursor"""
+    raw = json.dumps([score, content_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        score, content_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), int(content_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def to_fts5_query(query: str) -> str:
+    """Quote each term so user input can't break FTS5 query syntax (terms are ANDed)"""
+    terms = [term.replace('"', '""') for term in query.split() if term.strip()]
+    return " ".join(f'"{term}"' for term in terms)
+
+class ContentSearchService:
+    """Ranked full-text search over the content of a user's clients"""
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def search(
+        self,
+        user_id: str,
+        query: str,
+        client_id: Optional[int] = None,
+        status: Optional[ContentStatus] = None,
+        content_type: Optional[ContentType] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """Run a search and return one page of ranked results plus the next cursor"""
+        params: Dict[str, Any] = {"user_id": user_id, "limit": limit + 1}
+
+        # Filters shared by both backends (enums are stored by name)
+        filters = ["cl.user_id = :user_id"]
+        if client_id is not None:
+            filters.append("c.client_id = :client_id")
+            params["client_id"] = client_id
+        if status is not None:
+            filters.append("c.status = :status")
+            params["status"] = status.name
+        if content_type is not None:
+            filters.append("c.content_type = :content_type")
+            params["content_type"] = content_type.name
+        if created_from is not None:
+            filters.append("c.created_at >= :created_from")
+            params["created_from"] = created_from
+        if created_to is not None:
+            filters.append("c.created_at < :created_to")
+            params["created_to"] = created_to
+
+        dialect = self.db.bind.dialect.name
+        if dialect == "postgresql":
+            inner = self._postgres_query(filters)
+            params["query"] = query
+        elif dialect == "sqlite":
+            inner = self._sqlite_query(filters)
+            params["query"] = to_fts5_query(query)
+            if not params["query"]:
+                return {"items": [], "next_cursor": None}
+        else:
+            raise ValueError(f"Full-text search is not supported on {dialect}")
+
+        # Keyset pagination on (score desc, id desc)
+        page_filter = ""
+        if cursor:
+            params["cursor_score"], params["cursor_id"] = decode_cursor(cursor)
+            page_filter = (
+                "WHERE (hits.score < :cursor_score "
+                "OR (hits.score = :cursor_score AND hits.id < :cursor_id))"
+            )
+
+        statement = text(
+            f"SELECT * FROM ({inner}) AS hits {page_filter} "
+            "ORDER BY hits.score DESC, hits.id DESC LIMIT :limit"
+        )
+        rows = (await self.db.execute(statement, params)).mappings().all()
+
+        items = [self._to_result(row) for row in rows[:limit]]
+        if dialect == "postgresql":
+            await self._blob_snippets(items, [row["body_blob"] for row in rows[:limit]], query)
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last["rank"], last["id"])
+
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _postgres_query(self, filters: List[str]) -> str:
+        """tsvector match ranked with ts_rank_cd, snippet from ts_headline (inline bodies only, see _blob_snippets)"""
+        return f"""
+            SELECT c.id, c.title, c.content_type, c.status, c.topic, c.client_id, c.created_at, c.body_blob,
+                   CAST(ts_rank_cd(c.search_vector, q.query) AS double precision) AS score,
+                   ts_headline('english', c.body, q.query, '{HEADLINE_OPTIONS}') AS snippet
+            FROM contents c
+            JOIN clients cl ON cl.id = c.client_id
+            CROSS JOIN websearch_to_tsquery('english', :query) AS q(query)
+            WHERE c.search_vector @@ q.query AND {" AND ".join(filters)}
+        """
+
+    async def _blob_snippets(self, items: List[Dict[str, Any]], digests: List[Optional[str]], query: str) -> None:
+        """Headlines for the page's bodies stored out of row, in one round trip"""
+        spilled = [(item, digest) for item, digest in zip(items, digests) if digest]
+        if not spilled:
+            return
+        texts = await self.db.run_sync(
+            lambda sync_db: load_texts(sync_db.connection(), [digest for _, digest in spilled])
+        )
+        statement = text(f"""
+            SELECT t.i, ts_headline('english', t.body, websearch_to_tsquery('english', :query), '{HEADLINE_OPTIONS}') AS snippet
+            FROM unnest(CAST(:positions AS integer[]), CAST(:bodies AS text[])) AS t(i, body)
+        """)
+        result = await self.db.execute(statement, {
+            "query": query,
+            "positions": list(range(len(spilled))),
+            "bodies": [texts.get(digest, "") for _, digest in spilled],
+        })
+        for position, snippet in result.all():
+            spilled[position][0]["snippet"] = snippet
+
+    def _sqlite_query(self, filters: List[str]) -> str:
+        """FTS5 match ranked with bm25 (negated so higher is better), snippet from snippet()"""
+        return f"""
+            SELECT c.id, c.title, c.content_type, c.status, c.topic, c.client_id, c.created_at,
+                   -bm25(contents_fts, 10.0, 1.0, 5.0, 5.0) AS score,
+                   snippet(contents_fts, 1, '{SNIPPET_START}', '{SNIPPET_STOP}', '...', 24) AS snippet
+            FROM contents_fts
+            JOIN contents c ON c.id = contents_fts.rowid
+            JOIN clients cl ON cl.id = c.client_id
+            WHERE contents_fts MATCH :query AND {" AND ".join(filters)}
+        """
+
+    def _to_result(self, row) -> Dict[str, Any]:
+        """Map a raw result row onto the API shape"""
+        created_at = row["created_at"]
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "content_type": ContentType[row["content_type"]].value,
+            "status": ContentStatus[row["status"]].value if row["status"] else None,
+            "topic": row["topic"],
+            "client_id": row["client_id"],
+            "created_at": created_at,
+            "rank": float(row["score"]),
+            "snippet": row["snippet"],
+        }
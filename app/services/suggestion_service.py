@@ -0,0 +1,223 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+from sqlalchemy import select, and_, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Client, ClientContentProfile, ContentSuggestionCache
+from app.db.database import AsyncSessionLocal, async_engine
+from app.services.memory_service import MemoryService
+from app.core.config import settings
+from app.core.lifecycle import lifecycle
+from app.core import llm
+
+# Cache outcomes reported to the caller
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+
+# Advisory lock held by the one worker that runs pre-generation (PostgreSQL)
+PREWARM_LOCK_KEY = 0x5e66e57  # Any constant shared by every worker
+
+def suggestion_fingerprint(client_updated_at: Optional[datetime], profile_version: Optional[int]) -> str:
+    """Identifies the client profile and content history a set of suggestions was built from"""
+    stamp = client_updated_at.isoformat() if client_updated_at else ""
+    return hashlib.sha256(f"{stamp}:{profile_version or 0}".encode()).hexdigest()
+
+def _is_error(suggestions: List[Dict[str, Any]]) -> bool:
+    return bool(suggestions) and isinstance(suggestions[0], dict) and "error" in suggestions[0]
+
+class SuggestionCache:
+    """Stale-while-revalidate cache for AI content suggestions, with per-client request coalescing"""
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[int, int], asyncio.Task] = {}
+        self._prewarm_task: Optional[asyncio.Task] = None
+
+    async def get(self, db: AsyncSession, client_id: int, suggestion_count: int) -> Tuple[List[Dict[str, Any]], str]:
+        """Return (suggestions, cache outcome); only a miss waits for the model"""
+        row = (await db.execute(
+            select(
+                Client.updated_at,
+                ClientContentProfile.version,
+                ContentSuggestionCache.fingerprint,
+                ContentSuggestionCache.suggestions,
+                ContentSuggestionCache.generated_at,
+            )
+            .select_from(Client)
+            .outerjoin(ClientContentProfile, ClientContentProfile.client_id == Client.id)
+            .outerjoin(ContentSuggestionCache, and_(
+                ContentSuggestionCache.client_id == Client.id,
+                ContentSuggestionCache.suggestion_count == suggestion_count,
+            ))
+            .where(Client.id == client_id)
+        )).first()
+
+        if row is not None and row.suggestions is not None:
+            fresh = (
+                row.fingerprint == suggestion_fingerprint(row.updated_at, row.version)
+                and datetime.now() - row.generated_at < timedelta(seconds=settings.SUGGESTION_CACHE_TTL_SECONDS)
+            )
+            if fresh:
+                return row.suggestions, HIT
+            # Serve what we have and refresh behind the response
+            self.refresh(client_id, suggestion_count)
+            return row.suggestions, STALE
+
+        # Nothing cached yet: wait for the (shared) generation, without cancelling it if this request goes away
+        return await asyncio.shield(self.refresh(client_id, suggestion_count)), MISS
+
+    def refresh(self, client_id: int, suggestion_count: int) -> asyncio.Task:
+        """Start a generation for this client and count, or join the one already running"""
+        key = (client_id, suggestion_count)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._generate(client_id, suggestion_count))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _generate(self, client_id: int, suggestion_count: int) -> List[Dict[str, Any]]:
+        """Generate suggestions in a session of our own and store them unless the model failed"""
+        async with lifecycle.track_job():
+            try:
+                async with AsyncSessionLocal() as session:
+                    memory_service = MemoryService(session)
+
+                    # Fingerprint the inputs before generating, so a write during generation leaves the entry stale
+                    await memory_service.get_client_history_async(client_id)
+                    inputs = (await session.execute(
+                        select(Client.updated_at, ClientContentProfile.version)
+                        .select_from(Client)
+                        .outerjoin(ClientContentProfile, ClientContentProfile.client_id == Client.id)
+                        .where(Client.id == client_id)
+                    )).first()
+                    if inputs is None:
+                        return [{"error": "Client not found"}]
+
+                    suggestions = await memory_service.generate_content_suggestions(client_id, suggestion_count)
+                    if _is_error(suggestions):
+                        return suggestions
+
+                    await session.merge(ContentSuggestionCache(
+                        client_id=client_id,
+                        suggestion_count=suggestion_count,
+                        fingerprint=suggestion_fingerprint(inputs.updated_at, inputs.version),
+                        suggestions=suggestions,
+                        generated_at=datetime.now(),
+                    ))
+                    try:
+                        await session.commit()
+                    except IntegrityError:
+                        await session.rollback()  # Another worker stored the same entry first
+                    return suggestions
+            except Exception as e:
+                return [{"error": f"Failed to generate suggestions: {str(e)}"}]
+
+    # Background pre-generation
+
+    def start(self) -> None:
+        """Start pre-generating suggestions for active clients"""
+        if settings.SUGGESTION_PREWARM_ENABLED and self._prewarm_task is None:
+            self._prewarm_task = asyncio.get_running_loop().create_task(self._prewarm_loop())
+
+    def stop(self) -> None:
+        """Stop scheduling pre-generation (a generation already running is drained with other jobs)"""
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+            self._prewarm_task = None
+
+    async def _prewarm_loop(self) -> None:
+        leader = None  # Connection holding the advisory lock, while this worker is the one pre-generating
+        try:
+            while True:
+                try:
+                    leader = await self._keep_leadership(leader)
+                    if leader is not None or async_engine.dialect.name != "postgresql":
+                        await self.prewarm_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    pass  # Try again on the next interval
+                await asyncio.sleep(settings.SUGGESTION_PREWARM_INTERVAL_SECONDS)
+        finally:
+            if leader is not None:
+                await self._resign(leader)
+
+    async def _keep_leadership(self, leader):
+        """On PostgreSQL, only the worker holding the advisory lock pre-generates; the lock lives as long
+        as its connection, so a worker that exits or loses the connection hands over to the next one"""
+        if async_engine.dialect.name != "postgresql":
+            return None
+        if leader is not None:
+            try:
+                await leader.execute(text("SELECT 1"))
+                return leader
+            except Exception:
+                await leader.invalidate()  # The session, and the lock with it, is gone
+
+        connection = await async_engine.connect()
+        try:
+            # Autocommit, so the held connection doesn't sit idle in a transaction
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            if await connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": PREWARM_LOCK_KEY}):
+                return connection
+        except BaseException:
+            await connection.invalidate()  # The lock may have been taken; don't pool a connection holding it
+            raise
+        await connection.close()
+        return None
+
+    async def _resign(self, leader) -> None:
+        """Release the advisory lock; closing alone would return the connection to the pool still holding it"""
+        try:
+            await leader.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PREWARM_LOCK_KEY})
+            await leader.close()
+        except BaseException:
+            await leader.invalidate()  # Discarding the connection ends its session, and the lock with it
+            raise
+
+    async def prewarm_once(self) -> int:
+        """Regenerate missing or stale default suggestions for recently active clients, rate limited"""
+        if not llm.is_configured():
+            return 0
+
+        suggestion_count = settings.SUGGESTION_DEFAULT_COUNT
+        active_since = datetime.now() - timedelta(days=settings.SUGGESTION_ACTIVE_CLIENT_DAYS)
+        expires_before = datetime.now() - timedelta(seconds=settings.SUGGESTION_CACHE_TTL_SECONDS)
+
+        async with AsyncSessionLocal() as session:
+            # The profile's updated_at moves on every content write, so it doubles as an activity signal
+            result = await session.execute(
+                select(
+                    Client.id,
+                    Client.updated_at,
+                    ClientContentProfile.version,
+                    ContentSuggestionCache.fingerprint,
+                    ContentSuggestionCache.generated_at,
+                )
+                .select_from(Client)
+                .join(ClientContentProfile, ClientContentProfile.client_id == Client.id)
+                .outerjoin(ContentSuggestionCache, and_(
+                    ContentSuggestionCache.client_id == Client.id,
+                    ContentSuggestionCache.suggestion_count == suggestion_count,
+                ))
+                .where(ClientContentProfile.updated_at >= active_since)
+                .order_by(ClientContentProfile.updated_at.desc())
+            )
+            due = [
+                row.id for row in result
+                if row.generated_at is None
+                or row.generated_at < expires_before
+                or row.fingerprint != suggestion_fingerprint(row.updated_at, row.version)
+            ][:settings.SUGGESTION_PREWARM_BATCH_SIZE]
+
+        interval = 60 / max(settings.SUGGESTION_PREWARM_CALLS_PER_MINUTE, 1)
+        for client_id in due:
+            # Shielded so stopping the loop doesn't abandon a generation half-way
+            await asyncio.shield(self.refresh(client_id, suggestion_count))
+            await asyncio.sleep(interval)
+        return len(due)
+
+suggestion_cache = SuggestionCache()
@@ -0,0 +1,72 @@
+"""
+Benchmark the in-memory part of a near-duplicate check.
+
+Builds one client's LSH index from N random topics and bodies, then times
+signing a probe and looking it up (what POST /content/generate pays once the
+client's index is loaded).
+
+Usage: python -m benchmarks.duplicate_benchmark --items 20000 --checks 1000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+VOCABULARY = (
+    "turmeric ginger honey green tea aloe vera allergy relief immune sleep energy "
+    "wellness natural ayurveda herbal remedy skin care digestion stress calm focus "
+    "breakfast recipe smoothie protein fitness workout recovery hydration vitamin "
+    "marketing launch campaign newsletter offer discount seasonal customer story"
+).split()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--checks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+def random_text(rng, words):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+    from app.services import minhash
+    from app.services.duplicate_service import ClientLSHIndex
+
+    index = ClientLSHIndex()
+    topics = []
+    started = time.perf_counter()
+    for content_id in range(1, args.items + 1):
+        topic = random_text(rng, 5)
+        topics.append(topic)
+        index.add(content_id, minhash.topic_signature(topic), minhash.body_signature(random_text(rng, 300)))
+    print(f"indexed {args.items} items in {time.perf_counter() - started:.1f}s")
+
+    timings = []
+    hits = 0
+    for _ in range(args.checks):
+        # Half the probes are light rewordings of an existing topic
+        probe = rng.choice(topics) + " tips" if rng.random() < 0.5 else random_text(rng, 5)
+        started = time.perf_counter()
+        sig = minhash.topic_signature(probe)
+        matches = [
+            content_id for content_id in index.topics.candidates(sig)
+            if minhash.similarity(sig, index.topics.signatures[content_id]) >= 0.8
+        ]
+        timings.append((time.perf_counter() - started) * 1000)
+        hits += bool(matches)
+
+    timings.sort()
+    print(f"checks: {len(timings)}, with matches: {hits}")
+    print(f"p50: {statistics.median(timings):.3f} ms")
+    print(f"p95: {timings[int(len(timings) * 0.95) - 1]:.3f} ms")
+    print(f"max: {timings[-1]:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark a content generation job end to end, replaying recorded model calls.
+
+Runs generate_and_store (crew orchestration, parsing, post-processing and the
+database writes) against a throwaway SQLite database, with every model call
+answered from a cassette (see app.core.cassette), so runs are deterministic
+and offline. Record a cassette once with --record (needs GEMINI_API_KEY),
+then replay it as often as needed; --compare prints the model call counts of
+two cassettes side by side (e.g. recorded before and after a change).
+
+Usage:
+    python -m benchmarks.generation_benchmark --cassette cassettes/blog.jsonl.gz --record
+    python -m benchmarks.generation_benchmark --cassette cassettes/blog.jsonl.gz --runs 20
+    python -m benchmarks.generation_benchmark --cassette new.jsonl.gz --compare old.jsonl.gz
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--record", action="store_true", help="Call the provider and record the cassette")
+    parser.add_argument("--replay-timing", action="store_true", help="Replayed calls take their recorded time")
+    parser.add_argument("--compare", default=None, help="Another cassette to compare call counts with")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mode", choices=("express", "standard", "deep"), default="deep")
+    parser.add_argument("--content-type", default="blog")
+    parser.add_argument("--word-count", type=int, default=800)
+    parser.add_argument("--topic", default="Natural remedies for seasonal allergies")
+    return parser.parse_args()
+
+def seed_database():
+    """Create the schema and one client"""
+    from app.db.database import Base, engine, SessionLocal
+    from app.db.models import Client
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    client = Client(
+        name="Bench Wellness Co",
+        industry="Wellness",
+        brand_voice="Warm, practical and evidence-minded",
+        target_audience="Health-conscious adults",
+        user_id="bench-user",
+    )
+    db.add(client)
+    db.commit()
+    client_id = client.id
+    db.close()
+    return client_id
+
+def client_info(client_id):
+    from app.models.client import Client as ClientSchema
+    fixed = datetime(2026, 1, 1)  # Prompts must not change between recording and replay
+    return ClientSchema(
+        id=client_id,
+        name="Bench Wellness Co",
+        industry="Wellness",
+        brand_voice="Warm, practical and evidence-minded",
+        target_audience="Health-conscious adults",
+        created_at=fixed,
+        updated_at=fixed,
+    )
+
+async def run_jobs(args, client_id):
+    from app.db.database import AsyncSessionLocal
+    from app.db.models import Content, ContentType, ContentStatus
+    from app.services.generation_service import generate_and_store
+
+    info = client_info(client_id)
+    timings = []
+    for _ in range(args.runs):
+        async with AsyncSessionLocal() as session:
+            placeholder = Content(
+                title=f"Generating: {args.topic}",
+                body="Content is being generated...",
+                content_type=ContentType[args.content_type.upper()],
+                status=ContentStatus.DRAFT,
+                topic=args.topic,
+                word_count=args.word_count,
+                client_id=client_id,
+                generation_stage="queued",
+                generation_mode=args.mode,
+            )
+            session.add(placeholder)
+            await session.commit()
+            content_id = placeholder.id
+
+        started = time.perf_counter()
+        await generate_and_store(
+            content_id, client_id, info, args.topic, args.content_type, args.word_count, None, None,
+            user_id="bench-user", mode=args.mode,
+        )
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def print_call_counts(cassette, other_path):
+    from app.core.cassette import Cassette, REPLAY
+
+    counts = cassette.recorded_calls()
+    if other_path is None:
+        for name, count in sorted(counts.items()):
+            print(f"recorded {name}: {count}")
+        return
+    other = Cassette(other_path, REPLAY).recorded_calls()
+    print(f"{'calls':<40} {'this':>6} {'other':>6} {'delta':>6}")
+    for name in sorted(set(counts) | set(other)):
+        print(f"{name:<40} {counts[name]:>6} {other[name]:>6} {counts[name] - other[name]:>+6}")
+
+def main():
+    args = parse_args()
+    os.environ["LLM_CASSETTE_MODE"] = "record" if args.record else "replay"
+    os.environ["LLM_CASSETTE_PATH"] = args.cassette
+    os.environ["LLM_CASSETTE_REPLAY_TIMING"] = "true" if args.replay_timing else "false"
+    if args.record and os.path.exists(args.cassette):
+        os.remove(args.cassette)  # Recording appends; start from an empty cassette
+    path = os.path.join(tempfile.mkdtemp(), "generation_bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from app.core import cassette
+
+    client_id = seed_database()
+    timings = asyncio.run(run_jobs(args, client_id))
+    tape = cassette.active_cassette()
+    if args.record:
+        cassette.save()
+        tape.load()  # Count what was written
+
+    timings.sort()
+    print(f"jobs: {len(timings)} ({args.mode}, {args.content_type}, {'recorded' if args.record else 'replayed'})")
+    print(f"p50: {statistics.median(timings):.1f} ms")
+    print(f"max: {timings[-1]:.1f} ms")
+    print(f"model calls: {dict(tape.calls)}, unrecorded: {dict(tape.misses)}")
+    print_call_counts(tape, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark POST /content/import on a throwaway database, and check its results.
+
+Imports N new content rows through BulkImportService, then updates all of
+them by id (the upsert path). Bodies alternate between short ones, stored
+inline, and long ones, stored out of row (see app.db.content_blobs). The
+update swaps the two, so both directions of the move are exercised. Exits
+non-zero if any row fails or reads back wrong.
+
+Usage: python -m benchmarks.import_benchmark --rows 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--database-url", default=None)
+    return parser.parse_args()
+
+def body(i, large):
+    if large:
+        return f"Paragraph {i} of a long-form article.\n" * 120  # Well above BLOB_MIN_LENGTH
+    return f"Short post {i}"
+
+async def ndjson(rows):
+    for row in rows:
+        yield (json.dumps(row) + "\n").encode("utf-8")
+
+async def run(rows):
+    from sqlalchemy import select
+    from app.db.database import Base, engine, AsyncSessionLocal
+    from app.db.models import Client, Content
+    from app.services.import_service import BulkImportService
+
+    Base.metadata.create_all(bind=engine)
+    async with AsyncSessionLocal() as db:
+        client = Client(name="Import Bench", industry="Wellness", user_id="bench-user")
+        db.add(client)
+        await db.commit()
+        client_id = client.id
+
+    def content(i, large, **extra):
+        return {
+            "title": f"Item {i}", "body": body(i, large), "content_type": "blog",
+            "status": "draft", "client_id": client_id, **extra,
+        }
+
+    failures = []
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        report = await BulkImportService(db, "bench-user").import_content(
+            ndjson(content(i, i % 2 == 1) for i in range(rows))
+        )
+        print(f"insert: {report['inserted']} rows in {time.perf_counter() - started:.2f}s, failed {report['failed']}")
+        if report["inserted"] != rows:
+            failures.append(f"insert: {report['errors'][:3]}")
+
+        ids = (await db.execute(
+            select(Content.id).where(Content.client_id == client_id).order_by(Content.id)
+        )).scalars().all()
+        started = time.perf_counter()
+        report = await BulkImportService(db, "bench-user").import_content(
+            ndjson(content(i, i % 2 == 0, id=content_id) for i, content_id in enumerate(ids))
+        )
+        print(f"upsert: {report['updated']} rows in {time.perf_counter() - started:.2f}s, failed {report['failed']}")
+        if report["updated"] != rows:
+            failures.append(f"upsert: {report['errors'][:3]}")
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Content).where(Content.client_id == client_id).order_by(Content.id))
+        for i, item in enumerate(result.scalars()):
+            if item.body != body(i, i % 2 == 0) or (item.body_blob is not None) != (i % 2 == 0):
+                failures.append(f"row {item.id}: body does not read back as written")
+                break
+    return failures
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'import_bench.db')}"
+
+    failures = asyncio.run(run(args.rows))
+    for failure in failures:
+        print(f"FAILED {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
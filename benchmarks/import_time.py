@@ -0,0 +1,68 @@
+"""
+Measure how long a fresh worker takes before it can accept connections.
+
+Runs each measurement in a new interpreter: import ``app.main``, then run the
+app's startup handlers. Also reports whether the heavy AI modules were pulled
+in at import time (they should only load when a generation runs).
+
+Usage: python -m benchmarks.import_time --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = (
+    "crewai",
+    "langchain_google_genai",
+    "google.generativeai",
+    "bs4",
+)
+
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+asyncio.run(app.main.app.router.startup())
+ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./content_platform.db")
+
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip().splitlines()[-1]
+        results.append(json.loads(output))
+
+    import_ms = [r["import_ms"] for r in results]
+    ready_ms = [r["ready_ms"] for r in results]
+    print(f"import app.main: median {statistics.median(import_ms):.0f} ms (min {min(import_ms):.0f} ms)")
+    print(f"ready to serve:  median {statistics.median(ready_ms):.0f} ms (min {min(ready_ms):.0f} ms)")
+    heavy = results[-1]["heavy_modules"]
+    print(f"heavy modules loaded at import: {', '.join(heavy) if heavy else 'none'}")
+
+if __name__ == "__main__":
+    main()
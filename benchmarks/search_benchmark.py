@@ -0,0 +1,108 @@
+"""
+Benchmark GET /content/search on a seeded corpus.
+
+Seeds a throwaway SQLite database (or the database given with --database-url)
+with N content rows and measures search latency through ContentSearchService.
+
+Usage: python -m benchmarks.search_benchmark --rows 50000 --queries 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+VOCABULARY = (
+    "turmeric ginger honey green tea aloe vera allergy relief immune sleep energy "
+    "wellness natural ayurveda herbal remedy skin care digestion stress calm focus "
+    "breakfast recipe smoothie protein fitness workout recovery hydration vitamin "
+    "marketing launch campaign newsletter offer discount seasonal customer story"
+).split()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+def random_text(rng, words):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+def seed_corpus(rows, clients, rng):
+    """Bulk-insert clients and content, then build the index in one pass"""
+    from sqlalchemy import insert
+    from app.db.database import Base, engine
+    from app.db.models import Client, Content, ContentType, ContentStatus
+    from app.db.search_index import install_search_index, backfill_search_index
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Client), [
+            {"id": i, "name": f"Client {i}", "industry": "Wellness", "user_id": "bench-user"}
+            for i in range(1, clients + 1)
+        ])
+        batch = []
+        for i in range(1, rows + 1):
+            batch.append({
+                "title": random_text(rng, 8).title(),
+                "body_text": random_text(rng, 400),  # Kept inline so the SQL backfill indexes it
+                "topic": random_text(rng, 3),
+                "keywords": ", ".join(rng.sample(VOCABULARY, 4)),
+                "content_type": rng.choice(list(ContentType)),
+                "status": rng.choice(list(ContentStatus)),
+                "client_id": rng.randint(1, clients),
+            })
+            if len(batch) == 2000:
+                connection.execute(insert(Content), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(Content), batch)
+
+        install_search_index(connection)
+        backfill_search_index(connection)
+
+async def run_queries(count, rng):
+    from app.db.database import AsyncSessionLocal
+    from app.services.search_service import ContentSearchService
+
+    timings = []
+    async with AsyncSessionLocal() as db:
+        service = ContentSearchService(db)
+        for _ in range(count):
+            query = " ".join(rng.sample(VOCABULARY, rng.randint(1, 3)))
+            started = time.perf_counter()
+            page = await service.search("bench-user", query, limit=20)
+            if page["next_cursor"]:
+                await service.search("bench-user", query, cursor=page["next_cursor"], limit=20)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "search_bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    started = time.perf_counter()
+    seed_corpus(args.rows, args.clients, rng)
+    print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+    timings = asyncio.run(run_queries(args.queries, rng))
+    timings.sort()
+    print(f"queries: {len(timings)} (first page + second page each)")
+    print(f"p50: {statistics.median(timings):.2f} ms")
+    print(f"p95: {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+    print(f"max: {timings[-1]:.2f} ms")
+
+if __name__ == "__main__":
+    main()